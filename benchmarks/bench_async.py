@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+异步引擎与线程池对比：从本机 aiohttp 服务器（独立进程，每个请求额外延迟 40ms）下载大量 30KB 小图片，
+每种配置在单独的进程中运行，记录耗时、峰值线程数与最大 RSS。需要 PyQt6 与 aiohttp。
+
+    python benchmarks/bench_async.py [文件数，默认 3000]
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 18039
+BODY_SIZE = 30 * 1024
+LATENCY = 0.04
+CONFIGS = ('thread:8', 'thread:32', 'thread:64', 'async:64', 'async:256')
+
+
+def serve(port):
+    """测试服务器：支持 Range 续传"""
+    import asyncio
+    from aiohttp import web
+
+    body = os.urandom(BODY_SIZE)
+
+    async def handle(request):
+        await asyncio.sleep(LATENCY)
+        rng = request.headers.get('Range')
+        if rng:
+            start = int(rng.split('=')[1].split('-')[0])
+            if start >= len(body):
+                return web.Response(status=416)
+            return web.Response(status=206, body=body[start:])
+        return web.Response(body=body)
+
+    app = web.Application()
+    app.router.add_get('/{path:.*}', handle)
+    web.run_app(app, host='127.0.0.1', port=port, print=None, access_log=None, backlog=2048)
+
+
+def run(port, config, count):
+    """在当前进程中用 Worker.download_tasks 下载 count 个文件"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    sys.path.insert(0, ROOT)
+    os.chdir(tempfile.mkdtemp())
+    from douyin_downloader.gui import cfg
+    from douyin_downloader.gui.worker import Worker
+    from douyin_downloader.core.task import DownloadTask, TaskKind
+
+    engine, concurrency = config.split(':')
+    concurrency = int(concurrency)
+    cfg.update({'download_engine': engine, 'async_concurrency': concurrency, 'stall_min_speed_kb': 0,
+                'auto_threads': False})
+    worker = Worker()
+    tasks = [DownloadTask(f'http://127.0.0.1:{port}/a/{i}.jpeg', f'p{i}', TaskKind.IMAGE) for i in range(count)]
+
+    peak_threads = [0]
+
+    def sample():
+        while True:
+            peak_threads[0] = max(peak_threads[0], threading.active_count())
+            time.sleep(0.05)
+
+    threading.Thread(target=sample, daemon=True).start()
+    started = time.time()
+    worker.download_tasks([], tasks, os.getcwd(), concurrency)
+    elapsed = time.time() - started
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print('%-10s %6.2f 秒 %6.0f 个/秒  成功 %d 失败 %d  峰值线程 %d  RSS %.0f MB' % (
+        config, elapsed, count / elapsed, len(worker._completed_tasks), len(worker._failed_tasks),
+        peak_threads[0], rss), flush=True)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    server = subprocess.Popen([sys.executable, __file__, '--serve', str(PORT)])
+    try:
+        time.sleep(2)
+        print(f'{count} 个 {BODY_SIZE // 1024}KB 文件，每个请求延迟 {LATENCY * 1000:.0f}ms')
+        for config in CONFIGS:
+            subprocess.run([sys.executable, __file__, '--run', str(PORT), config, str(count)], check=False)
+    finally:
+        server.kill()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--serve':
+        serve(int(sys.argv[2]))
+    elif len(sys.argv) > 4 and sys.argv[1] == '--run':
+        run(int(sys.argv[2]), sys.argv[3], int(sys.argv[4]))
+    else:
+        main()
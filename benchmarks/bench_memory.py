@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+获取时的内存占用：逐页保留原始 aweme 字典 与 逐页构建精简 AwemeRecord 的对比（tracemalloc）。
+
+    python benchmarks/bench_memory.py [作品数，默认 10000]
+"""
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synth import make_aweme
+from douyin_downloader.core.parser import parse_all_awemes_to_tasks
+from douyin_downloader.core.record import build_aweme_record
+
+PAGE_SIZE = 18
+
+
+def run(n, compact):
+    """模拟 fetch_tasks：逐页解析任务并保留作品数据，返回 (保留 MB, 峰值 MB)"""
+    random.seed(1)
+    gc.collect()
+    tracemalloc.start()
+    kept, tasks = [], []
+    for start in range(0, n, PAGE_SIZE):
+        page = [make_aweme(i) for i in range(start, min(n, start + PAGE_SIZE))]
+        if compact:
+            page = [build_aweme_record(a) for a in page]
+        vtasks, itasks, _, _, _ = parse_all_awemes_to_tasks(page)
+        kept.extend(page)
+        tasks.extend(vtasks)
+        tasks.extend(itasks)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / 2 ** 20, peak / 2 ** 20
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f'{n} 个作品')
+    print('原始字典:     保留 %.1f MB，峰值 %.1f MB' % run(n, False))
+    print('AwemeRecord:  保留 %.1f MB，峰值 %.1f MB' % run(n, True))
+
+
+if __name__ == '__main__':
+    main()
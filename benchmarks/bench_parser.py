@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+任务构建耗时与内存：合成作品（默认 5 万个）构建 DownloadTask，
+对比 parse_all_awemes_to_tasks（完整列表）与 iter_download_tasks（流式，不保留任务）。
+
+    python benchmarks/bench_parser.py [作品数，默认 50000]
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synth import make_pages
+from douyin_downloader.core.parser import parse_all_awemes_to_tasks, iter_download_tasks
+from douyin_downloader.core.record import build_aweme_record
+
+ROUNDS = 3
+
+
+def best_of(func):
+    best = None
+    for _ in range(ROUNDS):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def traced(func):
+    """返回 (调用结束时仍保留的 MB, 峰值 MB)"""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / 2 ** 20, peak / 2 ** 20
+
+
+def consume(tasks):
+    count = 0
+    for _ in tasks:
+        count += 1
+    return count
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    records = [build_aweme_record(a) for page in make_pages(n, 50) for a in page]
+    gc.collect()
+
+    vtasks, itasks, albums, images, lives = parse_all_awemes_to_tasks(records)
+    print(f'{len(records)} 个作品 -> {len(vtasks) + len(itasks)} 个任务'
+          f'（视频 {len(vtasks)}，图集 {albums}，图片 {images}，实况 {lives}）')
+    del vtasks, itasks
+
+    print('parse_all_awemes_to_tasks: %.3f 秒，保留任务 %.1f MB' % (
+        best_of(lambda: parse_all_awemes_to_tasks(records)),
+        traced(lambda: parse_all_awemes_to_tasks(records))[0]))
+    print('iter_download_tasks:       %.3f 秒，峰值 %.1f MB' % (
+        best_of(lambda: consume(iter_download_tasks(records))),
+        traced(lambda: consume(iter_download_tasks(records)))[1]))
+
+
+if __name__ == '__main__':
+    main()
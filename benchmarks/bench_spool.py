@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+磁盘暂存（spool_raw_pages）的内存占用：用 Worker.fetch_tasks 获取合成分页（替换掉网络请求），
+GUI 侧按 MainWindow 的方式保留收到的任务，对比内存模式与暂存模式获取结束时仍保留的内存（tracemalloc），
+并记录暂存模式下逐页读回全部作品的峰值。需要 PyQt6。
+
+    python benchmarks/bench_spool.py [作品数，默认 10000]
+"""
+import gc
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+from urllib.parse import parse_qsl, urlparse
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synth import make_aweme
+
+PAGE_SIZE = 18
+
+
+class _Response:
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+def _fake_api(n):
+    """按游标（页码）即时生成分页，分页数据不计入保留内存"""
+    pages = (n + PAGE_SIZE - 1) // PAGE_SIZE
+
+    def request(session, url, *args, **kwargs):
+        cursor = int(dict(parse_qsl(urlparse(url).query))['max_cursor'])
+        random.seed(cursor)
+        items = [make_aweme(i) for i in range(cursor * PAGE_SIZE, min(n, (cursor + 1) * PAGE_SIZE))]
+        return _Response({'aweme_list': items, 'max_cursor': cursor + 1, 'has_more': int(cursor + 1 < pages)})
+    return request
+
+
+def run(n, spool):
+    from douyin_downloader.gui import cfg
+    from douyin_downloader.gui import worker as worker_module
+
+    worker_module.resolve_short_url_and_extract = lambda url, session=None: 'MS4wLjABAAAAbench'
+    worker_module.get_user_profile_info = lambda session, sec: ({'nickname': 'bench', 'unique_id': 'bench'}, None)
+    worker_module.api_request_with_retry = _fake_api(n)
+    worker_module.time.sleep = lambda seconds: None
+    cfg.update({'spool_raw_pages': spool, 'auto_download_while_fetching': False})
+
+    worker = worker_module.Worker()
+    gui = {'vtasks': [], 'itasks': [], 'spool': None}
+
+    def on_tasks(vtasks, itasks, user_info, records):
+        gui['vtasks'].extend(vtasks)
+        gui['itasks'].extend(itasks)
+
+    worker.tasks_signal.connect(on_tasks)
+    worker.spool_signal.connect(lambda user_info, page_spool: gui.__setitem__('spool', page_spool))
+
+    gc.collect()
+    tracemalloc.start()
+    worker.fetch_tasks('https://www.douyin.com/user/bench', '', 'favorite', False)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    line = '%-8s 作品 %d，获取结束保留 %.1f MB' % ('暂存' if spool else '内存', len(worker.all_awemes), retained / 2 ** 20)
+    if spool:
+        count = sum(len(page) for page in worker.all_awemes.iter_record_pages())
+        peak = tracemalloc.get_traced_memory()[1] - retained
+        line += '，逐页读回 %d 个作品峰值 +%.1f MB，暂存文件 %.1f MB' % (
+            count, peak / 2 ** 20, os.path.getsize(worker.all_awemes.path) / 2 ** 20)
+    tracemalloc.stop()
+    print(line, flush=True)
+
+
+def main():
+    from PyQt6 import QtWidgets
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    app = QtWidgets.QApplication([])
+    os.chdir(tempfile.mkdtemp())  # 作品库与暂存文件写入临时目录
+    run(n, False)
+    run(n, True)
+    del app
+
+
+if __name__ == '__main__':
+    main()
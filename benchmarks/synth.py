@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+合成作品数据 - 生成与接口结构相近的原始 aweme（视频 / 图集 / 实况图），供基准脚本使用
+"""
+import random
+import string
+
+_HOSTS = ['v3-web', 'v5-dy-o', 'v26-web']
+_GEARS = [
+    ('adapt_lowest_1080_1', 1080, 1920, 'h264'),
+    ('normal_720_0', 720, 1280, 'h264'),
+    ('normal_540_0', 540, 960, 'h264'),
+    ('adapt_1080_1', 1080, 1920, 'bytevc1'),
+    ('low_720_1', 720, 1280, 'bytevc1'),
+]
+
+
+def _url(host, i, kind, ext):
+    sig = ''.join(random.choices(string.ascii_letters + string.digits, k=180))
+    return (f"https://{host}.douyinvod.com/obj/tos-cn-ve/{kind}{i}/media{ext}"
+            f"?a=6383&br=1&bt=1&cd=0&ch=26&video_id=v0{i}&file_id=f{i}&sig={sig}")
+
+
+def make_aweme(i, kind=None):
+    """第 i 个作品；kind 为 video / album / live，默认按 7:1:1 随机"""
+    kind = kind or random.choice(['video'] * 7 + ['album', 'live'])
+    aweme = {
+        'aweme_id': str(7300000000000000000 + i),
+        'desc': '测试作品描述 #话题 ' * random.randint(1, 6) + str(i),
+        'create_time': 1700000000 + i * 3600,
+        'statistics': {'digg_count': i, 'comment_count': 1, 'collect_count': 2, 'share_count': 3,
+                       'recommend_count': 4, 'play_count': 0, 'admire_count': 0},
+        'author': {'unique_id': 'uid123', 'nickname': 'n', 'signature': 'x' * 200,
+                   'avatar_thumb': {'url_list': [_url(h, i, 'av', '.jpeg') for h in _HOSTS]}},
+        'mix_info': {'mix_name': '合集A'} if i % 5 == 0 else None,
+        'video': {'duration': 35000 + i, 'bit_rate': [],
+                  'cover': {'url_list': [_url(h, i, 'cover', '.jpeg') for h in _HOSTS]},
+                  'play_addr': {'url_list': [_url(h, i, 'play', '.mp4') for h in _HOSTS]}},
+        'text_extra': [{'hashtag_name': 'x' * 20} for _ in range(5)],
+        'extra_blob': 'y' * 2000,  # 接口中其余用不到的字段
+    }
+    if kind == 'video':
+        for gear, width, height, codec in _GEARS:
+            aweme['video']['bit_rate'].append({
+                'gear_name': gear, 'bit_rate': random.randint(500000, 3000000),
+                'is_bytevc1': int(codec == 'bytevc1'),
+                'play_addr': {'url_list': [_url(h, i, gear, '.mp4') for h in _HOSTS], 'width': width,
+                              'height': height, 'data_size': random.randint(2_000_000, 80_000_000)},
+            })
+    else:
+        aweme['images'] = []
+        for j in range(random.randint(2, 9)):
+            image = {'width': 1080, 'height': 1440,
+                     'url_list': [_url(h, i, f'img{j}', ext) for h, ext in zip(_HOSTS, ['.webp', '.jpeg', '.jpeg'])]}
+            if kind == 'live':
+                image['video'] = {'bit_rate': [{
+                    'bit_rate': 900000, 'gear_name': 'normal_720_0',
+                    'play_addr': {'url_list': [_url(h, i, f'live{j}', '.mp4') for h in _HOSTS],
+                                  'width': 720, 'height': 960, 'data_size': 3_000_000},
+                }]}
+            aweme['images'].append(image)
+    return aweme
+
+
+def make_pages(n, per_page=18, seed=1):
+    """n 个作品按 per_page 分页（结果只由 seed 决定）"""
+    random.seed(seed)
+    items = [make_aweme(i) for i in range(n)]
+    return [items[k:k + per_page] for k in range(0, n, per_page)]
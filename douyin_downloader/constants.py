@@ -10,6 +10,8 @@ TEXT_INFO_USER = "[信息] 抖音用户：{nickname}"
 TEXT_INFO_FETCH = "[进程] 正在获取作品数据..."
 TEXT_INFO_FETCH_PAGE = "[进程] 收到第 {page} 页，作品数: {total}【+ {count}】"
 TEXT_INFO_FETCH_DONE = "[完成] 获取完成"
+TEXT_INFO_FETCH_DEDUP = "[信息] 第 {page} 页去除重复作品 {dup} 个"
+TEXT_INFO_FETCH_DEDUP_TOTAL = "[信息] 本次获取共去除重复作品 {dup} 个"
 TEXT_INFO_DOWNLOAD_START = "[下载] 开始下载 (视频 {vcount}, 图片+实况 {icount}, 线程数 {threads})"
 
 TEXT_WARN_PROFILE_FAIL = "[错误] 获取用户信息异常: Cookie 错误，请重新获取"
@@ -36,11 +38,27 @@ PAGE_COUNT_PER_REQUEST = 50
 DELAY_BETWEEN_PAGES = 0.1
 
 CONFIG_FILE = 'config.ini'
+METADATA_DB_FILE = 'douyin_metadata.db'
+DOWNLOAD_JOURNAL_FILE = 'download_journal.db'  # 下载任务日志（中断后继续/重试失败）
+DOWNLOAD_MANIFEST_FILE = '.download_manifest.jsonl'  # 每个下载目录中的已下载清单（跳过检查）
+SPOOL_DIR = 'spool'  # 原始分页数据暂存目录（压缩 JSONL）
 
 DEFAULT_THREAD_COUNT = 4
+AUTO_THREAD_MIN = 2  # 自动并发下限
+DEFAULT_AUTO_THREAD_MAX = 32  # 自动并发上限默认值
+DOWNLOAD_ENGINE_THREAD = 'thread'
+DOWNLOAD_ENGINE_ASYNC = 'async'  # aiohttp 事件循环，适合大量小文件
+DEFAULT_ASYNC_CONCURRENCY = 64
+AUTO_DOWNLOAD_QUEUE_SIZE = 500  # 边获取边下载：待下载任务队列上限（满时获取等待）
 
 DOWNLOAD_CHUNK_SIZE = 512 * 1024  # 512KB 下载块
+DOWNLOAD_TIMEOUT = 30  # 下载请求超时上限（秒），实际超时按主机 RTT 计算
+STALL_WINDOW = 15  # 低速检测滑动窗口（秒）
 MAX_RETRY_DELAY = 10  # 限制最大重试等待时间为10秒
+PROGRESS_INTERVAL = 0.5  # 字节进度（吞吐/剩余时间）的刷新间隔（秒）
+MAX_DOWNLOAD_RETRIES = 3  # 单个任务失败后最多重试的轮数
+RETRY_BUDGET_MIN = 20  # 每次下载的重试总数上限：不少于该值
+RETRY_BUDGET_RATIO = 0.2  # 且不少于已提交任务数的该比例
 
 try:
     import openpyxl
@@ -50,4 +68,16 @@ try:
 except ImportError:
     OPENPYXL_AVAILABLE = False
     Alignment = None
-    get_column_letter = None
\ No newline at end of file
+    get_column_letter = None
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
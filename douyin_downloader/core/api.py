@@ -7,6 +7,7 @@ import re
 import time
 import requests
 from douyin_downloader.constants import REQUEST_TIMEOUT, PAGE_COUNT_PER_REQUEST
+from douyin_downloader.core.timeouts import host_timeouts
 
 def extract_sec_user_id_from_url(user_home_url):
     """从主页URL中提取sec_user_id"""
@@ -54,7 +55,8 @@ def get_user_profile_info(session, sec_user_id):
     )
 
     try:
-        r = session.get(api_url, timeout=REQUEST_TIMEOUT)
+        r = session.get(api_url, timeout=host_timeouts.timeout_for(api_url, REQUEST_TIMEOUT))
+        host_timeouts.observe(api_url, r.elapsed.total_seconds())
         data = r.json()
 
         if data.get('status_code') == 0 and 'user' in data:
@@ -103,15 +105,16 @@ def build_aweme_favorite_url(sec_user_id, max_cursor=0, count=None):
 
 
 def api_request_with_retry(session, url, max_retries=3, base_delay=1, timeout=None):
-    """带指数退避重试的 API 请求"""
-    if timeout is None:
-        timeout = REQUEST_TIMEOUT
+    """带指数退避重试的 API 请求（未指定 timeout 时按主机 RTT 计算连接/读取超时）"""
     for attempt in range(max_retries + 1):
+        req_timeout = timeout if timeout is not None else host_timeouts.timeout_for(url, REQUEST_TIMEOUT)
         try:
-            r = session.get(url, timeout=timeout)
+            r = session.get(url, timeout=req_timeout)
+            host_timeouts.observe(url, r.elapsed.total_seconds())
             r.raise_for_status()
             return r
         except requests.Timeout:
+            host_timeouts.observe_timeout(url, req_timeout)
             if attempt < max_retries:
                 time.sleep(min(2 ** attempt * base_delay, 30))
                 continue
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+异步下载引擎（aiohttp）- 单线程事件循环并发下载大量小文件，重试退避不占用线程
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import time
+
+from douyin_downloader.constants import AIOHTTP_AVAILABLE, DOWNLOAD_TIMEOUT
+from douyin_downloader.core.bandwidth import bandwidth_limiter
+from douyin_downloader.core.concurrency import transfer_stats, is_overload_status
+from douyin_downloader.core.downloader import prepare_download_path, discard_segmented_tmp
+from douyin_downloader.core.mirrors import host_of
+from douyin_downloader.core.progress import download_progress
+from douyin_downloader.core.resume import (
+    resume_request, check_resume, full_length, save_meta, remove_partial, remove_meta
+)
+from douyin_downloader.core.timeouts import host_timeouts
+
+if AIOHTTP_AVAILABLE:
+    import aiohttp
+else:
+    aiohttp = None
+
+_CHUNK_SIZE = 64 * 1024
+_STOPPED = "__STOPPED__"
+# 检查暂停/停止的间隔（秒）
+_INTERRUPT_POLL = 0.1
+# task_source 耗尽时 run_in_executor(next) 的返回值
+_SOURCE_END = object()
+
+
+class _UserStop(Exception):
+    pass
+
+
+def _interrupted(worker):
+    return worker is not None and worker.should_interrupt_download()
+
+
+async def _wait_resumed(worker):
+    """暂停时等待继续；返回 False 表示已停止"""
+    while _interrupted(worker):
+        if worker.should_stop_download():
+            return False
+        await asyncio.sleep(_INTERRUPT_POLL)
+    return True
+
+
+async def _abort_on_interrupt(worker, inflight):
+    """暂停或停止时关闭进行中的响应，阻塞在读取中的任务立即返回（aiohttp 对象只能在事件循环中操作）"""
+    while True:
+        if _interrupted(worker):
+            for r in list(inflight):
+                r.close()
+        await asyncio.sleep(_INTERRUPT_POLL)
+
+
+async def _fetch_to_tmp(http, url, tmp_path, worker, inflight, task=None):
+    """
+    下载到 tmp_path（已有 .tmp 时按旁路记录用 Range + If-Range 续传，校验规则同 _run_transfer）。
+    进行中的响应登记在 inflight 中，接收的字节计入 task 的下载进度。返回 (ok, ttfb, received)；用户暂停或终止时抛出 _UserStop（保留 .tmp）。
+    """
+    connect, read = host_timeouts.timeout_for(url, DOWNLOAD_TIMEOUT)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+    started = time.monotonic()
+    received = 0
+    resume = True
+    opened = []
+    try:
+        while True:
+            headers, existing_size, meta = resume_request(tmp_path, url) if resume else ({}, 0, None)
+            async with http.get(url, headers=headers, timeout=timeout) as r:
+                opened.append(r)
+                inflight.add(r)
+                ttfb = time.monotonic() - started
+                host_timeouts.observe(url, ttfb)
+                if r.status == 206 or (r.status == 416 and existing_size):
+                    valid, length = check_resume(r.status, r.headers, existing_size, meta)
+                    if not valid:
+                        remove_partial(tmp_path)
+                        resume = False
+                        continue
+                    if r.status == 416:  # 已下载完整
+                        download_progress.begin(task, existing_size, length)
+                        return True, ttfb, 0
+                elif r.status == 200:
+                    length = full_length(r.headers)
+                else:
+                    if is_overload_status(r.status):
+                        transfer_stats.add_overload()
+                    r.raise_for_status()
+                    return False, ttfb, 0
+
+                # 206 = 校验通过的续传，200 = 从头开始
+                mode = 'ab' if r.status == 206 else 'wb'
+                download_progress.begin(task, existing_size if mode == 'ab' else 0, length)
+                save_meta(tmp_path, url, r.headers, length, meta)
+                with open(tmp_path, mode) as f:
+                    async for chunk in r.content.iter_chunked(_CHUNK_SIZE):
+                        f.write(chunk)
+                        received += len(chunk)
+                        transfer_stats.add_bytes(len(chunk))
+                        download_progress.add_bytes(task, len(chunk))
+                        if _interrupted(worker):
+                            raise _UserStop()
+                        delay = bandwidth_limiter.reserve(url, len(chunk))
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                if _interrupted(worker):  # 无 Content-Length 时连接被关闭表现为正常结束
+                    raise _UserStop()
+            if length is not None:
+                size = os.path.getsize(tmp_path)
+                if size > length:
+                    remove_partial(tmp_path)  # 超过完整长度，内容不可信
+                if size != length:
+                    return False, ttfb, received  # 连接提前断开：保留 .tmp，下一轮按 check_resume 续传
+            return True, ttfb, received
+    except asyncio.TimeoutError:
+        host_timeouts.observe_timeout(url, (connect, read))
+    except (aiohttp.ClientError, OSError):
+        if _interrupted(worker):  # 连接被暂停/停止关闭
+            raise _UserStop()
+    finally:
+        inflight.difference_update(opened)
+    return False, time.monotonic() - started, received
+
+
+async def _download_round(http, task, base_folder, is_image, worker, mirrors, attempt, inflight):
+    """
+    与 Worker._download_round 相同的约定：一轮尝试中按镜像评分尝试第 attempt 个码率的全部镜像，
+    失败后不等待（退避与重试由 RetryTracker 决定，任务在 _run 的延迟队列中等待，不占用在途名额）。
+    暂停时释放连接并等待，继续后从 .tmp 续传同一链接（不算一轮）。
+    返回 (相对路径 / None / "__STOPPED__", 失败原因)。
+    """
+    path = prepare_download_path(task, base_folder, is_image)
+    tmp_path = path + '.tmp'
+    discard_segmented_tmp(tmp_path)
+    rate_urls = task.rate_urls
+    rate_idx = min(attempt, len(rate_urls) - 1)
+    candidates = mirrors.order(rate_urls[rate_idx]) if mirrors is not None else rate_urls[rate_idx]
+    for mirror_idx, url in enumerate(candidates):
+        if mirror_idx > 0 and worker is not None:
+            worker.log_signal.emit(f"[信息] {task.desc} 切换镜像: {host_of(url)}")
+        task.url = url
+        while True:
+            if not await _wait_resumed(worker):
+                return _STOPPED, ''  # 保留 .tmp 以便下次续传
+            started = time.monotonic()
+            try:
+                ok, ttfb, received = await _fetch_to_tmp(http, url, tmp_path, worker, inflight, task)
+            except _UserStop:
+                continue
+            break
+        if ok:
+            try:
+                os.replace(tmp_path, path)
+            except OSError as e:
+                return None, str(e)
+            remove_meta(tmp_path)
+            if mirrors is not None:
+                mirrors.record_success(url, ttfb, received, time.monotonic() - started)
+            return os.path.relpath(path, base_folder), ''
+        if mirrors is not None:
+            mirrors.record_failure(url)
+    return None, ''
+
+
+async def _run(task_source, base_folder, worker, concurrency, retry, on_result, headers, mirrors):
+    loop = asyncio.get_running_loop()
+    connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300)
+    pending = {}
+    delayed = []  # (不早于的时间, 序号, 条目)：等待重试的任务
+    seq = itertools.count()
+    max_inflight = concurrency * 2
+    inflight = set()
+
+    def start(http, item):
+        fut = asyncio.ensure_future(_download_round(http, item[0], base_folder, item[1], worker, mirrors,
+                                                    retry.attempts(item[0]), inflight))
+        pending[fut] = item
+
+    def start_due(http):
+        now = time.monotonic()
+        while delayed and delayed[0][0] <= now:
+            start(http, heapq.heappop(delayed)[2])
+
+    def due_in():
+        return max(0.0, delayed[0][0] - time.monotonic()) if delayed else None
+
+    def handle(done):
+        for fut in done:
+            t, is_img = item = pending.pop(fut)
+            if fut.cancelled():
+                on_result(t, is_img, _STOPPED)
+                continue
+            try:
+                result, reason = fut.result()
+            except Exception as e:
+                result, reason = None, str(e)
+            if result is None:
+                delay = retry.failed(t, t.url, reason)
+                if delay is not None:
+                    download_progress.defer(t)
+                    heapq.heappush(delayed, (time.monotonic() + delay, next(seq), item))
+                    continue
+            on_result(t, is_img, result)
+
+    async with aiohttp.ClientSession(connector=connector, headers=headers) as http:
+        watcher = asyncio.ensure_future(_abort_on_interrupt(worker, inflight))
+        source = iter(task_source)
+        while True:
+            if worker.should_stop_download():
+                break
+            start_due(http)
+            # task_source 可能阻塞等待（边获取边下载的队列），在线程中取下一项，不阻塞事件循环
+            item = await loop.run_in_executor(None, next, source, _SOURCE_END)
+            if item is _SOURCE_END:
+                break
+            if item is not None:
+                retry.submit()
+                start(http, item)
+            if pending and (item is None or len(pending) >= max_inflight):
+                timeout = 0 if item is None else due_in()
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                handle(done)
+
+        while pending or delayed:
+            if worker.should_stop_download():
+                # 停止：取消在途任务，连接随之关闭，.tmp 保留；等待重试的任务不再开始，按终止上报
+                for fut in pending:
+                    fut.cancel()
+                for _, _, (t, is_img) in delayed:
+                    on_result(t, is_img, _STOPPED)
+                delayed.clear()
+                if not pending:
+                    break
+            start_due(http)
+            if not pending:
+                await asyncio.sleep(min(due_in(), _INTERRUPT_POLL))
+                continue
+            done, _ = await asyncio.wait(pending, timeout=due_in(), return_when=asyncio.FIRST_COMPLETED)
+            handle(done)
+        watcher.cancel()
+    return not worker.should_stop_download()
+
+
+def run_async_downloads(task_source, base_folder, worker, concurrency, retry, on_result, headers=None,
+                        mirrors=None):
+    """
+    在当前线程中运行事件循环，并发下载 task_source 产出的 (task, is_image)（产出 None 表示暂无新任务）。
+    失败的任务按 retry（RetryTracker）的退避时间延迟重试；每个任务最终完成或失败后调用
+    on_result(task, is_image, result)，result 为相对路径、None 或 "__STOPPED__"。
+    在途任务不超过 concurrency * 2（等待重试的任务不计入）。返回 False 表示被用户终止。
+    """
+    return asyncio.run(_run(task_source, base_folder, worker, max(1, concurrency), retry, on_result,
+                            headers, mirrors))
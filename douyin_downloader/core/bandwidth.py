@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+带宽限制 - 全局与单主机令牌桶限速，支持按时段设置全局限速（如白天 5 MB/s、夜间不限速）
+"""
+import re
+import threading
+import time
+from datetime import datetime
+
+from douyin_downloader.core.mirrors import host_of
+
+# 令牌桶容量（秒）：允许的突发量 = 速率 x 该值
+_BURST_SECONDS = 0.5
+# 限速等待时检查用户终止的间隔（秒）
+_WAIT_SLICE = 0.2
+# 按时段计算全局速率的缓存时间（秒）
+_SCHEDULE_CHECK_INTERVAL = 5.0
+# 空闲的单主机令牌桶回收间隔（秒）
+_HOST_IDLE_EXPIRE = 300.0
+
+_SCHEDULE_ITEM_RE = re.compile(r'^(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*=\s*(\d+)$')
+
+
+def parse_schedule(text):
+    """
+    解析限速时段，格式为以分号或换行分隔的 "HH:MM-HH:MM=KB/s"（0 表示不限速），
+    结束时间早于开始时间表示跨越午夜，如 "08:00-23:00=5120; 23:00-08:00=0"。
+    返回 [(开始分钟, 结束分钟, 字节/秒)]；格式错误时抛出 ValueError。
+    """
+    schedule = []
+    for item in re.split(r'[;\n]', text or ''):
+        item = item.strip()
+        if not item:
+            continue
+        m = _SCHEDULE_ITEM_RE.match(item)
+        if not m:
+            raise ValueError(f"无法解析限速时段: {item}")
+        h1, m1, h2, m2, kb = (int(g) for g in m.groups())
+        if h1 > 24 or h2 > 24 or m1 > 59 or m2 > 59:
+            raise ValueError(f"时间无效: {item}")
+        schedule.append(((h1 * 60 + m1) % 1440, (h2 * 60 + m2) % 1440, kb * 1024))
+    return schedule
+
+
+def scheduled_rate(schedule, minute, default):
+    """minute（当天第几分钟）所在时段的速率；不在任何时段内时返回 default"""
+    for start, end, rate in schedule:
+        if start < end and start <= minute < end:
+            return rate
+        if start >= end and (minute >= start or minute < end):
+            return rate
+    return default
+
+
+class TokenBucket:
+    """令牌桶（线程安全）。rate 为字节/秒，0 表示不限速；速率可随时修改"""
+
+    def __init__(self, rate=0):
+        self._lock = threading.Lock()
+        self.rate = 0
+        self._tokens = 0.0
+        self._stamp = time.monotonic()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        with self._lock:
+            rate = max(0, int(rate or 0))
+            if rate != self.rate:
+                self.rate = rate
+                self._tokens = min(self._tokens, rate * _BURST_SECONDS)
+                self._stamp = time.monotonic()
+
+    def reserve(self, amount):
+        """
+        取出 amount 字节的令牌（不足时记为欠额），返回需要等待的秒数。
+        欠额由之后补充的令牌偿还，因此多个调用方按到达顺序排队。
+        """
+        with self._lock:
+            if self.rate <= 0:
+                return 0.0
+            now = time.monotonic()
+            capacity = self.rate * _BURST_SECONDS
+            self._tokens = min(capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= amount
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class WaitMeter:
+    """一个传输累计的限速等待秒数（含正在进行的等待），调用返回当前值；供低速检测扣除"""
+    __slots__ = ('total', 'since')
+
+    def __init__(self):
+        self.total = 0.0
+        self.since = None
+
+    def __call__(self):
+        since = self.since
+        return self.total + (time.monotonic() - since if since is not None else 0.0)
+
+
+class BandwidthLimiter:
+    """
+    全局令牌桶 + 每个主机一个令牌桶（各主机分别限速为 host_rate）。
+    下载循环每收到一块数据调用 throttle()（线程）或 reserve()（asyncio）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._global = TokenBucket()
+        self._hosts = {}
+        self._host_rate = 0
+        self._base_rate = 0
+        self._schedule = []
+        self._schedule_checked = 0.0
+
+    def configure(self, global_rate=0, host_rate=0, schedule=None):
+        """设置全局速率、单主机速率（字节/秒，0 不限速）与全局限速时段；可在下载过程中调用"""
+        with self._lock:
+            self._base_rate = max(0, int(global_rate or 0))
+            self._schedule = list(schedule or [])
+            self._schedule_checked = 0.0
+            self._host_rate = max(0, int(host_rate or 0))
+            for bucket, _ in self._hosts.values():
+                bucket.set_rate(self._host_rate)
+        self._refresh_global(force=True)
+
+    @property
+    def enabled(self):
+        return bool(self._base_rate or self._host_rate or self._schedule)
+
+    def current_rate(self):
+        """当前生效的全局速率（字节/秒，0 不限速）"""
+        self._refresh_global()
+        return self._global.rate
+
+    def _refresh_global(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._schedule_checked < _SCHEDULE_CHECK_INTERVAL:
+                return
+            self._schedule_checked = now
+            local = datetime.now()
+            rate = scheduled_rate(self._schedule, local.hour * 60 + local.minute, self._base_rate)
+        self._global.set_rate(rate)
+
+    def _host_bucket(self, url):
+        host = host_of(url)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None:
+                if len(self._hosts) > 64:
+                    self._hosts = {h: e for h, e in self._hosts.items() if now - e[1] < _HOST_IDLE_EXPIRE}
+                entry = (TokenBucket(self._host_rate), now)
+            self._hosts[host] = (entry[0], now)
+            return entry[0]
+
+    def reserve(self, url, amount):
+        """取出 amount 字节的全局与主机令牌，返回需要等待的秒数（未启用时为 0）"""
+        if not self.enabled:
+            return 0.0
+        self._refresh_global()
+        wait = self._global.reserve(amount)
+        if self._host_rate:
+            wait = max(wait, self._host_bucket(url).reserve(amount))
+        return wait
+
+    def throttle(self, url, amount, should_stop=None, meter=None):
+        """
+        按限速等待；等待期间 should_stop() 为真时提前返回。
+        meter 为 WaitMeter 时把等待时间（等待过程中即实时）计入其中。
+        """
+        wait = self.reserve(url, amount)
+        if wait <= 0:
+            return
+        started = time.monotonic()
+        if meter is not None:
+            meter.since = started
+        deadline = started + wait
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or (should_stop is not None and should_stop()):
+                    break
+                time.sleep(min(remaining, _WAIT_SLICE))
+        finally:
+            if meter is not None:
+                meter.total += time.monotonic() - started
+                meter.since = None
+
+
+bandwidth_limiter = BandwidthLimiter()
+
+
+def configure_from_config(cfg):
+    """按配置设置全局限速器；限速时段格式错误时忽略时段，返回错误说明（无错误时返回 None）"""
+    error = None
+    try:
+        schedule = parse_schedule(cfg.get('bandwidth_schedule', ''))
+    except ValueError as e:
+        schedule, error = [], str(e)
+    try:
+        global_rate = int(cfg.get('bandwidth_limit_kb', 0) or 0) * 1024
+        host_rate = int(cfg.get('host_bandwidth_limit_kb', 0) or 0) * 1024
+    except (TypeError, ValueError):
+        global_rate, host_rate = 0, 0
+    bandwidth_limiter.configure(global_rate, host_rate, schedule)
+    return error
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+自动并发 - 按总吞吐与错误/限流（429/503）比例在上下限之间调整同时下载数
+"""
+import threading
+import time
+
+# 每隔多少秒评估一次
+_INTERVAL = 3.0
+# 吞吐提升不足该比例时视为已到拐点
+_MIN_GAIN = 0.05
+# 到达拐点后保持的评估次数，之后再次向上试探
+_HOLD_ROUNDS = 5
+# 出现限流或错误率过高时的乘性减小系数
+_DECREASE = 0.7
+# 错误率阈值（本轮完成数不少于 _MIN_FINISHED 时才判断）
+_MAX_ERROR_RATE = 0.1
+_MIN_FINISHED = 5
+
+
+class TransferStats:
+    """全局传输统计（线程安全）：累计接收字节数与服务器限流响应（429/503）次数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.overloads = 0
+
+    def add_bytes(self, amount):
+        with self._lock:
+            self.bytes += amount
+
+    def add_overload(self):
+        with self._lock:
+            self.overloads += 1
+
+    def snapshot(self):
+        with self._lock:
+            return self.bytes, self.overloads
+
+
+transfer_stats = TransferStats()
+
+
+def is_overload_status(status):
+    return status in (429, 503)
+
+
+class ConcurrencyTuner:
+    """
+    梯度试探 + 乘性减小：
+      - 每 _INTERVAL 秒比较本轮与上一轮的总吞吐；上一步增加了并发且吞吐提升不少于 _MIN_GAIN 时继续增加
+        （步长为当前并发的 1/4，至少 1），否则退回上一档并保持 _HOLD_ROUNDS 轮后再试探
+      - 出现 429/503 或错误率超过 _MAX_ERROR_RATE 时乘以 _DECREASE，此后试探步长改为 1（加性增加）；
+        减小后的下一轮不再因限流减小（那时的限流多半来自减小前发出的请求）
+      - 没有等待派发的任务时不调整（吞吐受任务数限制，而不是并发数）
+    由下载线程单独调用 adjust()，非线程安全。
+    """
+
+    def __init__(self, minimum, maximum, initial, stats=None):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(self.maximum, max(self.minimum, initial))
+        self.stats = stats or transfer_stats
+        self._last_time = time.monotonic()
+        self._last_bytes, self._last_overloads = self.stats.snapshot()
+        self._last_done = 0
+        self._last_failed = 0
+        self._prev_rate = None
+        self._prev_limit = None
+        self._hold = 0
+        self._additive = False
+        self._cooldown = False
+        self.peak_rate = 0.0
+
+    def restart(self):
+        """暂停后重新开始计量（暂停期间的零吞吐不参与比较）"""
+        self._last_time = time.monotonic()
+        self._last_bytes, self._last_overloads = self.stats.snapshot()
+        self._prev_rate, self._prev_limit = None, None
+
+    def adjust(self, done, failed, saturated, now=None):
+        """
+        done / failed 为累计完成/失败数，saturated 表示仍有等待派发的任务（吞吐受并发数限制）。
+        到评估时间时返回 (新并发数, 说明)，并发数未变化或未到评估时间时返回 None。
+        """
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._last_time
+        if elapsed < _INTERVAL:
+            return None
+        total_bytes, overloads = self.stats.snapshot()
+        rate = (total_bytes - self._last_bytes) / elapsed
+        overloaded = overloads - self._last_overloads
+        finished = (done - self._last_done) + (failed - self._last_failed)
+        errors = failed - self._last_failed
+        self._last_time, self._last_bytes, self._last_overloads = now, total_bytes, overloads
+        self._last_done, self._last_failed = done, failed
+        self.peak_rate = max(self.peak_rate, rate)
+
+        old = self.limit
+        congested = overloaded or (finished >= _MIN_FINISHED and errors / finished > _MAX_ERROR_RATE)
+        if congested and self._cooldown:
+            # 刚减小过：本轮的限流/失败多半来自减小前发出的请求
+            self._cooldown = False
+            return None
+        self._cooldown = False
+        if congested:
+            self.limit = max(self.minimum, int(self.limit * _DECREASE))
+            reason = f'服务器限流 {overloaded} 次' if overloaded else f'失败 {errors}/{finished}'
+            self._prev_rate, self._prev_limit, self._hold = None, None, _HOLD_ROUNDS
+            self._additive = self._cooldown = True
+        elif not saturated:
+            return None
+        elif self._prev_limit is not None and self._prev_limit < self.limit \
+                and rate < self._prev_rate * (1 + _MIN_GAIN):
+            # 上一步增加并发没有带来明显提升：退回并保持
+            self.limit = self._prev_limit
+            reason = '吞吐不再提升'
+            self._prev_rate, self._prev_limit, self._hold = None, None, _HOLD_ROUNDS
+        elif self._hold > 0:
+            self._hold -= 1
+            return None
+        else:
+            self._prev_rate, self._prev_limit = rate, self.limit
+            step = 1 if self._additive else max(1, self.limit // 4)
+            self.limit = min(self.maximum, self.limit + step)
+            reason = '试探更高并发'
+
+        if self.limit == old:
+            return None
+        return self.limit, f'{reason}，吞吐 {rate / 1024 / 1024:.1f} MB/s'
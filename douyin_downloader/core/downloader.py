@@ -4,17 +4,37 @@
 下载引擎 - 单文件下载（支持断点续传）
 """
 import os
+import threading
+import time
 from functools import lru_cache
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
-from douyin_downloader.constants import USER_AGENT, DOWNLOAD_CHUNK_SIZE
+from douyin_downloader.constants import USER_AGENT, DOWNLOAD_CHUNK_SIZE, DOWNLOAD_TIMEOUT
+from douyin_downloader.core.bandwidth import bandwidth_limiter, WaitMeter
+from douyin_downloader.core.concurrency import transfer_stats, is_overload_status
+from douyin_downloader.core.hedge import EARLY_WINDOW
+from douyin_downloader.core.mirrors import host_of
+from douyin_downloader.core.progress import download_progress
+from douyin_downloader.core.resume import (
+    resume_request, check_resume, full_length, save_meta, remove_partial, remove_meta
+)
+from douyin_downloader.core.segmented import SegmentedDownload, probe_length, sidecar_path
+from douyin_downloader.core.timeouts import host_timeouts, stall_watchdog, abort_response, inflight_responses
 from douyin_downloader.utils.file_utils import (
-    safe_mkdir, generate_unique_filename, sanitize_filename
+    safe_mkdir, generate_unique_filename, sanitize_filename, preallocate
 )
 
+# 对冲或低速检测时用较小的块读取，使进度观察及时；对冲主线程轮询间隔（秒）
+_WATCHED_CHUNK_SIZE = 64 * 1024
+_HEDGE_POLL_INTERVAL = 0.05
+# 被低速看门狗中止后，在同一链接上重新连接续传的次数（之后交给 Worker 切换镜像）
+_STALL_MAX_RESUMES = 2
+# _download_segmented 未采用分段下载时的返回值
+_NOT_SEGMENTED = object()
+
 
 @lru_cache(maxsize=1)
 def _get_default_session():
@@ -39,77 +59,388 @@ def _get_default_session():
     return s
 
 
-def download_single_file(task, base_folder, is_image=False, worker=None, session=None):
+def apply_download_settings(tasks, use_mix_folder=True, include_date=True):
+    """按下载配置复制任务：不使用合集文件夹时清除 mix_name，并写入文件名日期前缀开关"""
+    out = []
+    for t in tasks:
+        if use_mix_folder:
+            out.append(t.replace(include_date_in_filename=include_date))
+        else:
+            out.append(t.replace(mix_name=None, include_date_in_filename=include_date))
+    return out
+
+
+class _Transfer:
+    """一次 HTTP 传输的状态（对冲时主请求与备用请求各在一个线程中运行）"""
+    __slots__ = ('url', 'tmp_path', 'resume', 'started', 'ttfb', 'received', 'finished',
+                 'ok', 'stopped', 'stalled', 'discard', 'lock', 'notify', 'response', 'throttled', 'task')
+
+    def __init__(self, url, tmp_path, resume=True, notify=None, task=None):
+        self.url = url
+        self.tmp_path = tmp_path
+        self.resume = resume
+        self.started = time.monotonic()
+        self.ttfb = None
+        self.received = 0
+        self.finished = None
+        self.ok = False
+        self.stopped = False
+        self.stalled = False  # 被低速看门狗中止，可断点续传
+        self.discard = False  # 对冲落败：尽快结束并删除自己的临时文件
+        self.lock = threading.Lock()
+        self.notify = notify
+        self.task = task  # 计入该任务的字节进度（对冲的备用请求为 None，只计入整体吞吐）
+        self.response = None
+        self.throttled = WaitMeter()  # 限速等待时间，低速检测不计入
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    def throughput(self, now=None):
+        """首字节之后的平均吞吐（字节/秒）"""
+        if self.ttfb is None:
+            return 0.0
+        transfer = (now or self.finished or time.monotonic()) - self.started - self.ttfb
+        return self.received / transfer if transfer > 0 else 0.0
+
+    def stall(self):
+        """低速看门狗回调：中止连接，保留 .tmp 以便续传"""
+        self.stalled = True
+        if self.response is not None:
+            abort_response(self.response)
+
+    def abandon(self):
+        """标记为落败并中止连接；若传输已结束则立即删除临时文件"""
+        with self.lock:
+            self.discard = True
+            if self.finished is not None:
+                remove_partial(self.tmp_path)
+                return
+        if self.response is not None:
+            abort_response(self.response)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _run_transfer(s, tr, worker=None, chunk_size=DOWNLOAD_CHUNK_SIZE, min_speed=0, write_buffer=0):
     """
-    下载单个文件（视频或图片/实况图），支持断点续传。
-    由 `Worker.download_tasks` 在线程池中调用。
+    执行一次请求并写入 tr.tmp_path，结果记录在 tr 上。
+    resume 时按 .tmp 旁路记录用 Range + If-Range 续传；续传响应与记录不符时删除 .tmp 重新请求完整文件，
+    下载结束后按记录的完整长度校验。
+    连接/读取超时按主机 RTT 计算；min_speed > 0 时收到响应头后由低速看门狗监视；每块数据按带宽限制等待。
+    暂停或停止下载时由 inflight_responses 关闭连接，tr.stopped 为 True，.tmp 保留以便续传。
+    已知长度时预先为剩余部分分配磁盘空间；write_buffer > 0 时以该大小（字节）缓冲写入。
+    """
+    timeout = host_timeouts.timeout_for(tr.url, DOWNLOAD_TIMEOUT)
+    watch = None
+    try:
+        resume = tr.resume
+        while True:
+            headers, existing_size, meta = resume_request(tr.tmp_path, tr.url) if resume else ({}, 0, None)
+            with s.get(tr.url, headers=headers, stream=True, timeout=timeout) as r, inflight_responses.track(r):
+                tr.ttfb = time.monotonic() - tr.started
+                tr.response = r
+                host_timeouts.observe(tr.url, tr.ttfb)
+                if r.status_code == 206 or (r.status_code == 416 and existing_size):
+                    valid, length = check_resume(r.status_code, r.headers, existing_size, meta)
+                    if not valid:
+                        # 续传位置或文件长度与记录不符：丢弃 .tmp，重新请求完整文件
+                        remove_partial(tr.tmp_path)
+                        resume = False
+                        continue
+                    if r.status_code == 416:  # 已下载完整
+                        download_progress.begin(tr.task, existing_size, length)
+                        tr.ok = True
+                        return
+                elif r.status_code == 200:
+                    length = full_length(r.headers)
+                else:
+                    if is_overload_status(r.status_code):
+                        transfer_stats.add_overload()
+                    r.raise_for_status()
+                    return
+
+                # 206 = 校验通过的续传，200 = 从头开始（含 If-Range 判定文件已变化）
+                mode = 'ab' if r.status_code == 206 else 'wb'
+                offset = existing_size if mode == 'ab' else 0
+                download_progress.begin(tr.task, offset, length)
+                if tr.discard:
+                    return
+                if worker and worker.should_interrupt_download():
+                    raise SystemExit("下载被用户暂停或终止")
+                save_meta(tr.tmp_path, tr.url, r.headers, length, meta)
+
+                watch = stall_watchdog.watch(lambda: tr.received, tr.stall, min_speed, tr.throttled)
+
+                def interrupted():
+                    """限速等待期间落败、被看门狗中止或用户暂停/终止时提前结束等待"""
+                    return tr.discard or tr.stalled or bool(worker and worker.should_interrupt_download())
+
+                with open(tr.tmp_path, mode, buffering=write_buffer or -1) as f:
+                    if length is not None:
+                        preallocate(f, offset, length - offset)
+                    # 不再从 r.raw._fp 私有对象 readinto 到复用缓冲区：256MB 本机回环实测
+                    # readinto 0.53 ms/MB，iter_content 0.58 ms/MB，差距很小，而私有接口随 urllib3/http.client
+                    # 版本、压缩编码或代理变化会静默失效；公开的 raw.read / raw.readinto 反而更慢（0.63 / 0.66 ms/MB）
+                    for chunk in r.iter_content(chunk_size):
+                        if tr.discard:
+                            return
+                        if chunk:
+                            f.write(chunk)
+                            tr.received += len(chunk)
+                            transfer_stats.add_bytes(len(chunk))
+                            download_progress.add_bytes(tr.task, len(chunk))
+                            if worker and worker.should_interrupt_download():
+                                raise SystemExit("下载被用户暂停或终止")
+                            bandwidth_limiter.throttle(tr.url, len(chunk), interrupted, tr.throttled)
+                if tr.stalled:  # 无 Content-Length 时中止表现为正常结束
+                    return
+                if worker and worker.should_interrupt_download():
+                    raise SystemExit("下载被用户暂停或终止")
+            if length is not None:
+                size = os.path.getsize(tr.tmp_path)
+                if size > length:
+                    remove_partial(tr.tmp_path)  # 超过完整长度，内容不可信
+                if size != length:
+                    return  # 连接提前断开（旧版 urllib3 不报错）：保留 .tmp 以便续传
+
+            tr.ok = True
+            return
+    except SystemExit:
+        tr.stopped = True
+    except requests.Timeout:
+        host_timeouts.observe_timeout(tr.url, timeout)
+    except Exception:
+        # 连接被暂停/停止中止时读取出错，同样视为用户中断
+        if worker and worker.should_interrupt_download():
+            tr.stopped = True
+    finally:
+        stall_watchdog.unwatch(watch)
+        with tr.lock:
+            tr.finished = time.monotonic()
+            if tr.discard:
+                remove_partial(tr.tmp_path)
+        if tr.notify is not None:
+            tr.notify.set()
+
+
+def _hedge_alternate(task, url, mirrors=None):
+    """对冲用的备用链接：优先当前码率中其他主机的镜像，其次后续码率"""
+    rates = task.rate_urls
+    start = next((i for i, urls in enumerate(rates) if url in urls), 0)
+    host = host_of(url)
+    for urls in rates[start:]:
+        for candidate in (mirrors.order(urls) if mirrors is not None else urls):
+            if candidate != url and host_of(candidate) != host:
+                return candidate
+    return None
+
+
+def _should_hedge(primary, now, ttfb_limit, floor):
+    """首字节超时，或首字节后 EARLY_WINDOW 秒的吞吐低于下限"""
+    if primary.ttfb is None:
+        return now - primary.started > ttfb_limit
+    since = now - primary.started - primary.ttfb
+    return floor is not None and EARLY_WINDOW <= since < EARLY_WINDOW * 2 \
+        and primary.received / since < floor
+
+
+def _hedged_transfer(s, primary, alternate_url, hedge_tmp, worker, hedger, mirrors, min_speed=0, write_buffer=0):
     """
-    url = task['url']
-    desc = task['desc']
-    ext = task['ext']
-    mix_name = task.get('mix_name') or None
+    主请求在后台线程运行，本线程观察其首字节与起始吞吐；
+    慢于阈值时向备用链接发出第二个请求（从头下载到独立临时文件），先完成者获胜，另一个被取消。
+    返回获胜的 _Transfer；都失败或用户终止时返回 None。
+    """
+    notify = primary.notify
+    threading.Thread(target=_run_transfer,
+                     args=(s, primary, worker, _WATCHED_CHUNK_SIZE, min_speed, write_buffer),
+                     daemon=True).start()
+    ttfb_limit = hedger.ttfb_threshold()
+    floor = hedger.throughput_floor()
+    hedge = None
+    transfers = [primary]
+
+    while True:
+        notify.clear()
+        winner = next((t for t in transfers if t.done and t.ok), None)
+        if winner is not None or all(t.done for t in transfers):
+            break
+        if any(t.stopped for t in transfers) or (worker and worker.should_interrupt_download()):
+            break
+        if hedge is None and not primary.done and _should_hedge(primary, time.monotonic(), ttfb_limit, floor):
+            hedge = _Transfer(alternate_url, hedge_tmp, resume=False, notify=notify)
+            transfers.append(hedge)
+            threading.Thread(target=_run_transfer,
+                             args=(s, hedge, worker, _WATCHED_CHUNK_SIZE, min_speed, write_buffer),
+                             daemon=True).start()
+        notify.wait(_HEDGE_POLL_INTERVAL)
+
+    if hedge is None:
+        return winner
+
+    # 统计：落败方的传输量计为额外流量；备用获胜时按主请求当前吞吐估算其完成时间
+    if winner is hedge:
+        primary.abandon()
+        primary_failed = primary.done and not primary.ok
+        elapsed = hedge.finished - primary.started
+        rate = primary.throughput(hedge.finished)
+        saved = None  # 主请求无响应或失败时无法估算，单独计数
+        if rate > 0 and not primary_failed:
+            saved = primary.ttfb + max(0, hedge.received - primary.received) / rate - elapsed
+        hedger.record_hedge(True, saved, primary.received)
+        if mirrors is not None:
+            if primary.ttfb is None or primary_failed:
+                mirrors.record_failure(primary.url)
+            else:
+                mirrors.record_success(primary.url, primary.ttfb, primary.received,
+                                       hedge.finished - primary.started)
+    else:
+        if mirrors is not None and hedge.done and not (hedge.ok or hedge.stopped):
+            mirrors.record_failure(hedge.url)
+        hedge.abandon()
+        # 因暂停/停止结束时备用请求只是被放弃，不计为落败（避免拉低 _should_hedge 依据的胜率）
+        if not (hedge.stopped or (worker and worker.should_interrupt_download())):
+            hedger.record_hedge(False, 0.0, hedge.received)
+    return winner
 
-    include_date = task.get('include_date_in_filename', True)
-    date_str = task.get('date', '')
 
-    base_filename = desc
-    if include_date and date_str:
-        base_filename = f"{date_str}_{desc}"
+def prepare_download_path(task, base_folder, is_image=False):
+    """
+    确定目标文件夹（合集 / images 子文件夹）并创建，返回目标路径：
+    任务已由 FilenamePlanner 分配文件名时直接使用，否则生成不与已有文件冲突的文件名。
+    """
+    if task.rel_path:
+        path = os.path.join(base_folder, task.rel_path)
+        safe_mkdir(os.path.dirname(path))
+        return path
+
+    base_filename = task.desc
+    if task.include_date_in_filename and task.date:
+        base_filename = f"{task.date}_{task.desc}"
 
-    # 1. 确定目标文件夹
     folder = base_folder
-    if mix_name:
-        mix_clean = sanitize_filename(mix_name, max_length=100)
+    if task.mix_name:
+        mix_clean = sanitize_filename(task.mix_name, max_length=100)
         folder = os.path.join(folder, mix_clean)
 
     if is_image:
         folder = os.path.join(folder, 'images')
 
     safe_mkdir(folder)
+    return generate_unique_filename(base_filename, task.ext, folder, task.url, task.url_hash)
 
-    # 2. 生成唯一文件名
-    path = generate_unique_filename(base_filename, ext, folder, url, task.get('url_hash'))
-    tmp_path = path + '.tmp'
 
-    # 3. 获取 session
-    s = session or _get_default_session()
-    headers = {}
+def discard_segmented_tmp(tmp_path):
+    """删除分段下载预分配的 .tmp 与进度文件（其大小不代表已下载字节，不能按大小续传）"""
+    sidecar = sidecar_path(tmp_path)
+    if os.path.exists(sidecar):
+        _remove_quietly(tmp_path)
+        _remove_quietly(sidecar)
+
+
+def _download_segmented(s, url, path, tmp_path, base_folder, worker, mirrors, min_speed, segments, threshold,
+                        task=None):
+    """分段下载；文件小于阈值、服务器不支持 Range 或已有单连接 .tmp 时返回 _NOT_SEGMENTED"""
+    sidecar = sidecar_path(tmp_path)
+    has_sidecar = os.path.exists(sidecar)
+    if os.path.exists(tmp_path) and not has_sidecar:
+        return _NOT_SEGMENTED
+
+    total, ttfb, validator = probe_length(s, url)
+    if not total or total < threshold:
+        return _NOT_SEGMENTED
 
-    # 4. 检查是否有未完成的下载（断点续传）
-    existing_size = 0
-    if os.path.exists(tmp_path):
-        existing_size = os.path.getsize(tmp_path)
-        if existing_size > 0:
-            headers['Range'] = f'bytes={existing_size}-'
+    started = time.monotonic()
+    job = SegmentedDownload(s, url, tmp_path, total, segments, worker, min_speed, validator, task)
+    try:
+        ok = job.run()
+    except OSError:
+        ok = False
+    if not ok:
+        # 保留 .tmp 与分段进度以便续传
+        if mirrors is not None and not job.stopped:
+            mirrors.record_failure(url)
+        return None
 
     try:
-        with s.get(url, headers=headers, stream=True, timeout=30) as r:
-            if r.status_code == 416:  # Range Not Satisfiable — 文件已完整
-                os.replace(tmp_path, path)
-                return os.path.relpath(path, base_folder)
-
-            if r.status_code not in (200, 206):
-                r.raise_for_status()
-
-            # 206 = 服务器支持断点续传，200 = 从头开始
-            mode = 'ab' if r.status_code == 206 else 'wb'
-            if mode == 'wb' and existing_size > 0:
-                existing_size = 0  # 服务器不支持续传，重置
-
-            with open(tmp_path, mode) as f:
-                for chunk in r.iter_content(DOWNLOAD_CHUNK_SIZE):
-                    if chunk:
-                        f.write(chunk)
-                        if worker and worker.should_stop_download():
-                            raise SystemExit("下载被用户终止")
-
-        # 下载完成，原子替换
         os.replace(tmp_path, path)
-        return os.path.relpath(path, base_folder)
+    except OSError:
+        return None
+    if mirrors is not None:
+        mirrors.record_success(url, ttfb, job.received, time.monotonic() - started + ttfb)
+    return os.path.relpath(path, base_folder)
 
-    except SystemExit:
-        # 用户取消 —— 保留 .tmp 以便下次续传
+
+def download_single_file(task, base_folder, is_image=False, worker=None, session=None, mirrors=None,
+                         hedger=None, min_speed=0, segments=1, segment_threshold=0, write_buffer=0):
+    """
+    下载单个文件（视频或图片/实况图），支持断点续传。
+    由 `Worker.download_tasks` 在线程池中调用。
+    mirrors:   MirrorScoreboard，记录本次请求所在主机的首字节延迟、吞吐或失败。
+    hedger:    HedgeController，传入时对慢启动的下载向备用镜像/码率发出对冲请求。
+    min_speed: 低速下限（字节/秒），滑动窗口内平均速度低于该值时中止连接并断点续传；0 不检测。
+    segments:  大于 1 时，不小于 segment_threshold 字节的视频分成 segments 段并行下载。
+    write_buffer: 写入缓冲大小（字节），0 使用默认缓冲。
+    """
+    url = task.url
+    desc = task.desc
+    path = prepare_download_path(task, base_folder, is_image)
+    tmp_path = path + '.tmp'
+
+    s = session or _get_default_session()
+
+    # 大文件分段下载（已有单连接下载的 .tmp 时沿用单连接续传）
+    if segments > 1 and not is_image:
+        result = _download_segmented(s, url, path, tmp_path, base_folder, worker, mirrors, min_speed,
+                                     segments, segment_threshold, task)
+        if result is not _NOT_SEGMENTED:
+            return result
+    discard_segmented_tmp(tmp_path)
+
+    # 下载到 .tmp（已有 .tmp 时断点续传）；有备用链接时可对冲；速度过低时重新连接续传
+    alternate = _hedge_alternate(task, url, mirrors) if hedger is not None else None
+    chunk_size = _WATCHED_CHUNK_SIZE if min_speed > 0 else DOWNLOAD_CHUNK_SIZE
+    for resume_round in range(_STALL_MAX_RESUMES + 1):
+        if alternate is None:
+            winner = _Transfer(url, tmp_path, task=task)
+            _run_transfer(s, winner, worker, chunk_size, min_speed, write_buffer)
+        else:
+            primary = _Transfer(url, tmp_path, notify=threading.Event(), task=task)
+            winner = _hedged_transfer(s, primary, alternate, path + '.hedge.tmp', worker, hedger, mirrors,
+                                      min_speed, write_buffer)
+            if winner is None:
+                winner = primary
+
+        if not winner.stalled or resume_round == _STALL_MAX_RESUMES:
+            break
+        if worker is not None:
+            if worker.should_interrupt_download():
+                break
+            worker.log_signal.emit(f"[信息] {desc} 下载速度过低，重新连接并断点续传")
+        if mirrors is not None:
+            mirrors.record_failure(winner.url)
+
+    if not winner.ok:
+        # 用户取消或出错 —— 保留 .tmp 以便下次续传
+        if mirrors is not None and not winner.stopped:
+            mirrors.record_failure(winner.url)
         return None
-    except Exception:
-        # 其他错误 —— 保留 .tmp 以便下次续传
+
+    # 下载完成，原子替换
+    try:
+        os.replace(winner.tmp_path, path)
+    except OSError:
         return None
+    remove_meta(winner.tmp_path)
+    elapsed = winner.finished - winner.started
+    if mirrors is not None:
+        mirrors.record_success(winner.url, winner.ttfb or 0.0, winner.received, elapsed)
+    if hedger is not None:
+        hedger.observe(winner.ttfb or 0.0, winner.throughput())
+    return os.path.relpath(path, base_folder)
@@ -22,6 +22,7 @@ else:
 def generate_excel_file(all_awemes, nickname, base_folder):
     """
     执行Excel导出（无GUI依赖）。
+    all_awemes 为 AwemeRecord 的可迭代对象（列表或本地作品库的流式查询）。
     成功则返回 filepath，失败则引发 Exception。
     """
     if not OPENPYXL_AVAILABLE:
@@ -32,17 +33,6 @@ def generate_excel_file(all_awemes, nickname, base_folder):
         if not safe_mkdir(excel_folder):
             raise OSError('[错误] 无法创建Excel文件夹')
 
-        unique_id = ''
-        if all_awemes and len(all_awemes) > 0:
-            author_info = all_awemes[0].get('author', {})
-            unique_id = author_info.get('unique_id', '') or ''
-        
-        if unique_id:
-            filename = f"{sanitize_filename(nickname)}-{unique_id}.xlsx"
-        else:
-            filename = f"{sanitize_filename(nickname)}.xlsx"
-        filepath = os.path.join(excel_folder, filename)
-
         wb = openpyxl.Workbook() if openpyxl else None
         if not wb:
             raise Exception('[错误] 无法创建工作簿')
@@ -58,14 +48,13 @@ def generate_excel_file(all_awemes, nickname, base_folder):
 
         alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
 
+        unique_id = None
         for aweme in all_awemes:
-            statistics = aweme.get('statistics', {})
-
-            aweme_type = '视频'
-            if aweme.get('images'):
-                aweme_type = '图集'
+            if unique_id is None:
+                unique_id = aweme.author_unique_id or ''
+            aweme_type = '图集' if aweme.is_images else '视频'
             
-            create_time = aweme.get('create_time', 0)
+            create_time = aweme.create_time
             if create_time:
                 try:
                     publish_time = datetime.fromtimestamp(create_time).strftime('%Y-%m-%d %H:%M:%S')
@@ -74,33 +63,26 @@ def generate_excel_file(all_awemes, nickname, base_folder):
             else:
                 publish_time = ''
             
-            mix_name = ''
-            mix_info = aweme.get('mix_info', {})
-            if isinstance(mix_info, dict):
-                mix_name = mix_info.get('mix_name', '') or mix_info.get('mix_name_str', '') or ''
-            if not mix_name:
-                mix_name = aweme.get('mix_name', '') or aweme.get('mix_name_str', '') or ''
+            mix_name = aweme.mix_name or ''
             
             duration_text = ''
-            video_info = aweme.get('video', {})
-            if isinstance(video_info, dict):
-                duration = video_info.get('duration', 0)
-                if duration > 0:
-                    total_seconds = duration // 1000
-                    hours = total_seconds // 3600
-                    minutes = (total_seconds % 3600) // 60
-                    seconds = total_seconds % 60
-                    
-                    if hours > 0:
-                        duration_text = f"{hours}小时{minutes}分钟{seconds}秒"
-                    elif minutes > 0:
-                        duration_text = f"{minutes}分钟{seconds}秒"
-                    else:
-                        duration_text = f"{seconds}秒"
+            duration = aweme.duration
+            if duration > 0:
+                total_seconds = duration // 1000
+                hours = total_seconds // 3600
+                minutes = (total_seconds % 3600) // 60
+                seconds = total_seconds % 60
+                
+                if hours > 0:
+                    duration_text = f"{hours}小时{minutes}分钟{seconds}秒"
+                elif minutes > 0:
+                    duration_text = f"{minutes}分钟{seconds}秒"
+                else:
+                    duration_text = f"{seconds}秒"
             
-            aweme_id = aweme.get('aweme_id', '')
+            aweme_id = aweme.aweme_id
             if aweme_id:
-                if aweme.get('images'):
+                if aweme.is_images:
                     link = f"https://www.douyin.com/note/{aweme_id}"
                 else:
                     link = f"https://www.douyin.com/video/{aweme_id}"
@@ -110,13 +92,13 @@ def generate_excel_file(all_awemes, nickname, base_folder):
             row_data = [
                 aweme_type,  # 类型
                 publish_time,  # 发布时间
-                aweme.get('desc', ''),  # 文案
+                aweme.desc,  # 文案
                 mix_name,  # 合集
-                statistics.get('digg_count', 0),  # 点赞数
-                statistics.get('comment_count', 0),  # 评论数
-                statistics.get('collect_count', 0),  # 收藏数
-                statistics.get('share_count', 0),  # 分享数
-                statistics.get('recommend_count', 0),  # 推荐次数
+                aweme.digg_count,  # 点赞数
+                aweme.comment_count,  # 评论数
+                aweme.collect_count,  # 收藏数
+                aweme.share_count,  # 分享数
+                aweme.recommend_count,  # 推荐次数
                 duration_text,  # 视频时长
                 link  # 作品链接
             ]
@@ -152,6 +134,12 @@ def generate_excel_file(all_awemes, nickname, base_folder):
                 adjusted_width = min(max_length + 3, 50)
             ws.column_dimensions[column_letter].width = adjusted_width
 
+        if unique_id:
+            filename = f"{sanitize_filename(nickname)}-{unique_id}.xlsx"
+        else:
+            filename = f"{sanitize_filename(nickname)}.xlsx"
+        filepath = os.path.join(excel_folder, filename)
+
         wb.save(filepath)
         return filepath
 
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+对冲请求 - 首字节或起始吞吐明显慢于本次运行的大多数下载时，向备用镜像发出第二个请求
+"""
+import threading
+from collections import deque
+
+# 样本不足时使用的默认阈值
+_DEFAULT_TTFB_THRESHOLD = 2.0
+_MIN_TTFB_THRESHOLD = 0.3
+_MIN_SAMPLES = 20
+# 起始吞吐的观察窗口（秒，从首字节开始计）
+EARLY_WINDOW = 1.0
+
+
+def percentile(values, pct):
+    """pct 分位数（最近秩法）"""
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class HedgeController:
+    """
+    对冲阈值与统计（整个运行期间共享，线程安全）。
+      - 首字节超过最近样本的 ttfb_pct 分位数时对冲
+      - 首字节后 EARLY_WINDOW 秒内的吞吐低于最近样本的 throughput_pct 分位数时对冲
+    """
+
+    def __init__(self, ttfb_pct=95, throughput_pct=10, window=200):
+        self.ttfb_pct = ttfb_pct
+        self.throughput_pct = throughput_pct
+        self._lock = threading.Lock()
+        self._ttfbs = deque(maxlen=window)
+        self._throughputs = deque(maxlen=window)
+        self.fired = 0
+        self.hedge_wins = 0
+        self.rescued_stalls = 0
+        self.saved_seconds = 0.0
+        self.wasted_bytes = 0
+
+    def observe(self, ttfb, throughput):
+        """记录一次完成下载的首字节延迟（秒）与吞吐（字节/秒）"""
+        with self._lock:
+            self._ttfbs.append(ttfb)
+            if throughput > 0:
+                self._throughputs.append(throughput)
+
+    def ttfb_threshold(self):
+        with self._lock:
+            if len(self._ttfbs) < _MIN_SAMPLES:
+                return _DEFAULT_TTFB_THRESHOLD
+            return max(_MIN_TTFB_THRESHOLD, percentile(self._ttfbs, self.ttfb_pct))
+
+    def throughput_floor(self):
+        """样本不足时返回 None（不按吞吐对冲）"""
+        with self._lock:
+            if len(self._throughputs) < _MIN_SAMPLES:
+                return None
+            return percentile(self._throughputs, self.throughput_pct)
+
+    def record_hedge(self, hedge_won, saved_seconds=None, wasted_bytes=0):
+        """
+        记录一次对冲。saved_seconds 为按主请求当前吞吐估算的节省时间；
+        主请求无响应或失败时为 None（无法估算，计入 rescued_stalls）。
+        """
+        with self._lock:
+            self.fired += 1
+            if hedge_won:
+                self.hedge_wins += 1
+                if saved_seconds is None:
+                    self.rescued_stalls += 1
+                else:
+                    self.saved_seconds += max(0.0, saved_seconds)
+            self.wasted_bytes += wasted_bytes
+
+    def summary(self):
+        """用于日志的统计说明；未触发过时返回空字符串"""
+        with self._lock:
+            if not self.fired:
+                return ''
+            return (f"[日志] 对冲请求触发 {self.fired} 次，备用请求获胜 {self.hedge_wins} 次"
+                    f"（其中主请求无响应 {self.rescued_stalls} 次），慢速传输预计节省 {self.saved_seconds:.1f} 秒，"
+                    f"额外流量 {self.wasted_bytes / 1024 / 1024:.1f} MB")
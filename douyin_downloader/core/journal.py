@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+下载任务日志（SQLite）- 记录每次下载的全部任务及其状态，程序中断或重启后可继续未完成的任务或只重试失败的任务
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from douyin_downloader.constants import DOWNLOAD_JOURNAL_FILE
+from douyin_downloader.core.task import DownloadTask, TaskKind
+
+STATE_QUEUED = 'queued'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+
+JOB_RUNNING = 'running'
+JOB_FINISHED = 'finished'
+JOB_INCOMPLETE = 'incomplete'
+JOB_DISMISSED = 'dismissed'
+
+# 保留最近多少次已完成/已忽略的下载记录（新建下载时清理更早的）
+_KEEP_JOBS = 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    base_folder TEXT NOT NULL,
+    label TEXT,
+    status TEXT NOT NULL,
+    created_at INTEGER,
+    updated_at INTEGER
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    task TEXT NOT NULL,
+    is_image INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    bytes_done INTEGER NOT NULL DEFAULT 0,
+    path TEXT,
+    updated_at INTEGER,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_job_items_state ON job_items (job_id, state);
+"""
+
+
+def _task_to_json(task):
+    return json.dumps({
+        'url': task.url,
+        'desc': task.desc,
+        'kind': task.kind.value,
+        'date': task.date,
+        'mix_name': task.mix_name,
+        'aweme_id': task.aweme_id,
+        'rate_urls': [list(urls) for urls in task.rate_urls],
+        'include_date_in_filename': task.include_date_in_filename,
+        'size_hint': task.size_hint,
+        'index': task.index,
+    }, ensure_ascii=False)
+
+
+def _task_from_json(text):
+    data = json.loads(text)
+    return DownloadTask(
+        data['url'], data['desc'], TaskKind(data['kind']), data.get('date', ''), data.get('mix_name'),
+        data.get('aweme_id', ''), tuple(tuple(urls) for urls in data.get('rate_urls', ())),
+        data.get('include_date_in_filename', True), data.get('size_hint', 0), data.get('index', 0),
+    )
+
+
+class DownloadJournal:
+    """
+    下载任务日志。
+      - jobs:      每次下载（选择下载 / 边获取边下载）一行，记录下载目录与状态
+      - job_items: 任务（序列化的 DownloadTask）、状态（queued/done/failed）、尝试次数、完成大小与保存路径
+    每个线程使用独立连接（WAL），写入失败不影响下载。
+    """
+
+    def __init__(self, path=DOWNLOAD_JOURNAL_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _conn(self):
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def create_job(self, base_folder, label=''):
+        """新建一次下载，返回 job_id"""
+        now = int(time.time())
+        conn = self._conn()
+        with conn:
+            old = [(row[0],) for row in conn.execute(
+                'SELECT job_id FROM jobs WHERE status IN (?, ?) ORDER BY job_id DESC LIMIT -1 OFFSET ?',
+                (JOB_FINISHED, JOB_DISMISSED, _KEEP_JOBS)
+            )]
+            conn.executemany('DELETE FROM job_items WHERE job_id = ?', old)
+            conn.executemany('DELETE FROM jobs WHERE job_id = ?', old)
+            cur = conn.execute(
+                'INSERT INTO jobs (base_folder, label, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+                (base_folder, label, JOB_RUNNING, now, now)
+            )
+        return cur.lastrowid
+
+    def add_items(self, job_id, items):
+        """追加 (task, is_image) 列表（单个事务），返回各自的序号"""
+        now = int(time.time())
+        conn = self._conn()
+        with conn:
+            row = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM job_items WHERE job_id = ?', (job_id,)).fetchone()
+            start = row[0] + 1
+            conn.executemany(
+                'INSERT INTO job_items (job_id, seq, task, is_image, state, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                [(job_id, start + i, _task_to_json(t), int(bool(is_img)), STATE_QUEUED, now)
+                 for i, (t, is_img) in enumerate(items)]
+            )
+        return list(range(start, start + len(items)))
+
+    def update_item(self, job_id, seq, state, path=None, bytes_done=None, attempts=1):
+        """记录一次下载结果（尝试次数加上本次运行的尝试轮数）"""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'UPDATE job_items SET state = ?, attempts = attempts + ?, path = COALESCE(?, path), '
+                'bytes_done = COALESCE(?, bytes_done), updated_at = ? WHERE job_id = ? AND seq = ?',
+                (state, attempts, path, bytes_done, int(time.time()), job_id, seq)
+            )
+
+    def set_items_state(self, job_id, seqs, state):
+        """批量修改状态（不计尝试次数），用于已存在而跳过的任务"""
+        now = int(time.time())
+        conn = self._conn()
+        with conn:
+            conn.executemany('UPDATE job_items SET state = ?, updated_at = ? WHERE job_id = ? AND seq = ?',
+                             [(state, now, job_id, seq) for seq in seqs])
+
+    def set_job_status(self, job_id, status=None):
+        """修改下载状态；status 为 None 时按任务状态判定（全部完成为 finished，否则 incomplete）"""
+        conn = self._conn()
+        with conn:
+            if status is None:
+                row = conn.execute('SELECT COUNT(*) FROM job_items WHERE job_id = ? AND state != ?',
+                                   (job_id, STATE_DONE)).fetchone()
+                status = JOB_INCOMPLETE if row[0] else JOB_FINISHED
+            conn.execute('UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?',
+                         (status, int(time.time()), job_id))
+
+    def job_summary(self, job_id):
+        """返回 {'job_id', 'base_folder', 'label', 'status', 'updated_at', queued/done/failed 计数}，不存在时返回 None"""
+        conn = self._conn()
+        row = conn.execute('SELECT base_folder, label, status, updated_at FROM jobs WHERE job_id = ?',
+                           (job_id,)).fetchone()
+        if not row:
+            return None
+        summary = {'job_id': job_id, 'base_folder': row[0], 'label': row[1] or '', 'status': row[2],
+                   'updated_at': row[3] or 0, STATE_QUEUED: 0, STATE_DONE: 0, STATE_FAILED: 0}
+        for state, count in conn.execute('SELECT state, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY state',
+                                         (job_id,)):
+            summary[state] = count
+        return summary
+
+    def latest_unfinished(self):
+        """最近一次仍有未完成或失败任务、且未被忽略的下载摘要；没有时返回 None"""
+        row = self._conn().execute(
+            'SELECT j.job_id FROM jobs j WHERE j.status != ? AND EXISTS ('
+            'SELECT 1 FROM job_items i WHERE i.job_id = j.job_id AND i.state != ?) '
+            'ORDER BY j.updated_at DESC, j.job_id DESC LIMIT 1',
+            (JOB_DISMISSED, STATE_DONE)
+        ).fetchone()
+        return self.job_summary(row[0]) if row else None
+
+    def load_items(self, job_id, states):
+        """按序号读取指定状态的任务，返回 [(seq, task, is_image)]"""
+        placeholders = ', '.join('?' * len(states))
+        rows = self._conn().execute(
+            f'SELECT seq, task, is_image FROM job_items WHERE job_id = ? AND state IN ({placeholders}) ORDER BY seq',
+            (job_id, *states)
+        ).fetchall()
+        return [(seq, _task_from_json(text), bool(is_img)) for seq, text, is_img in rows]
+
+
+class JobRecorder:
+    """
+    一次下载运行与日志中一个 job 的对应：记住任务对象的序号，下载完成/失败时更新状态。
+    数据库出错时调用 on_error(异常) 一次并停止记录，不影响下载。
+    """
+
+    def __init__(self, journal, job_id, base_folder, on_error=None):
+        self.journal = journal
+        self.job_id = job_id
+        self.base_folder = base_folder
+        self.on_error = on_error
+        self._seqs = {}
+        self._broken = False
+
+    def _call(self, func, *args):
+        if self._broken:
+            return None
+        try:
+            return func(*args)
+        except (sqlite3.Error, OSError, ValueError) as e:
+            self._broken = True
+            if self.on_error is not None:
+                self.on_error(e)
+            return None
+
+    def attach(self, seq, task):
+        """已在日志中的任务（继续/重试时载入）"""
+        self._seqs[task] = seq
+
+    def add(self, items):
+        """记录新任务 [(task, is_image)]"""
+        if not items:
+            return
+        seqs = self._call(self.journal.add_items, self.job_id, items)
+        for seq, (task, _) in zip(seqs or (), items):
+            self._seqs[task] = seq
+
+    def done(self, task, path, attempts=1):
+        """path 为相对下载目录的保存路径，attempts 为本次运行的尝试轮数"""
+        seq = self._seqs.get(task)
+        if seq is None:
+            return
+        try:
+            size = os.path.getsize(os.path.join(self.base_folder, path))
+        except OSError:
+            size = None
+        self._call(self.journal.update_item, self.job_id, seq, STATE_DONE, path, size, attempts)
+
+    def failed(self, task, attempts=1):
+        seq = self._seqs.get(task)
+        if seq is not None:
+            self._call(self.journal.update_item, self.job_id, seq, STATE_FAILED, None, None, attempts)
+
+    def skipped(self, tasks):
+        """已存在而跳过的任务记为完成"""
+        seqs = [self._seqs[t] for t in tasks if t in self._seqs]
+        if seqs:
+            self._call(self.journal.set_items_state, self.job_id, seqs, STATE_DONE)
+
+    def start(self):
+        """继续/重试时把下载重新标记为进行中"""
+        self._call(self.journal.set_job_status, self.job_id, JOB_RUNNING)
+
+    def finish(self, stopped=False):
+        """下载结束：被终止时保持 incomplete，否则按任务状态判定"""
+        self._call(self.journal.set_job_status, self.job_id, JOB_INCOMPLETE if stopped else None)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+已下载清单 - 每个用户下载目录记录 媒体标识（aweme_id + 类型 + 序号，没有 aweme_id 时为链接哈希）-> 相对路径与大小，
+跳过检查只查内存，不再对每个任务调用 os.path.exists；作品描述改变或文件名带有时间戳后缀时仍能识别
+"""
+import itertools
+import json
+import os
+import threading
+
+from douyin_downloader.constants import DOWNLOAD_MANIFEST_FILE
+from douyin_downloader.core.naming import candidate_filenames
+
+# 清单文件行数超过有效条目的该倍数（且多于 _COMPACT_MIN_LINES 行）时载入后重写
+_COMPACT_RATIO = 2
+_COMPACT_MIN_LINES = 256
+
+
+def _scan_files(folder):
+    """用 os.scandir 遍历目录，返回全部文件的相对路径集合（跳过以 . 开头的文件与目录）"""
+    files = set()
+    stack = [('', folder)]
+    while stack:
+        rel_dir, path = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.name.startswith('.'):
+                        continue
+                    rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((rel, entry.path))
+                        elif entry.is_file():
+                            files.add(rel)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return files
+
+
+class FolderManifest:
+    """
+    单个下载目录的已下载清单（JSON Lines，追加写入，同一标识以最后一行为准）。
+    load() 读取清单并用一次 os.scandir 遍历目录得到现有文件集合：
+      - 清单中文件已不存在（被删除或移走）的条目丢弃
+      - 清单中没有的任务（旧版下载或清单丢失）按 FilenamePlanner 的候选文件名（candidate_filenames）
+        在文件集合中查找，找到后补记到清单
+    写入失败时调用 on_error(异常) 一次并停止写入，内存中的清单仍然有效。线程安全。
+    """
+
+    def __init__(self, folder, on_error=None):
+        self.folder = folder
+        self.path = os.path.join(folder, DOWNLOAD_MANIFEST_FILE)
+        self.on_error = on_error
+        self._lock = threading.Lock()
+        self._entries = {}   # media_key -> (相对路径, 大小)
+        self._files = set()  # 目录中现有文件的相对路径
+        self._owners = {}    # 相对路径 -> media_key
+        self._broken = False
+
+    @classmethod
+    def load(cls, folder, on_error=None):
+        manifest = cls(folder, on_error)
+        manifest._load()
+        return manifest
+
+    def _load(self):
+        lines = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        data = json.loads(line)
+                        self._entries[data['k']] = (data['p'].replace('/', os.sep), int(data.get('s') or 0))
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        continue
+        except FileNotFoundError:
+            pass
+        except (OSError, UnicodeDecodeError) as e:
+            self._fail(e)
+
+        self._files = _scan_files(self.folder)
+        count = len(self._entries)
+        self._entries = {k: v for k, v in self._entries.items() if v[0] in self._files}
+        self._owners = {rel: k for k, (rel, _) in self._entries.items()}
+        if lines > _COMPACT_MIN_LINES and lines > _COMPACT_RATIO * len(self._entries) \
+                or (lines and count != len(self._entries)):
+            self._rewrite()
+
+    @staticmethod
+    def _line(key, rel, size):
+        return json.dumps({'k': key, 'p': rel.replace(os.sep, '/'), 's': size}, ensure_ascii=False) + '\n'
+
+    def _fail(self, error):
+        if not self._broken:
+            self._broken = True
+            if self.on_error is not None:
+                self.on_error(error)
+
+    def _rewrite(self):
+        """只保留有效条目重写清单（先写临时文件再替换）"""
+        if self._broken:
+            return
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(self._line(k, rel, size) for k, (rel, size) in self._entries.items())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self._fail(e)
+
+    def _append(self, key, rel, size):
+        self._entries[key] = (rel, size)
+        self._owners[rel] = key
+        if self._broken:
+            return
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(self._line(key, rel, size))
+        except OSError as e:
+            self._fail(e)
+
+    def _size_of(self, rel):
+        try:
+            return os.path.getsize(os.path.join(self.folder, rel))
+        except OSError:
+            return 0
+
+    def _adopt(self, key, candidates):
+        for rel in candidates:
+            if rel in self._files and self._owners.get(rel, key) == key:
+                self._append(key, rel, self._size_of(rel))
+                return rel
+        return None
+
+    def find(self, task, is_image):
+        """
+        返回任务已下载文件的相对路径；没有时返回 None。
+        先按 task.media_key 查清单，再按 candidate_filenames 的顺序在现有文件中查找（编号候选查到第一个不存在的为止），
+        清单中属于其他作品的文件（描述相同的不同作品）不算。
+        同名的多个任务按 FilenamePlanner 的顺序（aweme_id 从早到晚）查找时，得到的文件与分配时一致。
+        """
+        key = task.media_key
+        fixed, numbered = candidate_filenames(task, is_image, self.folder)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            return self._adopt(key, fixed) or self._adopt(
+                key, itertools.takewhile(self._files.__contains__, numbered))
+
+    def has_file(self, rel):
+        """目录中（遍历时或之后下载完成）是否有该相对路径的文件"""
+        with self._lock:
+            return rel in self._files
+
+    def record(self, task, rel):
+        """记录下载完成的文件（rel 为相对下载目录的路径）"""
+        size = self._size_of(rel)
+        with self._lock:
+            self._files.add(rel)
+            self._append(task.media_key, rel, size)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+CDN 镜像评分 - 按主机统计首字节延迟与吞吐（EWMA），为候选镜像链接排序
+"""
+import threading
+from urllib.parse import urlsplit
+
+# 评分按下载一个参考大小文件的预计耗时计算（秒，越小越好）
+_REFERENCE_BYTES = 4 * 1024 * 1024
+# 失败率对评分的放大系数：失败率 50% 时预计耗时 x3
+_FAILURE_PENALTY = 4.0
+
+
+def host_of(url):
+    """链接所在主机（小写）"""
+    try:
+        return urlsplit(url).hostname or ''
+    except ValueError:
+        return ''
+
+
+class _HostStats:
+    __slots__ = ('ttfb', 'throughput', 'failure_rate', 'samples')
+
+    def __init__(self):
+        self.ttfb = None
+        self.throughput = None
+        self.failure_rate = 0.0
+        self.samples = 0
+
+
+class MirrorScoreboard:
+    """
+    整个运行期间共享的镜像评分表（线程安全）。
+      - 成功：更新首字节延迟 ttfb 与吞吐 throughput 的 EWMA
+      - 失败：失败率 EWMA 上升，评分变差
+    尚无数据的主机评分为 0，会被优先尝试一次以获得测量值。
+    """
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _ewma(self, old, value):
+        return value if old is None else old + self.alpha * (value - old)
+
+    def _stats(self, host):
+        stats = self._hosts.get(host)
+        if stats is None:
+            stats = self._hosts[host] = _HostStats()
+        return stats
+
+    def record_success(self, url, ttfb, nbytes, elapsed):
+        """记录一次成功下载：ttfb 与 elapsed 为秒，nbytes 为本次传输字节数"""
+        host = host_of(url)
+        with self._lock:
+            stats = self._stats(host)
+            stats.ttfb = self._ewma(stats.ttfb, max(0.0, ttfb))
+            transfer = elapsed - ttfb
+            if nbytes > 0 and transfer > 0:
+                stats.throughput = self._ewma(stats.throughput, nbytes / transfer)
+            stats.failure_rate = self._ewma(stats.failure_rate, 0.0)
+            stats.samples += 1
+
+    def record_failure(self, url):
+        """记录一次失败（连接错误、HTTP 错误、传输中断）"""
+        host = host_of(url)
+        with self._lock:
+            stats = self._stats(host)
+            stats.failure_rate = self._ewma(stats.failure_rate, 1.0)
+            stats.samples += 1
+
+    def score(self, url):
+        """预计耗时评分（秒），越小越好；无数据时为 0"""
+        with self._lock:
+            stats = self._hosts.get(host_of(url))
+            if stats is None or stats.samples == 0:
+                return 0.0
+            expected = stats.ttfb or 0.0
+            if stats.throughput:
+                expected += _REFERENCE_BYTES / stats.throughput
+            elif stats.ttfb is None:
+                expected = 1.0  # 只有失败记录，给一个基准耗时再按失败率放大
+            return expected * (1.0 + _FAILURE_PENALTY * stats.failure_rate)
+
+    def order(self, urls):
+        """按评分从好到差排列候选链接（同分保持原顺序）"""
+        if len(urls) <= 1:
+            return list(urls)
+        return sorted(urls, key=self.score)
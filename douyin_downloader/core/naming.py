@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件名规划 - 下载前为整批任务分配确定的、互不冲突的文件名（只查内存中的已下载清单，不访问磁盘）
+"""
+import itertools
+import os
+
+from douyin_downloader.utils.file_utils import build_expected_filename
+
+# 目标路径超过该长度时缩短文件名主体（与 generate_unique_filename 相同）
+_MAX_PATH_LENGTH = 240
+_SHORT_NAME_LENGTH = 80
+# 短后缀使用 aweme_id 的后几位
+_SHORT_ID_LENGTH = 6
+
+
+def age_key(task):
+    """aweme_id 按数值排序（越早发布越小），没有 aweme_id 的排在最后"""
+    aweme_id = task.aweme_id or ''
+    return (not aweme_id, len(aweme_id), aweme_id, task.index, task.url)
+
+
+def candidate_filenames(task, is_image, folder):
+    """
+    任务可用的相对路径，按优先级排列（FilenamePlanner 分配与 FolderManifest.find 查找共用）。
+    返回 (固定候选列表, 编号候选的无限迭代器)：
+      固定候选为基础名（路径过长时省略）、_<aweme_id 后 6 位>、_<aweme_id>、_<url_hash>，
+      编号候选为 _<url_hash>_1、_<url_hash>_2 ...
+    """
+    args = (task.desc, task.ext, is_image, task.mix_name, task.date, task.include_date_in_filename)
+    base = build_expected_filename(*args)
+    fixed = []
+    max_length = 150
+    if len(os.path.join(folder, base)) > _MAX_PATH_LENGTH:
+        max_length = _SHORT_NAME_LENGTH
+    else:
+        fixed.append(base)
+    suffixes = []
+    aweme_id = task.aweme_id
+    if aweme_id:
+        suffixes.append(aweme_id[-_SHORT_ID_LENGTH:])
+        if len(aweme_id) > _SHORT_ID_LENGTH:
+            suffixes.append(aweme_id)
+    suffixes.append(task.url_hash)
+    fixed.extend(build_expected_filename(*args, suffix=f'_{s}', max_length=max_length) for s in suffixes)
+    numbered = (build_expected_filename(*args, suffix=f'_{task.url_hash}_{n}', max_length=max_length)
+                for n in itertools.count(1))
+    return fixed, numbered
+
+
+class FilenamePlanner:
+    """
+    为任务分配相对路径（写入 task.rel_path，下载时 prepare_download_path 直接使用）：
+      - 基础名与 build_expected_filename 相同，跳过检查与下载使用同一套规则
+      - 与目录中已有文件或已分配给其他任务的名称冲突时，按 candidate_filenames 依次尝试后缀
+        _<aweme_id 后 6 位>、_<aweme_id>、_<url_hash>、_<url_hash>_<n>
+      - 同一批中基础名相同的任务按 aweme_id 排序，最早的作品保留基础名；
+        结果与任务顺序、线程调度无关，继续下载时得到相同的文件名（.tmp 可以续传）
+    同一次下载（包括边获取边下载的多批任务）共用一个实例；非线程安全。
+    """
+
+    def __init__(self, manifest):
+        self.manifest = manifest
+        self._claimed = {}  # 相对路径 -> 任务标识
+
+    def _is_free(self, rel, owner):
+        claimed = self._claimed.get(rel)
+        if claimed is not None:
+            return claimed == owner
+        return not self.manifest.has_file(rel)
+
+    def assign(self, items):
+        """为一批 (task, is_image) 分配文件名"""
+        for task, is_image in sorted(items, key=lambda item: age_key(item[0])):
+            owner = task.media_key
+            fixed, numbered = candidate_filenames(task, is_image, self.manifest.folder)
+            for rel in itertools.chain(fixed, numbered):
+                if self._is_free(rel, owner):
+                    self._claimed[rel] = owner
+                    task.rel_path = rel
+                    break
@@ -3,135 +3,120 @@
 """
 作品解析与任务构建区块 （解析 Aweme → 视频/图片任务）
 """
-import hashlib
-from datetime import datetime
+from datetime import datetime, time as dtime, timedelta
 from douyin_downloader.constants import MAX_DESC_LENGTH
-from douyin_downloader.utils.file_utils import get_extension_from_url
+from douyin_downloader.core.record import AwemeRecord, build_aweme_record
+from douyin_downloader.core.task import DownloadTask, TaskKind
 
-def extract_media_links_from_aweme(aweme):
+
+class _DateFormatter:
     """
-    从单个 aweme JSON 对象中提取媒体链接。
-    
-    互斥提取逻辑：
-      - 如果 image 项包含 'video' 字段 -> 视为实况图（只提取实况图视频 .mp4）
-      - 否则 -> 视为普通图片（提取最高分辨率 url_list[-1] .jpg/.png）
-      
-    返回： desc, videos[], images[], live_images[], date_str, mix_name
+    时间戳 -> YYYY-MM-DD。
+    缓存最近一次所在自然日的起止时间戳，同一天的作品直接复用日期字符串；
+    (起, 止, 文本) 作为一个元组整体替换，多线程共用也不会读到不一致的缓存。
     """
-    videos, images, live_images = [], [], []
-    aweme_id = aweme.get('aweme_id') or ''
-    desc = aweme.get('desc', '') or aweme_id or 'no_desc'
-    
-    # 提取合集名称
-    mix_name = None
-    mix_info = aweme.get('mix_info', {})
-    if isinstance(mix_info, dict):
-        mix_name = mix_info.get('mix_name') or mix_info.get('mix_name_str') or None
-    if not mix_name:
-        mix_name = aweme.get('mix_name') or aweme.get('mix_name_str') or None
-
-    # 转换时间戳 -> YYYY-MM-DD
-    ts = aweme.get('create_time')
-    date_str = ''
-    if ts:
+    __slots__ = ('_cached',)
+
+    def __init__(self):
+        self._cached = (0, 0, '')
+
+    def __call__(self, ts):
+        if not ts:
+            return ''
+        start, end, text = self._cached
+        if start <= ts < end:
+            return text
         try:
-            date_str = datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+            day = datetime.fromtimestamp(ts).date()
+            day_start = datetime.combine(day, dtime.min)
+            text = day.strftime("%Y-%m-%d")
+            self._cached = (day_start.timestamp(), (day_start + timedelta(days=1)).timestamp(), text)
+            return text
         except Exception:
-            pass # 时间戳转换失败
+            return '' # 时间戳转换失败
+
+
+format_date = _DateFormatter()
+
+
+def _select_image_url(image, image_policy):
+    return image_policy.select_url(image) if image_policy else image.urls[-1]
+
+
+def _image_mirrors(image, url):
+    """选中图片链接的镜像：url_list 中路径相同（同一格式/尺寸）、仅主机不同的链接，选中链接在前"""
+    path = _url_path(url)
+    return (url,) + tuple(u for u in image.urls if u != url and _url_path(u) == path)
+
+
+def _url_path(url):
+    """去掉协议、主机与查询参数后的路径"""
+    rest = url.split('?', 1)[0].split('://', 1)[-1]
+    slash = rest.find('/')
+    return rest[slash:] if slash >= 0 else ''
 
-    # 自动截断过长描述
+
+def _rate_size(rate, duration_ms):
+    """码率的预计文件大小：优先接口给出的 data_size，否则按码率 x 时长估算；未知时为 0"""
+    return rate.data_size or rate.bit_rate * duration_ms // 8000
+
+
+def iter_record_tasks(record, video_policy=None, image_policy=None):
+    """逐个产出单个作品的下载任务（视频 -> 普通图片 -> 实况图）"""
+    desc = record.desc or record.aweme_id or 'no_desc'
     if len(desc) > MAX_DESC_LENGTH:
         desc = desc[:MAX_DESC_LENGTH] + "......"
+    date_str = format_date(record.create_time)
+    mix_name = record.mix_name
+    aweme_id = record.aweme_id
+
+    # 视频：按画质策略排序码率，保留每个码率的全部镜像链接（下载时按镜像评分选择）
+    video_rates = video_policy.order_rates(record.video_rates) if video_policy else record.video_rates
+    if video_rates:
+        yield DownloadTask(
+            video_rates[0].urls[0], desc, TaskKind.VIDEO, date_str, mix_name, aweme_id,
+            tuple(rate.urls for rate in video_rates), size_hint=_rate_size(video_rates[0], record.duration),
+        )
+
+    # 普通图片（按张）：按图片策略选择候选链接（默认最后一个，即最高分辨率）
+    for idx, image in enumerate(record.images, start=1):
+        url = _select_image_url(image, image_policy)
+        yield DownloadTask(url, f"{desc}_p{idx}", TaskKind.IMAGE, date_str, mix_name, aweme_id,
+                           (_image_mirrors(image, url),), size_hint=image.width * image.height // 4, index=idx)
+
+    # 实况图（按张）：最高码率
+    for idx, rates in enumerate(record.live_images, start=1):
+        yield DownloadTask(rates[0].urls[0], f"{desc}_live{idx}", TaskKind.LIVE, date_str, mix_name, aweme_id,
+                           tuple(rate.urls for rate in rates), size_hint=_rate_size(rates[0], 0), index=idx)
+
+
+def iter_download_tasks(all_awemes, video_policy=None, image_policy=None, stats=None):
+    """
+    流式解析所有作品（AwemeRecord 或原始 aweme），逐个产出 DownloadTask，不建立完整列表。
+    stats 为 dict 时累加图集作品数 stats['albums']（有普通图片或实况图的作品）。
+    """
+    for aweme in all_awemes:
+        record = aweme if isinstance(aweme, AwemeRecord) else build_aweme_record(aweme)
+        if stats is not None and (record.images or record.live_images):
+            stats['albums'] = stats.get('albums', 0) + 1
+        yield from iter_record_tasks(record, video_policy, image_policy)
 
-    # 1. 提取普通视频作品 (aweme.video)
-    video_info = aweme.get('video', {})
-    bit_rate_list = video_info.get('bit_rate', [])
-    if bit_rate_list:
-        try:
-            # 选择最高码率
-            best = max(bit_rate_list, key=lambda x: x.get('bit_rate', 0))
-            url_list = best.get('play_addr', {}).get('url_list', [])
-            if url_list:
-                videos.append(url_list[0]) # 通常第一个链接最稳定
-        except Exception:
-            pass # 码率列表格式异常
-
-    # 2. 提取图集作品 (aweme.images)
-    if 'images' in aweme and isinstance(aweme['images'], list):
-        for img in aweme['images']:
-            if not isinstance(img, dict):
-                continue
-
-            # 2a. 检查是否为实况图（包含 video 字段）
-            vinfo = img.get('video')
-            if vinfo and isinstance(vinfo, dict) and 'bit_rate' in vinfo:
-                try:
-                    rates = vinfo.get('bit_rate') or []
-                    if rates:
-                        best = max(rates, key=lambda x: x.get('bit_rate', 0))
-                        vurl_list = best.get('play_addr', {}).get('url_list', [])
-                        if vurl_list:
-                            live_images.append(vurl_list[0])
-                    # 互斥：提取了实况图，就跳过该项的普通图片提取
-                    continue
-                except Exception:
-                    pass # 码率列表格式异常
-
-            # 2b. 按普通图片处理
-            url_list = img.get('url_list', [])
-            if url_list and isinstance(url_list, list) and url_list:
-                # 默认最后一个是最高分辨率
-                images.append(url_list[-1])
-
-    return desc, videos, images, live_images, date_str, mix_name
-
-
-def parse_all_awemes_to_tasks(all_awemes):
-    """将所有aweme解析为下载任务列表"""
+
+def parse_all_awemes_to_tasks(all_awemes, video_policy=None, image_policy=None):
+    """将所有作品（AwemeRecord 或原始 aweme）解析为视频/图片任务列表及图集统计（iter_download_tasks 的列表版本）"""
     video_tasks, image_tasks = [], []
-    album_count = 0
     image_count = 0
     live_count = 0
+    stats = {'albums': 0}
 
-    for aweme in all_awemes:
-        desc, videos, images, live_images, date_str, mix_name = extract_media_links_from_aweme(aweme)
-
-        # 视频任务
-        for vurl in videos:
-            ext = get_extension_from_url(vurl, '.mp4')
-            task = {
-                'url': vurl,
-                'desc': desc,
-                'ext': ext,
-                'date': date_str,
-                'mix_name': mix_name,
-                'aweme': aweme,
-                'url_hash': hashlib.md5(vurl.encode('utf-8')).hexdigest()[:8],
-            }
+    for task in iter_download_tasks(all_awemes, video_policy, image_policy, stats):
+        if task.kind is TaskKind.VIDEO:
             video_tasks.append(task)
-
-        # 如果这个 aweme 有普通图片或实况图，则视为一个图集作品
-        if images or live_images:
-            album_count += 1
-
-        # 普通图片（按张）
-        for idx, iurl in enumerate(images, start=1):
-            ext = get_extension_from_url(iurl, '.jpg')
-            image_tasks.append({
-                'url': iurl, 'desc': f"{desc}_p{idx}", 'ext': ext,
-                'date': date_str, 'mix_name': mix_name,
-                'url_hash': hashlib.md5(iurl.encode('utf-8')).hexdigest()[:8],
-            })
-        image_count += len(images)
-
-        # 实况图（按张）
-        for idx, lvurl in enumerate(live_images, start=1):
-            ext = get_extension_from_url(lvurl, '.mp4')
-            image_tasks.append({
-                'url': lvurl, 'desc': f"{desc}_live{idx}", 'ext': ext,
-                'date': date_str, 'mix_name': mix_name,
-                'url_hash': hashlib.md5(lvurl.encode('utf-8')).hexdigest()[:8],
-            })
-        live_count += len(live_images)
-
-    return video_tasks, image_tasks, album_count, image_count, live_count
\ No newline at end of file
+        else:
+            image_tasks.append(task)
+            if task.kind is TaskKind.LIVE:
+                live_count += 1
+            else:
+                image_count += 1
+
+    return video_tasks, image_tasks, stats['albums'], image_count, live_count
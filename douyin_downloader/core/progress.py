@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+下载进度 - 按字节汇总每个任务、每个通道与整体的接收量，计算滑动窗口吞吐与剩余时间，
+由 ProgressReporter 按固定间隔回调（GUI 进度条与无界面运行共用）
+"""
+import threading
+import time
+from collections import deque
+
+from douyin_downloader.constants import PROGRESS_INTERVAL
+from douyin_downloader.core.scheduler import LANE_VIDEO, LANE_IMAGE, TYPICAL_SIZE, lane_of
+
+_LANES = (LANE_VIDEO, LANE_IMAGE)
+_LANE_LABELS = {LANE_VIDEO: '视频', LANE_IMAGE: '图片'}
+# 吞吐按最近多少秒计算
+_RATE_WINDOW = 5.0
+
+
+class _LaneTotals:
+    __slots__ = ('name', 'done', 'failed', 'done_bytes', 'received', 'queued', 'queued_bytes', 'queued_unknown')
+
+    def __init__(self, name):
+        self.name = name
+        self.done = 0
+        self.failed = 0
+        self.done_bytes = 0      # 已完成文件的总大小
+        self.received = 0        # 本次运行实际接收的字节数（不含续传前已有的部分）
+        self.queued = 0
+        self.queued_bytes = 0    # 等待中且预计大小已知的任务
+        self.queued_unknown = 0  # 等待中且大小未知的任务数
+
+    def average_size(self):
+        """已完成文件的平均大小；还没有完成的文件时取通道的典型大小"""
+        return self.done_bytes // self.done if self.done else TYPICAL_SIZE[self.name]
+
+
+class DownloadProgress:
+    """
+    一次下载运行的字节进度（线程安全）：
+      - queue(task)：任务进入调度（按 size_hint 计入预计总量，未知时按通道已完成文件的平均大小估算）
+      - begin(task, offset, length)：收到响应，offset 为续传前已有的字节，length 为完整长度（未知为 None）
+      - add_bytes(task, n)：收到数据（task 为 None 时只计入整体吞吐，如对冲的备用请求）
+      - defer(task)：本轮失败、等待重试（移出进行中，重新计入排队）
+      - finish(task, ok)：任务最终完成或失败
+    snapshot() 返回 dict：files_done / files_failed / files_total、bytes_done / bytes_total、
+    rate（字节/秒，最近 _RATE_WINDOW 秒）、eta（秒，无法估计时为 None）、received（本次实际接收字节）、
+    elapsed（秒）、lanes（各通道的 files_* / bytes_* / rate / received）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, tasks=()):
+        """开始新的一次下载，tasks 为已知的全部任务（边获取边下载时之后再逐批 queue）"""
+        with self._lock:
+            self._lanes = {name: _LaneTotals(name) for name in _LANES}
+            self._queued = {}  # task -> 预计大小（0 为未知）
+            self._active = {}  # task -> [已接收（含续传前已有的部分）, 完整长度或预计大小]
+            self._received = 0
+            self._samples = deque()  # (时间, 整体接收量, {通道: 接收量})
+            self._started = time.monotonic()
+        for task in tasks:
+            self.queue(task)
+
+    def queue(self, task):
+        with self._lock:
+            if task in self._queued or task in self._active:
+                return
+            lane = self._lanes[lane_of(task)]
+            self._queued[task] = task.size_hint
+            lane.queued += 1
+            if task.size_hint:
+                lane.queued_bytes += task.size_hint
+            else:
+                lane.queued_unknown += 1
+
+    def _dequeue(self, task, lane):
+        size = self._queued.pop(task, None)
+        if size is None:
+            return
+        lane.queued -= 1
+        if size:
+            lane.queued_bytes -= size
+        else:
+            lane.queued_unknown -= 1
+
+    def begin(self, task, offset=0, length=None):
+        if task is None:
+            return
+        with self._lock:
+            lane = self._lanes[lane_of(task)]
+            self._dequeue(task, lane)
+            total = length or task.size_hint or lane.average_size()
+            self._active[task] = [offset, max(total, offset)]
+
+    def add_bytes(self, task, amount):
+        with self._lock:
+            self._received += amount
+            if task is None:
+                return
+            self._lanes[lane_of(task)].received += amount
+            state = self._active.get(task)
+            if state is not None:
+                state[0] += amount
+                if state[0] > state[1]:
+                    state[1] = state[0]
+
+    def defer(self, task):
+        with self._lock:
+            state = self._active.pop(task, None)
+            if state is None:
+                return
+            lane = self._lanes[lane_of(task)]
+            self._queued[task] = state[1]
+            lane.queued += 1
+            if state[1]:
+                lane.queued_bytes += state[1]
+            else:
+                lane.queued_unknown += 1
+
+    def finish(self, task, ok):
+        with self._lock:
+            lane = self._lanes[lane_of(task)]
+            self._dequeue(task, lane)
+            state = self._active.pop(task, None)
+            if ok:
+                lane.done += 1
+                lane.done_bytes += state[0] if state else task.size_hint
+            else:
+                lane.failed += 1
+
+    def _rate(self, now, received, lane_received):
+        """追加采样并返回 (整体吞吐, {通道: 吞吐})，按窗口内最早的采样计算"""
+        self._samples.append((now, received, lane_received))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= _RATE_WINDOW:
+            self._samples.popleft()
+        then, then_received, then_lanes = self._samples[0]
+        elapsed = now - then
+        if elapsed <= 0:
+            # 第一次采样：按运行开始以来的平均值
+            elapsed = max(1e-6, now - self._started)
+            then_received, then_lanes = 0, {name: 0 for name in _LANES}
+        return ((received - then_received) / elapsed,
+                {name: (lane_received[name] - then_lanes[name]) / elapsed for name in _LANES})
+
+    def snapshot(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            lane_received = {name: lane.received for name, lane in self._lanes.items()}
+            rate, lane_rates = self._rate(now, self._received, lane_received)
+            lanes = {}
+            for name, lane in self._lanes.items():
+                active = [state for task, state in self._active.items() if lane_of(task) == name]
+                active_done = sum(state[0] for state in active)
+                bytes_done = lane.done_bytes + active_done
+                remaining = (sum(state[1] for state in active) - active_done + lane.queued_bytes
+                             + lane.queued_unknown * lane.average_size())
+                lanes[name] = {
+                    'files_done': lane.done,
+                    'files_failed': lane.failed,
+                    'files_active': len(active),
+                    'files_total': lane.done + lane.failed + len(active) + lane.queued,
+                    'bytes_done': bytes_done,
+                    'bytes_total': bytes_done + remaining,
+                    'rate': lane_rates[name],
+                    'received': lane.received,
+                }
+        summary = {key: sum(lane[key] for lane in lanes.values())
+                   for key in ('files_done', 'files_failed', 'files_active', 'files_total', 'bytes_done',
+                               'bytes_total')}
+        summary['rate'] = rate
+        summary['received'] = self._received
+        summary['elapsed'] = now - self._started
+        remaining = summary['bytes_total'] - summary['bytes_done']
+        summary['eta'] = remaining / rate if rate > 0 else (0.0 if remaining <= 0 else None)
+        summary['lanes'] = lanes
+        return summary
+
+
+download_progress = DownloadProgress()
+
+
+def _format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def format_progress(snapshot):
+    """进度的简短文本，如 “120.5 / 800.0 MB · 5.2 MB/s · 剩余 2:11”"""
+    text = (f"{snapshot['bytes_done'] / 1024 / 1024:.1f} / {snapshot['bytes_total'] / 1024 / 1024:.1f} MB"
+            f" · {snapshot['rate'] / 1024 / 1024:.1f} MB/s")
+    if snapshot['eta'] is not None and snapshot['bytes_done'] < snapshot['bytes_total']:
+        text += f" · 剩余 {_format_duration(snapshot['eta'])}"
+    return text
+
+
+def format_lanes(snapshot, average=False):
+    """
+    各通道统计，如 “视频 3/20 个 45.1 MB 3.2 MB/s；图片 ...”（没有任务的通道不显示）；
+    average 为 True 时吞吐取整次运行的平均值（用于结束时的统计），否则为最近的吞吐。
+    """
+    parts = []
+    elapsed = max(1e-6, snapshot['elapsed'])
+    for name, lane in snapshot['lanes'].items():
+        if not lane['files_total']:
+            continue
+        rate = lane['received'] / elapsed if average else lane['rate']
+        text = (f"{_LANE_LABELS[name]} {lane['files_done']}/{lane['files_total']} 个 "
+                f"{lane['bytes_done'] / 1024 / 1024:.1f} MB {rate / 1024 / 1024:.1f} MB/s")
+        if lane['files_failed']:
+            text += f"（失败 {lane['files_failed']}）"
+        parts.append(text)
+    return '；'.join(parts)
+
+
+class ProgressReporter:
+    """
+    后台线程每 interval 秒调用一次 callback(snapshot)（进度未变化时跳过），stop() 时再回调一次最终结果。
+    GUI 中 callback 发出信号；无界面运行时可直接打印 format_progress(snapshot)。
+    """
+
+    def __init__(self, progress, callback, interval=PROGRESS_INTERVAL):
+        self.progress = progress
+        self.callback = callback
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._last = None
+
+    def _report(self):
+        snapshot = self.progress.snapshot()
+        key = (snapshot['bytes_done'], snapshot['files_done'], snapshot['files_failed'], snapshot['files_total'],
+               int(snapshot['rate']) >> 10)
+        if key == self._last:
+            return
+        self._last = key
+        try:
+            self.callback(snapshot)
+        except Exception:
+            pass
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._report()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._report()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+画质策略 - 视频按 最高画质 / 限制分辨率 / 限制单文件大小 / 编码偏好 选择码率，
+图片按 格式偏好 / 最长边上限 选择候选链接
+"""
+import os
+import re
+
+QUALITY_BEST = 'best'
+QUALITY_MAX_HEIGHT = 'max_height'
+QUALITY_MAX_BYTES = 'max_bytes'
+QUALITY_MODES = (QUALITY_BEST, QUALITY_MAX_HEIGHT, QUALITY_MAX_BYTES)
+
+CODEC_ANY = 'any'
+CODEC_CHOICES = (CODEC_ANY, 'h264', 'bytevc1')
+_CODEC_LABELS = {'h264': 'H.264', 'bytevc1': 'H.265'}
+
+
+class VideoQualityPolicy:
+    """
+    视频码率选择策略。
+      - best:       码率最高
+      - max_height: 分辨率（短边，720 即 720p）不超过 max_height 中码率最高的
+      - max_bytes:  文件大小不超过 max_bytes 中码率最高的（大小未知的码率视为不超限）
+    codec 不为 any 时优先该编码（h264 兼容性更好，bytevc1 即 H.265 体积更小）。
+    没有码率满足限制时，选择分辨率最低/文件最小的一个。
+    """
+    __slots__ = ('mode', 'max_height', 'max_bytes', 'codec')
+
+    def __init__(self, mode=QUALITY_BEST, max_height=720, max_bytes=0, codec=CODEC_ANY):
+        self.mode = mode if mode in QUALITY_MODES else QUALITY_BEST
+        self.max_height = max_height
+        self.max_bytes = max_bytes
+        self.codec = codec if codec in CODEC_CHOICES else CODEC_ANY
+
+    @classmethod
+    def from_config(cls, cfg):
+        """由配置构建策略（video_max_mb 以 MB 为单位）"""
+        try:
+            max_height = int(cfg.get('video_max_height', 720) or 0)
+            max_bytes = int(cfg.get('video_max_mb', 0) or 0) * 1024 * 1024
+        except (TypeError, ValueError):
+            max_height, max_bytes = 720, 0
+        return cls(cfg.get('video_quality', QUALITY_BEST), max_height, max_bytes,
+                   cfg.get('video_codec', CODEC_ANY))
+
+    def describe(self):
+        """用于日志的策略说明"""
+        if self.mode == QUALITY_MAX_HEIGHT:
+            text = f'分辨率不超过 {self.max_height}p'
+        elif self.mode == QUALITY_MAX_BYTES and self.max_bytes > 0:
+            text = f'单个文件不超过 {self.max_bytes // (1024 * 1024)}MB'
+        else:
+            text = '最高画质'
+        if self.codec != CODEC_ANY:
+            text += f'，优先 {_CODEC_LABELS[self.codec]} 编码'
+        return text
+
+    @property
+    def is_default(self):
+        return self.mode == QUALITY_BEST and self.codec == CODEC_ANY
+
+    def _within_limit(self, rate):
+        if self.mode == QUALITY_MAX_HEIGHT and self.max_height > 0:
+            return not rate.resolution or rate.resolution <= self.max_height
+        if self.mode == QUALITY_MAX_BYTES and self.max_bytes > 0:
+            return not rate.data_size or rate.data_size <= self.max_bytes
+        return True
+
+    def _smallest(self, rates):
+        if self.mode == QUALITY_MAX_HEIGHT:
+            return min(rates, key=lambda r: (r.resolution, r.bit_rate))
+        return min(rates, key=lambda r: (r.data_size, r.bit_rate))
+
+    def order_rates(self, rates):
+        """
+        返回按策略排序的码率候选（首个为选中码率，其余为下载失败时的降级顺序）。
+        rates 需已按码率从高到低排列（AwemeRecord.video_rates）。
+        """
+        if not rates or self.is_default:
+            return rates
+        candidates = [r for r in rates if self._within_limit(r)]
+        if not candidates:
+            return (self._smallest(rates),)
+        if self.codec != CODEC_ANY:
+            # 稳定排序：优先编码在前，同编码内保持码率从高到低
+            candidates.sort(key=lambda r: r.codec != self.codec)
+        return tuple(candidates)
+
+
+IMAGE_FORMAT_ORIGINAL = 'original'
+IMAGE_FORMATS = (IMAGE_FORMAT_ORIGINAL, 'webp', 'jpeg', 'heic')
+_IMAGE_FORMAT_EXTS = {'webp': ('.webp',), 'jpeg': ('.jpeg', '.jpg'), 'heic': ('.heic', '.heif')}
+# 图片链接中的缩放模板，如 ~tplv-dy-aweme-images:1080:1440:q75.webp
+_TPLV_SIZE_RE = re.compile(r'~tplv-[^:/?]*:(\d+):(\d+)')
+
+
+def _url_format_ext(url):
+    """图片链接的格式扩展名（小写，不含查询参数）"""
+    return os.path.splitext(url.split('?', 1)[0])[1].lower()
+
+
+def _url_max_side(url, image):
+    """候选链接的最长边：链接模板中带尺寸时按模板，否则按原图宽高"""
+    match = _TPLV_SIZE_RE.search(url)
+    if match:
+        return max(int(match.group(1)), int(match.group(2)))
+    return max(image.width, image.height)
+
+
+class ImageQualityPolicy:
+    """
+    图片候选链接选择策略。
+      - fmt:      original 保持原逻辑（url_list 最后一个，通常分辨率最高），
+                  否则优先 webp / jpeg / heic 中链接提供的格式
+      - max_side: 最长边上限（0 不限），按链接模板尺寸或原图宽高判断；
+                  没有候选满足时选择最长边最小的
+    """
+    __slots__ = ('fmt', 'max_side')
+
+    def __init__(self, fmt=IMAGE_FORMAT_ORIGINAL, max_side=0):
+        self.fmt = fmt if fmt in IMAGE_FORMATS else IMAGE_FORMAT_ORIGINAL
+        self.max_side = max_side
+
+    @classmethod
+    def from_config(cls, cfg):
+        try:
+            max_side = int(cfg.get('image_max_side', 0) or 0)
+        except (TypeError, ValueError):
+            max_side = 0
+        return cls(cfg.get('image_format', IMAGE_FORMAT_ORIGINAL), max_side)
+
+    @property
+    def is_default(self):
+        return self.fmt == IMAGE_FORMAT_ORIGINAL and self.max_side <= 0
+
+    def describe(self):
+        """用于日志的策略说明"""
+        parts = []
+        if self.fmt != IMAGE_FORMAT_ORIGINAL:
+            parts.append(f'优先 {self.fmt.upper()} 格式')
+        if self.max_side > 0:
+            parts.append(f'最长边不超过 {self.max_side}')
+        return '，'.join(parts) or '原图'
+
+    def select_url(self, image):
+        """从 ImageItem 的候选链接中选择一个"""
+        urls = image.urls
+        if self.is_default or len(urls) == 1:
+            return urls[-1]
+
+        # 保持原顺序反向遍历：同等条件下仍优先 url_list 靠后（原图）的链接
+        candidates = list(reversed(urls))
+        if self.max_side > 0:
+            sides = {url: _url_max_side(url, image) for url in candidates}
+            within = [url for url in candidates if not sides[url] or sides[url] <= self.max_side]
+            candidates = within or [min(candidates, key=lambda url: sides[url])]
+        if self.fmt != IMAGE_FORMAT_ORIGINAL:
+            exts = _IMAGE_FORMAT_EXTS[self.fmt]
+            preferred = [url for url in candidates if _url_format_ext(url) in exts]
+            candidates = preferred or candidates
+        return candidates[0]
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+精简作品记录 - 逐页由原始 aweme JSON 构建，替代整页原始字典常驻内存
+"""
+
+
+class VideoRate:
+    """
+    单个码率候选（码率 + 该码率下的全部镜像链接）。
+    gear_name / width / height / data_size / codec 缺失时为空字符串或 0。
+    """
+    __slots__ = ('bit_rate', 'urls', 'gear_name', 'width', 'height', 'data_size', 'codec')
+
+    def __init__(self, bit_rate, urls, gear_name='', width=0, height=0, data_size=0, codec=''):
+        self.bit_rate = bit_rate
+        self.urls = urls
+        self.gear_name = gear_name
+        self.width = width
+        self.height = height
+        self.data_size = data_size
+        self.codec = codec
+
+    @property
+    def resolution(self):
+        """短边像素（竖屏视频 height 大于 width，按短边比较 720p/1080p）"""
+        if self.width and self.height:
+            return min(self.width, self.height)
+        return self.width or self.height
+
+
+class ImageItem:
+    """单张普通图片（全部候选链接 + 原图宽高）"""
+    __slots__ = ('urls', 'width', 'height')
+
+    def __init__(self, urls, width=0, height=0):
+        self.urls = urls
+        self.width = width
+        self.height = height
+
+
+class AwemeRecord:
+    """
+    单个作品的精简记录。
+    仅保留 Excel/直链导出所需字段与候选媒体链接：
+      - video_rates: 视频码率候选，按码率从高到低排列
+      - images:      普通图片，每张一个 ImageItem（url_list 元组 + 宽高）
+      - live_images: 实况图，每张一个码率候选元组（从高到低）
+    """
+    __slots__ = (
+        'aweme_id', 'desc', 'create_time', 'mix_name', 'is_images', 'duration',
+        'digg_count', 'comment_count', 'collect_count', 'share_count', 'recommend_count',
+        'author_unique_id', 'video_rates', 'images', 'live_images',
+    )
+
+    def __init__(self, aweme_id='', desc='', create_time=0, mix_name=None, is_images=False,
+                 duration=0, digg_count=0, comment_count=0, collect_count=0, share_count=0,
+                 recommend_count=0, author_unique_id='', video_rates=(), images=(), live_images=()):
+        self.aweme_id = aweme_id
+        self.desc = desc
+        self.create_time = create_time
+        self.mix_name = mix_name
+        self.is_images = is_images
+        self.duration = duration
+        self.digg_count = digg_count
+        self.comment_count = comment_count
+        self.collect_count = collect_count
+        self.share_count = share_count
+        self.recommend_count = recommend_count
+        self.author_unique_id = author_unique_id
+        self.video_rates = video_rates
+        self.images = images
+        self.live_images = live_images
+
+
+def _extract_rates(bit_rate_list):
+    """将原始 bit_rate 列表转换为按码率降序排列的 VideoRate 元组"""
+    rates = []
+    for item in bit_rate_list or []:
+        if not isinstance(item, dict):
+            continue
+        play_addr = item.get('play_addr') or {}
+        url_list = play_addr.get('url_list') or []
+        if url_list:
+            codec = 'bytevc1' if item.get('is_bytevc1') or item.get('is_h265') else 'h264'
+            rates.append(VideoRate(
+                item.get('bit_rate', 0) or 0, tuple(url_list),
+                gear_name=item.get('gear_name', '') or '',
+                width=play_addr.get('width', 0) or 0,
+                height=play_addr.get('height', 0) or 0,
+                data_size=play_addr.get('data_size', 0) or 0,
+                codec=codec,
+            ))
+    rates.sort(key=lambda r: r.bit_rate, reverse=True)
+    return tuple(rates)
+
+
+def build_aweme_record(aweme):
+    """
+    由单个原始 aweme JSON 构建 AwemeRecord。
+
+    图集中每项互斥：
+      - 包含 'video.bit_rate' 字段 -> 实况图（仅保留视频码率候选）
+      - 否则 -> 普通图片（保留 url_list）
+    """
+    aweme_id = aweme.get('aweme_id') or ''
+
+    mix_name = None
+    mix_info = aweme.get('mix_info')
+    if isinstance(mix_info, dict):
+        mix_name = mix_info.get('mix_name') or mix_info.get('mix_name_str') or None
+    if not mix_name:
+        mix_name = aweme.get('mix_name') or aweme.get('mix_name_str') or None
+
+    video_info = aweme.get('video')
+    if not isinstance(video_info, dict):
+        video_info = {}
+
+    video_rates = ()
+    try:
+        video_rates = _extract_rates(video_info.get('bit_rate'))
+    except Exception:
+        pass # 码率列表格式异常
+
+    images, live_images = [], []
+    raw_images = aweme.get('images')
+    if isinstance(raw_images, list):
+        for img in raw_images:
+            if not isinstance(img, dict):
+                continue
+            vinfo = img.get('video')
+            if vinfo and isinstance(vinfo, dict) and 'bit_rate' in vinfo:
+                try:
+                    rates = _extract_rates(vinfo.get('bit_rate'))
+                    if rates:
+                        live_images.append(rates)
+                    continue
+                except Exception:
+                    pass # 码率列表格式异常，按普通图片处理
+            url_list = img.get('url_list')
+            if url_list and isinstance(url_list, list):
+                images.append(ImageItem(tuple(url_list), img.get('width', 0) or 0, img.get('height', 0) or 0))
+
+    statistics = aweme.get('statistics')
+    if not isinstance(statistics, dict):
+        statistics = {}
+    author = aweme.get('author')
+    if not isinstance(author, dict):
+        author = {}
+
+    return AwemeRecord(
+        aweme_id=aweme_id,
+        desc=aweme.get('desc', '') or '',
+        create_time=aweme.get('create_time', 0) or 0,
+        mix_name=mix_name,
+        is_images=bool(raw_images),
+        duration=video_info.get('duration', 0) or 0,
+        digg_count=statistics.get('digg_count', 0),
+        comment_count=statistics.get('comment_count', 0),
+        collect_count=statistics.get('collect_count', 0),
+        share_count=statistics.get('share_count', 0),
+        recommend_count=statistics.get('recommend_count', 0),
+        author_unique_id=author.get('unique_id', '') or '',
+        video_rates=video_rates,
+        images=tuple(images),
+        live_images=tuple(live_images),
+    )
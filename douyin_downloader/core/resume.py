@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+断点续传校验 - .tmp 旁路文件记录来源链接、ETag/Last-Modified 与完整长度，
+续传时用 If-Range 让服务器在文件已变化时返回完整内容，避免把不同文件拼接在一起
+"""
+import json
+import os
+import re
+
+_CONTENT_RANGE_RE = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+
+def meta_path(tmp_path):
+    return tmp_path + '.meta'
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def remove_meta(tmp_path):
+    """下载完成（.tmp 已替换为目标文件）后删除旁路记录"""
+    _remove_quietly(meta_path(tmp_path))
+
+
+def remove_partial(tmp_path):
+    """删除 .tmp 及其旁路记录"""
+    _remove_quietly(tmp_path)
+    _remove_quietly(meta_path(tmp_path))
+
+
+def load_meta(tmp_path):
+    """读取旁路记录；不存在或损坏时返回 None"""
+    try:
+        with open(meta_path(tmp_path), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        return meta if isinstance(meta, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def save_meta(tmp_path, url, headers, length, previous=None):
+    """
+    记录 .tmp 的来源。headers 为本次响应头；续传（206）响应缺少校验头时沿用 previous 中的记录。
+    """
+    previous = previous or {}
+    meta = {
+        'url': url,
+        'etag': headers.get('ETag') or previous.get('etag'),
+        'last_modified': headers.get('Last-Modified') or previous.get('last_modified'),
+        'length': length,
+    }
+    path = meta_path(tmp_path)
+    with open(path + '.part', 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(path + '.part', path)
+
+
+def _if_range(meta):
+    """If-Range 只接受强 ETag 或 HTTP 日期"""
+    etag = meta.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return meta.get('last_modified')
+
+
+def resume_request(tmp_path, url):
+    """
+    为已有的 .tmp 构造续传请求头，返回 (headers, offset, meta)。
+    没有旁路记录、记录与 .tmp 不符，或既无校验信息又不是同一链接时删除 .tmp 从头下载。
+    """
+    try:
+        size = os.path.getsize(tmp_path)
+    except OSError:
+        _remove_quietly(meta_path(tmp_path))
+        return {}, 0, None
+
+    meta = load_meta(tmp_path)
+    length = meta.get('length') if meta else None
+    validator = _if_range(meta) if meta else None
+    if size == 0 or meta is None or (length is not None and size > length) \
+            or (validator is None and meta.get('url') != url):
+        remove_partial(tmp_path)
+        return {}, 0, None
+
+    headers = {'Range': f'bytes={size}-'}
+    if validator:
+        headers['If-Range'] = validator
+    return headers, size, meta
+
+
+def content_range(headers):
+    """解析 206 响应的 Content-Range，返回 (起始偏移, 完整长度或 None)；无法解析时返回 None"""
+    m = _CONTENT_RANGE_RE.match(headers.get('Content-Range', ''))
+    if not m:
+        return None
+    return int(m.group(1)), (None if m.group(3) == '*' else int(m.group(3)))
+
+
+def full_length(headers):
+    """200 响应的文件长度；未知或内容经过压缩编码（磁盘大小与 Content-Length 不同）时返回 None"""
+    if headers.get('Content-Encoding', 'identity').strip().lower() not in ('', 'identity'):
+        return None
+    length = headers.get('Content-Length', '')
+    return int(length) if length.isdigit() else None
+
+
+def check_resume(status, headers, offset, meta):
+    """
+    校验续传响应。返回 (ok, length)：
+      - 416：仅当记录的完整长度等于已下载大小时视为已完成（ok=True, length 为该长度）
+      - 206：起始偏移须等于已下载大小，完整长度须与记录一致
+    ok 为 False 时调用方应删除 .tmp 从头下载。
+    """
+    recorded = meta.get('length') if meta else None
+    if status == 416:
+        return recorded is not None and offset == recorded, recorded
+    parsed = content_range(headers)
+    if parsed is None or parsed[0] != offset:
+        return False, None
+    length = parsed[1] if parsed[1] is not None else recorded
+    if recorded is not None and length != recorded:
+        return False, None
+    return True, length
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+下载重试 - 失败的任务带着“不早于”时间重新进入调度（不在下载线程中等待），记录每轮尝试并限制每次下载的重试总数
+"""
+from douyin_downloader.constants import (
+    MAX_DOWNLOAD_RETRIES, MAX_RETRY_DELAY, RETRY_BUDGET_MIN, RETRY_BUDGET_RATIO
+)
+from douyin_downloader.core.mirrors import host_of
+
+
+class RetryTracker:
+    """
+    一次下载运行的重试记录（线程池与异步引擎共用，由调度所在的线程单独调用，非线程安全）：
+      - 每个任务的尝试历史：第几轮、最后尝试的链接、失败原因
+      - 第 n 轮失败后等待 min(2 ** (n - 1), MAX_RETRY_DELAY) 秒再重试，最多 max_retries 轮
+      - 重试预算：本次重试总数不超过 max(RETRY_BUDGET_MIN, 已提交任务数 * RETRY_BUDGET_RATIO)，
+        用完后失败的任务直接记为失败（可稍后在下载任务日志中“重试失败”），首次因此放弃重试时调用 on_exhausted()
+    """
+
+    def __init__(self, max_retries=MAX_DOWNLOAD_RETRIES, budget_min=RETRY_BUDGET_MIN,
+                 budget_ratio=RETRY_BUDGET_RATIO, on_exhausted=None):
+        self.max_retries = max_retries
+        self.budget_min = budget_min
+        self.budget_ratio = budget_ratio
+        self.on_exhausted = on_exhausted
+        self.submitted = 0
+        self.used = 0
+        self.denied = 0  # 因预算用完而放弃的重试次数
+        self._history = {}  # task -> [(轮次, 链接, 原因)]
+
+    @property
+    def budget(self):
+        return max(self.budget_min, int(self.submitted * self.budget_ratio))
+
+    @property
+    def exhausted(self):
+        return self.used >= self.budget
+
+    def submit(self, count=1):
+        """提交新任务（预算随之增长）"""
+        self.submitted += count
+
+    def attempts(self, task):
+        """任务已失败的轮数（即下一轮的序号，从 0 开始）"""
+        return len(self._history.get(task, ()))
+
+    def failed(self, task, url, reason=''):
+        """
+        记录一轮失败，返回重试前需要等待的秒数；
+        已达到最大轮数或预算用完时返回 None（最终失败）。
+        """
+        history = self._history.setdefault(task, [])
+        history.append((len(history) + 1, url, reason))
+        if len(history) > self.max_retries:
+            return None
+        if self.exhausted:
+            self.denied += 1
+            if self.denied == 1 and self.on_exhausted is not None:
+                self.on_exhausted()
+            return None
+        self.used += 1
+        return min(2 ** (len(history) - 1), MAX_RETRY_DELAY)
+
+    def finish(self, task, ok):
+        """任务结束（成功或最终失败），返回总轮数并清除其历史"""
+        rounds = len(self._history.pop(task, ()))
+        return rounds + 1 if ok else rounds
+
+    def describe(self, task):
+        """尝试历史的简短描述，用于失败日志"""
+        return '；'.join(f"第{n}轮 {host_of(url)}{' ' + reason if reason else ''}"
+                        for n, url, reason in self._history.get(task, ()))
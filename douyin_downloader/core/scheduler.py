@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+下载调度 - 视频与图片/实况图分两个通道限制并发，通道内按预计大小短作业优先；失败重试的任务延迟重新入队
+"""
+import heapq
+import itertools
+import time
+from collections import deque
+
+LANE_VIDEO = 'video'
+LANE_IMAGE = 'image'
+
+# 大小未知时按通道的典型大小排序（下载进度也用它估算剩余字节）
+TYPICAL_SIZE = {LANE_VIDEO: 8 * 1024 * 1024, LANE_IMAGE: 300 * 1024}
+# 同一通道中最早等待的任务被后来的小任务越过的次数上限（防止大文件一直等待）
+_MAX_BYPASS = 64
+
+
+def lane_of(task):
+    return LANE_IMAGE if task.is_image else LANE_VIDEO
+
+
+class _Lane:
+    __slots__ = ('heap', 'fifo', 'running', 'limit', 'dispatched')
+
+    def __init__(self, limit):
+        self.heap = []        # (预计大小, 序号, 条目)
+        self.fifo = deque()   # (序号, 入队时的 dispatched)，按到达顺序，用于防饿死
+        self.running = 0
+        self.limit = limit
+        self.dispatched = 0
+
+
+class LaneScheduler:
+    """
+    两个通道：视频最多同时运行 video_limit 个，总并发不超过 total_limit。
+      - 有空位时优先派发视频（未达到 video_limit 时），保证大文件不会被大量图片挤到最后；
+        视频达到上限后的空位全部给图片，少量大视频不会占满全部线程
+      - 任务来源已结束（close）且没有等待的图片时，视频可以使用全部空位
+      - 通道内按 size_hint 从小到大派发，尽快完成更多文件；
+        最早等待的任务被越过 _MAX_BYPASS 次后优先派发
+    失败的条目由 defer() 放入延迟队列，到时间后重新进入其通道（不占用并发）。
+    条目为 (task, is_image)；非线程安全，由下载线程单独使用。
+    """
+
+    def __init__(self, total_limit, video_limit):
+        self._lanes = {LANE_VIDEO: _Lane(1), LANE_IMAGE: _Lane(1)}
+        self.set_limits(total_limit, video_limit)
+        self._seq = itertools.count()
+        self._taken = set()
+        self._delayed = []  # (不早于的时间, 序号, 条目)
+        self.waiting = 0
+        self.closed = False
+
+    def set_limits(self, total_limit, video_limit):
+        """修改并发上限（自动并发）；降低时已运行的任务不受影响，结束后不再补足"""
+        self.total_limit = max(1, total_limit)
+        self._lanes[LANE_VIDEO].limit = max(1, min(video_limit, self.total_limit))
+        self._lanes[LANE_IMAGE].limit = self.total_limit
+
+    @property
+    def running(self):
+        return sum(lane.running for lane in self._lanes.values())
+
+    def push(self, item):
+        name = lane_of(item[0])
+        lane = self._lanes[name]
+        seq = next(self._seq)
+        size = item[0].size_hint or TYPICAL_SIZE[name]
+        heapq.heappush(lane.heap, (size, seq, item))
+        lane.fifo.append((seq, lane.dispatched))
+        self.waiting += 1
+
+    def _pop(self, lane):
+        while lane.fifo and lane.fifo[0][0] in self._taken:
+            self._taken.discard(lane.fifo.popleft()[0])
+        if lane.fifo and lane.dispatched - lane.fifo[0][1] >= _MAX_BYPASS:
+            seq = lane.fifo.popleft()[0]
+            idx = next(i for i, entry in enumerate(lane.heap) if entry[1] == seq)
+            entry = lane.heap[idx]
+            lane.heap[idx] = lane.heap[-1]
+            lane.heap.pop()
+            heapq.heapify(lane.heap)
+        else:
+            entry = heapq.heappop(lane.heap)
+            self._taken.add(entry[1])
+        lane.dispatched += 1
+        lane.running += 1
+        self.waiting -= 1
+        return entry[2]
+
+    def defer(self, item, delay, now=None):
+        """条目在 delay 秒后重新进入调度（失败重试）"""
+        now = time.monotonic() if now is None else now
+        heapq.heappush(self._delayed, (now + delay, next(self._seq), item))
+
+    def next_due(self, now=None):
+        """距离最早的延迟条目到期还有多少秒；没有延迟条目时返回 None"""
+        if not self._delayed:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._delayed[0][0] - now)
+
+    def _promote(self, now):
+        while self._delayed and self._delayed[0][0] <= now:
+            self.push(heapq.heappop(self._delayed)[2])
+
+    def close(self):
+        """任务来源已结束，之后不会再有新任务"""
+        self.closed = True
+
+    def next_ready(self):
+        """返回下一个可以开始的条目；没有空位或没有等待的任务时返回 None"""
+        if self._delayed:
+            self._promote(time.monotonic())
+        if self.running >= self.total_limit:
+            return None
+        video, image = self._lanes[LANE_VIDEO], self._lanes[LANE_IMAGE]
+        if video.heap and (video.running < video.limit or (self.closed and not image.heap)):
+            return self._pop(video)
+        if image.heap:
+            return self._pop(image)
+        return None
+
+    def release(self, item):
+        """条目运行结束，释放其通道的空位"""
+        self._lanes[lane_of(item[0])].running -= 1
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分段下载 - 大文件按 Range 分成多段并行下载到预分配的 .tmp，分段进度保存在旁路文件中以便续传
+"""
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from douyin_downloader.constants import DOWNLOAD_TIMEOUT
+from douyin_downloader.core.bandwidth import bandwidth_limiter, WaitMeter
+from douyin_downloader.core.concurrency import transfer_stats, is_overload_status
+from douyin_downloader.core.progress import download_progress
+from douyin_downloader.core.timeouts import host_timeouts, stall_watchdog, abort_response, inflight_responses
+from douyin_downloader.utils.file_utils import allocate_file
+
+_CONTENT_RANGE_RE = re.compile(r'bytes\s+0-0/(\d+)')
+_SEGMENT_CHUNK_SIZE = 256 * 1024
+# 分段进度写入旁路文件的最小间隔（秒）
+_SIDECAR_INTERVAL = 1.0
+# 单个分段失败后重新连接续传的次数
+_SEGMENT_RETRIES = 2
+
+
+def sidecar_path(tmp_path):
+    return tmp_path + '.seg'
+
+
+def probe_length(s, url):
+    """
+    用 Range: bytes=0-0 探测文件大小与断点续传支持。
+    返回 (total, ttfb, validator)；服务器不支持 Range 或出错时 total 为 None。
+    validator 为可用于 If-Range 的强 ETag 或 Last-Modified，没有时为 None。
+    """
+    started = time.monotonic()
+    timeout = host_timeouts.timeout_for(url, DOWNLOAD_TIMEOUT)
+    try:
+        with s.get(url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=timeout) as r:
+            ttfb = time.monotonic() - started
+            host_timeouts.observe(url, ttfb)
+            if r.status_code != 206:
+                return None, ttfb, None
+            m = _CONTENT_RANGE_RE.match(r.headers.get('Content-Range', ''))
+            etag = r.headers.get('ETag')
+            validator = etag if etag and not etag.startswith('W/') else r.headers.get('Last-Modified')
+            return (int(m.group(1)) if m else None), ttfb, validator
+    except requests.Timeout:
+        host_timeouts.observe_timeout(url, timeout)
+    except Exception:
+        pass
+    return None, time.monotonic() - started, None
+
+
+class _Segment:
+    __slots__ = ('start', 'end', 'done')
+
+    def __init__(self, start, end, done=0):
+        self.start = start
+        self.end = end  # 含
+        self.done = done
+
+    @property
+    def remaining(self):
+        return self.end - self.start + 1 - self.done
+
+
+def _plan_segments(total, count):
+    size = -(-total // count)
+    return [_Segment(start, min(total, start + size) - 1) for start in range(0, total, size)]
+
+
+def _load_sidecar(path, total, validator):
+    """读取分段进度；大小或校验信息（ETag/Last-Modified）不一致、文件损坏时返回 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('total') != total or data.get('validator') != validator:
+            return None
+        return [_Segment(int(start), int(end), int(done)) for start, end, done in data['segments']]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+class SegmentedDownload:
+    """
+    一个文件的分段下载。
+      - .tmp 预分配为完整大小（posix_fallocate），各段用独立文件句柄写入自己的区间
+      - .tmp.seg 记录 total、validator 与每段 [start, end, done]，写入数据后再更新（原子替换），中断后按 done 续传
+      - 有 validator 时各段请求带 If-Range，文件已变化时服务器返回 200，该段失败，下次从头规划
+    """
+
+    def __init__(self, s, url, tmp_path, total, count, worker=None, min_speed=0, validator=None, task=None):
+        self.s = s
+        self.url = url
+        self.tmp_path = tmp_path
+        self.total = total
+        self.count = count
+        self.worker = worker
+        self.min_speed = min_speed
+        self.validator = validator
+        self.task = task  # 字节进度计入的任务
+        self.received = 0
+        self.stopped = False
+        self._failed = False
+        self._lock = threading.Lock()
+        self._last_saved = 0.0
+        self.segments = None
+
+    def _prepare(self):
+        sidecar = sidecar_path(self.tmp_path)
+        segments = None
+        if os.path.exists(self.tmp_path) and os.path.getsize(self.tmp_path) == self.total:
+            segments = _load_sidecar(sidecar, self.total, self.validator)
+        if segments is None:
+            segments = _plan_segments(self.total, self.count)
+            with open(self.tmp_path, 'wb') as f:
+                allocate_file(f, self.total)
+        self.segments = segments
+        self._save_sidecar(force=True)
+
+    def _save_sidecar(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_saved < _SIDECAR_INTERVAL:
+                return
+            self._last_saved = now
+            data = {'total': self.total, 'validator': self.validator,
+                    'segments': [[g.start, g.end, g.done] for g in self.segments]}
+            path = sidecar_path(self.tmp_path)
+            with open(path + '.part', 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(path + '.part', path)
+
+    def _should_stop(self):
+        return self._failed or (self.worker is not None and self.worker.should_interrupt_download())
+
+    def _fetch_segment(self, seg):
+        """下载一段的剩余部分；成功返回 True"""
+        offset = seg.start + seg.done
+        headers = {'Range': f'bytes={offset}-{seg.end}'}
+        if self.validator:
+            headers['If-Range'] = self.validator
+        timeout = host_timeouts.timeout_for(self.url, DOWNLOAD_TIMEOUT)
+        stalled = []
+        throttled = WaitMeter()
+        watch = None
+        try:
+            with self.s.get(self.url, headers=headers, stream=True, timeout=timeout) as r, \
+                    inflight_responses.track(r):
+                if r.status_code != 206:
+                    if is_overload_status(r.status_code):
+                        transfer_stats.add_overload()
+                    return False
+                watch = stall_watchdog.watch(lambda: seg.done, lambda: (stalled.append(1), abort_response(r)),
+                                             self.min_speed, throttled)
+                # 无缓冲写入：done 更新前数据已交给操作系统，进程中断后旁路记录不会超前于文件内容
+                with open(self.tmp_path, 'r+b', buffering=0) as f:
+                    f.seek(offset)
+                    for chunk in r.iter_content(_SEGMENT_CHUNK_SIZE):
+                        if self._should_stop():
+                            self.stopped = not self._failed
+                            return False
+                        if not chunk:
+                            continue
+                        chunk = chunk[:seg.remaining]
+                        f.write(chunk)
+                        seg.done += len(chunk)
+                        with self._lock:
+                            self.received += len(chunk)
+                        transfer_stats.add_bytes(len(chunk))
+                        download_progress.add_bytes(self.task, len(chunk))
+                        self._save_sidecar()
+                        if seg.remaining <= 0:
+                            break
+                        bandwidth_limiter.throttle(self.url, len(chunk), lambda: bool(stalled) or self._should_stop(),
+                                                   throttled)
+            return seg.remaining <= 0 and not stalled
+        except requests.Timeout:
+            host_timeouts.observe_timeout(self.url, timeout)
+            return False
+        except Exception:
+            return False
+        finally:
+            stall_watchdog.unwatch(watch)
+
+    def _run_segment(self, seg):
+        for _ in range(_SEGMENT_RETRIES + 1):
+            if seg.remaining <= 0:
+                return True
+            if self._fetch_segment(seg):
+                return True
+            if self._should_stop():
+                self.stopped = self.stopped or not self._failed
+                return False
+        self._failed = True  # 一段失败则整体失败，其他段尽快停止（进度已保存，下次续传）
+        return False
+
+    def run(self):
+        """下载全部分段；成功返回 True（此时删除旁路文件），否则保留 .tmp 与旁路文件以便续传"""
+        self._prepare()
+        download_progress.begin(self.task, sum(g.done for g in self.segments), self.total)
+        pending = [g for g in self.segments if g.remaining > 0]
+        if pending:
+            with ThreadPoolExecutor(max_workers=len(pending)) as ex:
+                results = list(ex.map(self._run_segment, pending))
+            self._save_sidecar(force=True)
+            if not all(results):
+                return False
+        try:
+            os.remove(sidecar_path(self.tmp_path))
+        except OSError:
+            pass
+        return True
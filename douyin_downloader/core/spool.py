@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+原始分页数据磁盘暂存（压缩 JSONL）- 超大账号获取时保持内存占用平稳
+"""
+import os
+import gzip
+import json
+import threading
+from array import array
+
+from douyin_downloader.constants import ZSTD_AVAILABLE, SPOOL_DIR
+from douyin_downloader.core.record import build_aweme_record
+from douyin_downloader.utils.file_utils import safe_mkdir, sanitize_filename
+
+if ZSTD_AVAILABLE:
+    import zstandard
+else:
+    zstandard = None
+
+
+class PageSpool:
+    """
+    每页原始 aweme 列表压缩为一个独立的 gzip member / zstd frame，追加写入单个文件。
+    内存中只保留每页的结束偏移、作品数与视频作品数（array），读取时按页解压并流式构建 AwemeRecord。
+
+    可直接作为作品记录的可迭代对象使用（len() / 迭代 / 真值判断）。
+    分页索引逐页追加到 <path>.idx（每行：结束偏移 作品数 视频作品数），断点续取时据此恢复前 resume_pages 页。
+    close() 之后不再追加（被新的获取取代的旧获取线程不会写入同一文件），已写入的页仍可读取。
+    """
+
+    def __init__(self, path, resume_pages=None):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.use_zstd = path.endswith('.zst')
+        self._ends = array('Q')
+        self._counts = array('I')
+        self._videos = array('I')
+        self._count = 0
+        self._video_count = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        if resume_pages is None:
+            # 新的获取：清空旧文件
+            for p in (self.path, self.index_path):
+                with open(p, 'wb'):
+                    pass
+        else:
+            self._load_index(resume_pages)
+
+    @classmethod
+    def for_user(cls, sec_user_id, mode, folder=SPOOL_DIR, resume_pages=None):
+        """为指定用户与模式创建暂存文件（zstandard 可用时使用 zstd，否则 gzip）"""
+        safe_mkdir(folder)
+        ext = '.jsonl.zst' if ZSTD_AVAILABLE else '.jsonl.gz'
+        filename = sanitize_filename(f"{sec_user_id}-{mode}", max_length=150) + ext
+        return cls(os.path.join(folder, filename), resume_pages)
+
+    def _load_index(self, pages):
+        """恢复前 pages 页的索引，并截掉之后（未被断点确认）的数据"""
+        rows = []
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if len(rows) == pages:
+                    break
+                try:
+                    end, count, videos = (int(v) for v in line.split())
+                except ValueError:
+                    break  # 写入中断的最后一行
+                rows.append((end, count, videos))
+        if len(rows) < pages:
+            raise ValueError(f'暂存文件只有 {len(rows)} 页，少于断点的 {pages} 页')
+        for end, count, videos in rows:
+            self._ends.append(end)
+            self._counts.append(count)
+            self._videos.append(videos)
+        self._count = sum(self._counts)
+        self._video_count = sum(self._videos)
+        with open(self.path, 'r+b') as f:
+            f.truncate(self._ends[-1] if pages else 0)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(f'{end} {count} {videos}\n' for end, count, videos in rows)
+        os.replace(tmp_path, self.index_path)
+
+    def _compress(self, data):
+        if self.use_zstd:
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def _decompress(self, data):
+        if self.use_zstd:
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def append_page(self, aweme_list, videos=0):
+        """追加一页原始 aweme 列表（videos 为其中的视频作品数）；已 close() 时不写入并返回 False"""
+        lines = [json.dumps(a, ensure_ascii=False, separators=(',', ':')) for a in aweme_list]
+        blob = self._compress('\n'.join(lines).encode('utf-8'))
+        with self._lock:
+            if self._closed:
+                return False
+            with open(self.path, 'ab') as f:
+                f.write(blob)
+                end = f.tell()
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(f'{end} {len(lines)} {videos}\n')
+            self._ends.append(end)
+            self._counts.append(len(lines))
+            self._videos.append(videos)
+            self._count += len(lines)
+            self._video_count += videos
+        return True
+
+    def close(self):
+        """停止追加（等待进行中的写入完成）"""
+        with self._lock:
+            self._closed = True
+
+    @property
+    def page_count(self):
+        return len(self._ends)
+
+    @property
+    def video_count(self):
+        return self._video_count
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def iter_raw_pages(self):
+        """按页流式读取原始 aweme 列表（只读取调用时已写入的页）"""
+        with self._lock:
+            ends = self._ends[:]
+        start = 0
+        with open(self.path, 'rb') as f:
+            for end in ends:
+                f.seek(start)
+                blob = f.read(end - start)
+                start = end
+                text = self._decompress(blob).decode('utf-8')
+                yield [json.loads(line) for line in text.split('\n') if line]
+
+    def iter_record_pages(self):
+        """按页流式读取 AwemeRecord 列表"""
+        for page in self.iter_raw_pages():
+            yield [build_aweme_record(aweme) for aweme in page]
+
+    def iter_records(self):
+        """流式读取 AwemeRecord"""
+        for page in self.iter_record_pages():
+            yield from page
+
+    def __iter__(self):
+        return self.iter_records()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+本地作品元数据库（SQLite）- 逐页写入，支持按用户快速重新打开与流式导出
+"""
+import sqlite3
+import threading
+import time
+
+from douyin_downloader.constants import METADATA_DB_FILE
+from douyin_downloader.core.record import AwemeRecord, ImageItem, VideoRate
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    sec_user_id TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    nickname TEXT,
+    unique_id TEXT,
+    updated_at INTEGER,
+    PRIMARY KEY (sec_user_id, mode)
+);
+CREATE TABLE IF NOT EXISTS awemes (
+    aweme_id TEXT PRIMARY KEY,
+    create_time INTEGER,
+    "desc" TEXT,
+    mix_name TEXT,
+    is_images INTEGER,
+    duration INTEGER,
+    digg_count INTEGER,
+    comment_count INTEGER,
+    collect_count INTEGER,
+    share_count INTEGER,
+    recommend_count INTEGER,
+    author_unique_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_awemes_create_time ON awemes (create_time);
+CREATE TABLE IF NOT EXISTS user_awemes (
+    sec_user_id TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    aweme_id TEXT NOT NULL,
+    seq INTEGER,
+    PRIMARY KEY (sec_user_id, mode, aweme_id)
+);
+CREATE INDEX IF NOT EXISTS idx_user_awemes_seq ON user_awemes (sec_user_id, mode, seq);
+CREATE TABLE IF NOT EXISTS media (
+    aweme_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    item_idx INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    bit_rate INTEGER,
+    urls TEXT,
+    gear_name TEXT,
+    width INTEGER,
+    height INTEGER,
+    data_size INTEGER,
+    codec TEXT,
+    PRIMARY KEY (aweme_id, kind, item_idx, rank)
+);
+CREATE TABLE IF NOT EXISTS fetch_checkpoints (
+    sec_user_id TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    max_cursor INTEGER,
+    page INTEGER,
+    received INTEGER,
+    updated_at INTEGER,
+    PRIMARY KEY (sec_user_id, mode)
+);
+"""
+
+_AWEME_COLUMNS = (
+    'aweme_id', 'create_time', 'desc', 'mix_name', 'is_images', 'duration',
+    'digg_count', 'comment_count', 'collect_count', 'share_count', 'recommend_count',
+    'author_unique_id',
+)
+_AWEME_INSERT_SQL = 'INSERT OR REPLACE INTO awemes ({}) VALUES ({})'.format(
+    ', '.join('"%s"' % c for c in _AWEME_COLUMNS), ', '.join('?' * len(_AWEME_COLUMNS))
+)
+_AWEME_SELECT_COLUMNS = ', '.join('a."%s"' % c for c in _AWEME_COLUMNS)
+
+_MEDIA_COLUMNS = (
+    'aweme_id', 'kind', 'item_idx', 'rank', 'bit_rate', 'urls',
+    'gear_name', 'width', 'height', 'data_size', 'codec',
+)
+_MEDIA_SELECT_COLUMNS = ', '.join(_MEDIA_COLUMNS)
+_MEDIA_INSERT_SQL = 'INSERT INTO media ({}) VALUES ({})'.format(
+    ', '.join(_MEDIA_COLUMNS), ', '.join('?' * len(_MEDIA_COLUMNS))
+)
+
+
+class MetadataStore:
+    """
+    作品元数据库。
+      - awemes:      每个作品一行，以 aweme_id 为主键，按 create_time 建索引
+      - user_awemes: 用户(主页/点赞)列表 -> 作品，按 sec_user_id 建索引并保留获取顺序
+      - media:       候选媒体链接（子表）
+      - fetch_checkpoints: 未完成获取的断点（下一页游标/页码/已接收数）
+    每个线程使用独立连接，WAL 模式下导出读取不阻塞获取写入。
+    """
+
+    def __init__(self, path=METADATA_DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _conn(self):
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def begin_list(self, sec_user_id, mode, nickname='', unique_id='', resume=False):
+        """
+        开始获取：记录用户信息。
+        新的完整获取会清空该用户列表与断点（作品行保留）；断点续取时保留已接收的列表。
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO users (sec_user_id, mode, nickname, unique_id, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (sec_user_id, mode, nickname, unique_id, int(time.time()))
+            )
+            if not resume:
+                conn.execute('DELETE FROM user_awemes WHERE sec_user_id = ? AND mode = ?', (sec_user_id, mode))
+                conn.execute('DELETE FROM fetch_checkpoints WHERE sec_user_id = ? AND mode = ?', (sec_user_id, mode))
+
+    def save_records(self, sec_user_id, mode, records, checkpoint=None):
+        """
+        写入一页作品记录（单个事务）。
+        checkpoint 为 (max_cursor, page, received) 时与本页数据一并写入，保证断点与数据一致。
+        """
+        conn = self._conn()
+        with conn:
+            row = conn.execute(
+                'SELECT COALESCE(MAX(seq), 0) FROM user_awemes WHERE sec_user_id = ? AND mode = ?',
+                (sec_user_id, mode)
+            ).fetchone()
+            seq = row[0] if row else 0
+            for rec in records:
+                seq += 1
+                conn.execute(
+                    _AWEME_INSERT_SQL,
+                    (rec.aweme_id, rec.create_time, rec.desc, rec.mix_name, int(bool(rec.is_images)),
+                     rec.duration, rec.digg_count, rec.comment_count, rec.collect_count,
+                     rec.share_count, rec.recommend_count, rec.author_unique_id)
+                )
+                conn.execute(
+                    'INSERT OR REPLACE INTO user_awemes (sec_user_id, mode, aweme_id, seq) VALUES (?, ?, ?, ?)',
+                    (sec_user_id, mode, rec.aweme_id, seq)
+                )
+                conn.execute('DELETE FROM media WHERE aweme_id = ?', (rec.aweme_id,))
+                conn.executemany(_MEDIA_INSERT_SQL, _media_rows(rec))
+            if checkpoint is not None:
+                max_cursor, page, received = checkpoint
+                conn.execute(
+                    'INSERT OR REPLACE INTO fetch_checkpoints '
+                    '(sec_user_id, mode, max_cursor, page, received, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                    (sec_user_id, mode, max_cursor, page, received, int(time.time()))
+                )
+
+    def get_checkpoint(self, sec_user_id, mode):
+        """返回未完成获取的断点 {'max_cursor', 'page', 'received', 'updated_at'}，没有时返回 None"""
+        row = self._conn().execute(
+            'SELECT max_cursor, page, received, updated_at FROM fetch_checkpoints '
+            'WHERE sec_user_id = ? AND mode = ?',
+            (sec_user_id, mode)
+        ).fetchone()
+        if not row:
+            return None
+        return {'max_cursor': row[0] or 0, 'page': row[1] or 1, 'received': row[2] or 0, 'updated_at': row[3] or 0}
+
+    def clear_checkpoint(self, sec_user_id, mode):
+        """获取完整结束后删除断点"""
+        conn = self._conn()
+        with conn:
+            conn.execute('DELETE FROM fetch_checkpoints WHERE sec_user_id = ? AND mode = ?', (sec_user_id, mode))
+
+    def get_user(self, sec_user_id, mode):
+        """返回 {'nickname', 'unique_id', 'updated_at', 'count'}，不存在时返回 None"""
+        conn = self._conn()
+        row = conn.execute(
+            'SELECT nickname, unique_id, updated_at FROM users WHERE sec_user_id = ? AND mode = ?',
+            (sec_user_id, mode)
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            'nickname': row[0] or '',
+            'unique_id': row[1] or '',
+            'updated_at': row[2] or 0,
+            'count': self.count_records(sec_user_id, mode),
+        }
+
+    def count_records(self, sec_user_id, mode):
+        """统计该用户列表中的作品数"""
+        row = self._conn().execute(
+            'SELECT COUNT(*) FROM user_awemes WHERE sec_user_id = ? AND mode = ?',
+            (sec_user_id, mode)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def iter_records(self, sec_user_id, mode, batch_size=500):
+        """按获取顺序流式读取该用户的 AwemeRecord（分批查询，不一次性载入）"""
+        for batch in self.iter_record_batches(sec_user_id, mode, batch_size):
+            yield from batch
+
+    def iter_record_batches(self, sec_user_id, mode, batch_size=500):
+        """按获取顺序分批读取 AwemeRecord 列表"""
+        conn = self._conn()
+        last_seq = 0
+        while True:
+            rows = conn.execute(
+                f'SELECT u.seq, {_AWEME_SELECT_COLUMNS} FROM user_awemes u JOIN awemes a ON a.aweme_id = u.aweme_id '
+                f'WHERE u.sec_user_id = ? AND u.mode = ? AND u.seq > ? ORDER BY u.seq LIMIT ?',
+                (sec_user_id, mode, last_seq, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            last_seq = rows[-1][0]
+            ids = [r[1] for r in rows]
+            media = self._load_media(conn, ids)
+            yield [_record_from_row(r[1:], media.get(r[1], ())) for r in rows]
+
+    @staticmethod
+    def _load_media(conn, aweme_ids):
+        """批量读取媒体候选，返回 {aweme_id: [(kind, item_idx, rank, bit_rate, urls, gear_name, ...), ...]}"""
+        out = {}
+        placeholders = ', '.join('?' * len(aweme_ids))
+        for row in conn.execute(
+            f'SELECT {_MEDIA_SELECT_COLUMNS} FROM media '
+            f'WHERE aweme_id IN ({placeholders}) ORDER BY aweme_id, kind, item_idx, rank',
+            aweme_ids
+        ):
+            out.setdefault(row[0], []).append(row[1:])
+        return out
+
+
+def _rate_row(aweme_id, kind, idx, rank, rate):
+    """码率候选 -> media 表行"""
+    return (aweme_id, kind, idx, rank, rate.bit_rate, '\n'.join(rate.urls),
+            rate.gear_name, rate.width, rate.height, rate.data_size, rate.codec)
+
+
+def _media_rows(rec):
+    """将 AwemeRecord 的候选媒体展开为 media 表行"""
+    rows = []
+    for rank, rate in enumerate(rec.video_rates):
+        rows.append(_rate_row(rec.aweme_id, 'video', 0, rank, rate))
+    for idx, image in enumerate(rec.images):
+        rows.append((rec.aweme_id, 'image', idx, 0, 0, '\n'.join(image.urls), '', image.width, image.height, 0, ''))
+    for idx, rates in enumerate(rec.live_images):
+        for rank, rate in enumerate(rates):
+            rows.append(_rate_row(rec.aweme_id, 'live', idx, rank, rate))
+    return rows
+
+
+def _record_from_row(row, media_rows):
+    """由 awemes 行与 media 行还原 AwemeRecord"""
+    values = dict(zip(_AWEME_COLUMNS, row))
+    values['is_images'] = bool(values['is_images'])
+    values['desc'] = values['desc'] or ''
+    values['author_unique_id'] = values['author_unique_id'] or ''
+    for key in ('create_time', 'duration', 'digg_count', 'comment_count', 'collect_count',
+                'share_count', 'recommend_count'):
+        values[key] = values[key] or 0
+
+    video_rates, images, live = [], [], {}
+    for kind, item_idx, _rank, bit_rate, urls, gear_name, width, height, data_size, codec in media_rows:
+        url_tuple = tuple(urls.split('\n')) if urls else ()
+        if kind == 'image':
+            images.append(ImageItem(url_tuple, width or 0, height or 0))
+            continue
+        rate = VideoRate(bit_rate or 0, url_tuple, gear_name or '', width or 0, height or 0,
+                         data_size or 0, codec or '')
+        if kind == 'video':
+            video_rates.append(rate)
+        elif kind == 'live':
+            live.setdefault(item_idx, []).append(rate)
+
+    return AwemeRecord(
+        video_rates=tuple(video_rates),
+        images=tuple(images),
+        live_images=tuple(tuple(live[k]) for k in sorted(live)),
+        **values
+    )
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+下载任务 - 紧凑的 __slots__ 任务对象与媒体类型枚举
+"""
+import hashlib
+from enum import Enum
+
+from douyin_downloader.utils.file_utils import get_extension_from_url
+
+
+class TaskKind(Enum):
+    """下载任务的媒体类型"""
+    VIDEO = 'video'
+    IMAGE = 'image'
+    LIVE = 'live'
+
+    @property
+    def label(self):
+        """列表中显示的类型名称"""
+        return _KIND_LABELS[self]
+
+
+_KIND_LABELS = {TaskKind.VIDEO: '视频', TaskKind.IMAGE: '图片', TaskKind.LIVE: '实况'}
+_DEFAULT_EXT = {TaskKind.VIDEO: '.mp4', TaskKind.IMAGE: '.jpg', TaskKind.LIVE: '.mp4'}
+
+
+class DownloadTask:
+    """
+    单个下载任务。
+      - desc:         文件名主体（图片/实况图带 _p{n} / _live{n} 后缀）
+      - rate_urls:    候选码率（按画质策略排序），每个码率为其全部 CDN 镜像链接的元组；
+                      下载失败时先切换镜像，再降级到下一个码率
+      - size_hint:    预计文件大小（字节，0 表示未知），用于下载调度的短作业优先
+      - index:        作品内的序号（图片/实况图从 1 开始，视频为 0），与 aweme_id 组成 media_key
+      - rel_path:     下载前由 FilenamePlanner 分配的相对路径（None 表示下载时再确定文件名）
+      - ext / url_hash 首次访问时才由 url 计算并缓存
+    """
+    __slots__ = (
+        'url', 'desc', 'kind', 'date', 'mix_name', 'aweme_id', 'rate_urls',
+        'include_date_in_filename', 'size_hint', 'index', 'rel_path', '_ext', '_url_hash',
+    )
+
+    def __init__(self, url, desc, kind, date='', mix_name=None, aweme_id='', rate_urls=(),
+                 include_date_in_filename=True, size_hint=0, index=0):
+        self.url = url
+        self.desc = desc
+        self.kind = kind
+        self.date = date
+        self.mix_name = mix_name
+        self.aweme_id = aweme_id
+        self.rate_urls = rate_urls or ((url,),)
+        self.include_date_in_filename = include_date_in_filename
+        self.size_hint = size_hint
+        self.index = index
+        self.rel_path = None
+        self._ext = None
+        self._url_hash = None
+
+    @property
+    def is_image(self):
+        """图片与实况图都保存到 images 文件夹"""
+        return self.kind is not TaskKind.VIDEO
+
+    @property
+    def media_key(self):
+        """
+        作品内媒体的稳定标识（与描述、文件名无关），用于已下载清单与文件名规划；
+        没有 aweme_id 时退回 url:<url_hash>（同一任务列表继续/重试时仍能识别带后缀的文件名）
+        """
+        if not self.aweme_id:
+            return f"url:{self.url_hash}"
+        return f"{self.aweme_id}:{self.kind.value}{self.index}"
+
+    @property
+    def ext(self):
+        if self._ext is None:
+            self._ext = get_extension_from_url(self.url, _DEFAULT_EXT[self.kind])
+        return self._ext
+
+    @property
+    def url_hash(self):
+        if self._url_hash is None:
+            self._url_hash = hashlib.md5(self.url.encode('utf-8')).hexdigest()[:8]
+        return self._url_hash
+
+    def replace(self, **changes):
+        """复制任务并修改指定字段（不改动列表中保存的原任务）；修改 url 时重新计算 ext / url_hash"""
+        new = DownloadTask.__new__(DownloadTask)
+        for name in DownloadTask.__slots__:
+            setattr(new, name, getattr(self, name))
+        for name, value in changes.items():
+            setattr(new, name, value)
+        if 'url' in changes:
+            new._ext = None
+            new._url_hash = None
+        return new
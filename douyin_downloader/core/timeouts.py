@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+超时与低速检测 - 按主机 RTT 分位数计算连接/读取超时，低速传输看门狗，暂停/停止时中止进行中的连接
+"""
+import itertools
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from douyin_downloader.constants import STALL_WINDOW
+from douyin_downloader.core.hedge import percentile
+from douyin_downloader.core.mirrors import host_of
+
+# 超时 = RTT 的 pct 分位数 x 系数，并限制在 [下限, 默认超时] 内
+_CONNECT_FACTOR = 3.0
+_READ_FACTOR = 4.0
+_MIN_CONNECT_TIMEOUT = 2.0
+_MIN_READ_TIMEOUT = 5.0
+
+
+class HostTimeouts:
+    """
+    按主机记录最近的 RTT（发出请求到收到响应头的耗时），为请求计算 (connect, read) 超时（线程安全）。
+    样本不足时使用调用方给出的默认超时；超时失败会记为一个等于所用超时的样本，使后续超时放宽。
+    """
+
+    def __init__(self, pct=95, window=100, min_samples=10):
+        self.pct = pct
+        self.window = window
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._rtts = {}
+
+    def observe(self, url, rtt):
+        host = host_of(url)
+        with self._lock:
+            samples = self._rtts.get(host)
+            if samples is None:
+                samples = self._rtts[host] = deque(maxlen=self.window)
+            samples.append(max(0.0, rtt))
+
+    def observe_timeout(self, url, timeout):
+        """请求超时：timeout 为 (connect, read) 或秒数"""
+        if isinstance(timeout, tuple):
+            timeout = max(timeout)
+        self.observe(url, timeout)
+
+    def timeout_for(self, url, default):
+        """返回 requests 使用的 (connect, read) 超时，均不超过 default"""
+        with self._lock:
+            samples = self._rtts.get(host_of(url))
+            if samples is None or len(samples) < self.min_samples:
+                return (default, default)
+            rtt = percentile(samples, self.pct)
+        connect = min(default, max(_MIN_CONNECT_TIMEOUT, rtt * _CONNECT_FACTOR))
+        read = min(default, max(_MIN_READ_TIMEOUT, rtt * _READ_FACTOR))
+        return (connect, read)
+
+
+host_timeouts = HostTimeouts()
+
+
+def abort_response(response):
+    """
+    从其他线程中止流式响应：关闭底层 socket，使阻塞中的读取立即出错返回
+    （读取超时只在完全没有数据时触发，无法中止持续少量发送数据的连接）。
+    """
+    # urllib3 HTTPResponse.connection 为承载该响应的连接（读完或释放后为 None），sock 为其 socket；
+    # 只关闭 socket 不会唤醒阻塞中的读取，需要 shutdown
+    connection = getattr(getattr(response, 'raw', None), 'connection', None)
+    sock = getattr(connection, 'sock', None)
+    try:
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+        else:
+            response.close()
+    except OSError:
+        pass
+
+
+class _Watch:
+    __slots__ = ('progress', 'abort', 'min_speed', 'idle', 'samples')
+
+    def __init__(self, progress, abort, min_speed, idle):
+        self.progress = progress
+        self.abort = abort
+        self.min_speed = min_speed
+        self.idle = idle
+        self.samples = deque()
+
+    def sample(self, now):
+        return now, self.progress(), self.idle() if self.idle is not None else 0.0
+
+
+class StallWatchdog:
+    """
+    低速看门狗：后台线程每 interval 秒采样登记中传输的已接收字节数，
+    最近 window 秒的平均速度低于 min_speed（字节/秒）时调用 abort 中止该传输。
+    主动限速等待的时间（idle）不计入：窗口内大部分时间在限速等待的传输不算低速。
+    没有登记的传输时后台线程退出，下次登记时再启动。
+    """
+
+    def __init__(self, window=STALL_WINDOW, interval=0.5):
+        self.window = window
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._watches = {}
+        self._handles = itertools.count(1)
+        self._thread = None
+
+    def watch(self, progress, abort, min_speed, idle=None):
+        """
+        登记一个传输：progress() 返回已接收字节数，abort() 中止传输，idle() 返回累计限速等待秒数。
+        返回用于 unwatch 的句柄；min_speed <= 0 时不登记，返回 None。
+        """
+        if min_speed <= 0:
+            return None
+        watch = _Watch(progress, abort, min_speed, idle)
+        watch.samples.append(watch.sample(time.monotonic()))
+        with self._lock:
+            handle = next(self._handles)
+            self._watches[handle] = watch
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return handle
+
+    def unwatch(self, handle):
+        if handle is None:
+            return
+        with self._lock:
+            self._watches.pop(handle, None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._watches:
+                    self._thread = None
+                    return
+                watches = list(self._watches.items())
+
+            now = time.monotonic()
+            for handle, watch in watches:
+                _, received, idle = sample = watch.sample(now)
+                samples = watch.samples
+                samples.append(sample)
+                while len(samples) > 2 and now - samples[1][0] >= self.window:
+                    samples.popleft()
+                start, start_received, start_idle = samples[0]
+                if now - start < self.window:
+                    continue
+                active = now - start - (idle - start_idle)
+                if active < self.window / 2:
+                    continue
+                if (received - start_received) / active < watch.min_speed:
+                    self.unwatch(handle)
+                    watch.abort()
+
+
+stall_watchdog = StallWatchdog()
+
+
+class InflightResponses:
+    """
+    正在读取的流式响应（线程安全）。暂停或停止下载时 abort_all() 关闭它们的底层 socket，
+    阻塞在读取中的线程立即返回，不必等到下一块数据到达或读取超时。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._responses = set()
+
+    @contextmanager
+    def track(self, response):
+        with self._lock:
+            self._responses.add(response)
+        try:
+            yield response
+        finally:
+            with self._lock:
+                self._responses.discard(response)
+
+    def abort_all(self):
+        """中止全部进行中的响应，返回中止的数量"""
+        with self._lock:
+            responses = list(self._responses)
+        for response in responses:
+            abort_response(response)
+        return len(responses)
+
+
+inflight_responses = InflightResponses()
@@ -14,7 +14,12 @@ except ImportError:
 
 from douyin_downloader.gui import cfg
 from douyin_downloader.utils.config import save_config
-from douyin_downloader.constants import DEFAULT_THREAD_COUNT, ICON_BYTES_OPTIONS, CUSTOM_ICON_PATH
+from douyin_downloader.constants import (
+    DEFAULT_THREAD_COUNT, AUTO_THREAD_MIN, DEFAULT_AUTO_THREAD_MAX, ICON_BYTES_OPTIONS, CUSTOM_ICON_PATH, STALL_WINDOW, AIOHTTP_AVAILABLE,
+    DOWNLOAD_ENGINE_THREAD, DOWNLOAD_ENGINE_ASYNC, DEFAULT_ASYNC_CONCURRENCY
+)
+from douyin_downloader.core.bandwidth import parse_schedule, configure_from_config as configure_bandwidth
+from douyin_downloader.core.quality import QUALITY_BEST, QUALITY_MAX_HEIGHT, QUALITY_MAX_BYTES
 from .dialog_about import AboutWindow, TutorialWindow
 from .dialog_cookie import CookieFetchWindow
 from .dialog_browser import BrowserConfigWindow
@@ -172,8 +177,83 @@ class SettingsWindow(QtWidgets.QDialog):
         except Exception:
             pass
         threads_layout.addWidget(self.threads_spin)
+        self.chk_auto_threads = QtWidgets.QCheckBox('自动')
+        self.chk_auto_threads.setToolTip('按总吞吐与限流/失败情况自动增减同时下载数，下载线程数作为初始值')
+        threads_layout.addWidget(self.chk_auto_threads)
+        self.auto_threads_max_spin = QtWidgets.QSpinBox()
+        self.auto_threads_max_spin.setRange(AUTO_THREAD_MIN, 128)
+        self.auto_threads_max_spin.setPrefix('最多 ')
+        self.auto_threads_max_spin.setToolTip('自动并发的上限')
+        threads_layout.addWidget(self.auto_threads_max_spin)
+        self.video_lane_spin = QtWidgets.QSpinBox()
+        self.video_lane_spin.setRange(0, 64)
+        self.video_lane_spin.setPrefix('视频最多 ')
+        self.video_lane_spin.setSuffix(' 个')
+        self.video_lane_spin.setSpecialValueText('视频最多: 自动')
+        self.video_lane_spin.setToolTip('同时下载的视频数上限，其余线程留给图片/实况图；自动为下载线程数的一半')
+        threads_layout.addWidget(self.video_lane_spin)
+        threads_layout.addSpacing(12)
+        threads_layout.addWidget(QtWidgets.QLabel('下载引擎:'))
+        self.download_engine_combo = QtWidgets.QComboBox()
+        self.download_engine_combo.addItem('线程池', DOWNLOAD_ENGINE_THREAD)
+        self.download_engine_combo.addItem('异步（大量小文件）', DOWNLOAD_ENGINE_ASYNC)
+        if not AIOHTTP_AVAILABLE:
+            self.download_engine_combo.setItemData(1, '需要安装 aiohttp', QtCore.Qt.ItemDataRole.ToolTipRole)
+        threads_layout.addWidget(self.download_engine_combo)
+        self.async_concurrency_spin = QtWidgets.QSpinBox()
+        self.async_concurrency_spin.setRange(1, 1024)
+        self.async_concurrency_spin.setPrefix('并发 ')
+        threads_layout.addWidget(self.async_concurrency_spin)
         threads_layout.addStretch()
         layout.addLayout(threads_layout)
+        self.download_engine_combo.currentIndexChanged.connect(self.update_download_engine_inputs)
+        self.chk_auto_threads.toggled.connect(self.update_download_engine_inputs)
+        self.refresh_download_engine()
+        layout.addSpacing(6)
+
+        # 视频画质策略
+        quality_layout = QtWidgets.QHBoxLayout()
+        quality_layout.addWidget(QtWidgets.QLabel('视频画质:'))
+        self.video_quality_combo = QtWidgets.QComboBox()
+        for label, mode in (('最高画质', QUALITY_BEST), ('限制分辨率', QUALITY_MAX_HEIGHT), ('限制文件大小', QUALITY_MAX_BYTES)):
+            self.video_quality_combo.addItem(label, mode)
+        quality_layout.addWidget(self.video_quality_combo)
+        self.video_max_height_spin = QtWidgets.QSpinBox()
+        self.video_max_height_spin.setRange(240, 4320)
+        self.video_max_height_spin.setSingleStep(120)
+        self.video_max_height_spin.setSuffix(' p')
+        quality_layout.addWidget(self.video_max_height_spin)
+        self.video_max_mb_spin = QtWidgets.QSpinBox()
+        self.video_max_mb_spin.setRange(1, 10240)
+        self.video_max_mb_spin.setSuffix(' MB')
+        quality_layout.addWidget(self.video_max_mb_spin)
+        self.video_codec_combo = QtWidgets.QComboBox()
+        for label, codec in (('编码不限', 'any'), ('优先 H.264', 'h264'), ('优先 H.265', 'bytevc1')):
+            self.video_codec_combo.addItem(label, codec)
+        quality_layout.addWidget(self.video_codec_combo)
+        quality_layout.addStretch()
+        layout.addLayout(quality_layout)
+        self.video_quality_combo.currentIndexChanged.connect(self.update_video_quality_inputs)
+        self.refresh_video_quality()
+        layout.addSpacing(6)
+
+        # 图片格式与尺寸
+        image_layout = QtWidgets.QHBoxLayout()
+        image_layout.addWidget(QtWidgets.QLabel('图片格式:'))
+        self.image_format_combo = QtWidgets.QComboBox()
+        for label, fmt in (('原图', 'original'), ('优先 WebP', 'webp'), ('优先 JPEG', 'jpeg'), ('优先 HEIC', 'heic')):
+            self.image_format_combo.addItem(label, fmt)
+        image_layout.addWidget(self.image_format_combo)
+        image_layout.addWidget(QtWidgets.QLabel('最长边:'))
+        self.image_max_side_spin = QtWidgets.QSpinBox()
+        self.image_max_side_spin.setRange(0, 20000)
+        self.image_max_side_spin.setSingleStep(100)
+        self.image_max_side_spin.setSpecialValueText('不限')
+        self.image_max_side_spin.setSuffix(' px')
+        image_layout.addWidget(self.image_max_side_spin)
+        image_layout.addStretch()
+        layout.addLayout(image_layout)
+        self.refresh_image_quality()
         layout.addSpacing(10)
         
         self.chk_mix_setting = QtWidgets.QCheckBox('合集统一下载到【合集名称】文件夹')
@@ -194,6 +274,109 @@ class SettingsWindow(QtWidgets.QDialog):
         self.chk_add_title_when_export_urls = QtWidgets.QCheckBox('导出直链时增加标题')
         self.chk_add_title_when_export_urls.setChecked(bool(cfg.get('add_title_when_export_urls', False)))
         layout.addWidget(self.chk_add_title_when_export_urls)
+        layout.addSpacing(4)
+        
+        self.chk_spool_raw_pages = QtWidgets.QCheckBox('超大账号：获取数据压缩暂存到磁盘（降低内存占用）')
+        self.chk_spool_raw_pages.setToolTip('列表只显示作品数量，不逐条显示；开始下载时从暂存文件逐页读取并下载全部作品')
+        self.chk_spool_raw_pages.setChecked(bool(cfg.get('spool_raw_pages', False)))
+        layout.addWidget(self.chk_spool_raw_pages)
+        layout.addSpacing(4)
+
+        auto_download_layout = QtWidgets.QHBoxLayout()
+        self.chk_auto_download = QtWidgets.QCheckBox('获取作品时同时自动下载：')
+        self.chk_auto_download.setChecked(bool(cfg.get('auto_download_while_fetching', False)))
+        auto_download_layout.addWidget(self.chk_auto_download)
+        self.chk_auto_download_video = QtWidgets.QCheckBox('视频')
+        self.chk_auto_download_video.setChecked(bool(cfg.get('auto_download_video', True)))
+        auto_download_layout.addWidget(self.chk_auto_download_video)
+        self.chk_auto_download_image = QtWidgets.QCheckBox('图片')
+        self.chk_auto_download_image.setChecked(bool(cfg.get('auto_download_image', True)))
+        auto_download_layout.addWidget(self.chk_auto_download_image)
+        self.chk_auto_download_live = QtWidgets.QCheckBox('实况')
+        self.chk_auto_download_live.setChecked(bool(cfg.get('auto_download_live', True)))
+        auto_download_layout.addWidget(self.chk_auto_download_live)
+        auto_download_layout.addStretch()
+        layout.addLayout(auto_download_layout)
+        layout.addSpacing(4)
+
+        self.chk_hedge_requests = QtWidgets.QCheckBox('下载启动过慢时同时请求备用镜像（先完成者保留）')
+        self.chk_hedge_requests.setChecked(bool(cfg.get('hedge_requests', False)))
+        layout.addWidget(self.chk_hedge_requests)
+        layout.addSpacing(4)
+
+        stall_layout = QtWidgets.QHBoxLayout()
+        stall_layout.addWidget(QtWidgets.QLabel('低速重连：'))
+        self.stall_min_speed_spin = QtWidgets.QSpinBox()
+        self.stall_min_speed_spin.setRange(0, 10240)
+        self.stall_min_speed_spin.setSpecialValueText('不检测')
+        self.stall_min_speed_spin.setSuffix(' KB/s')
+        self.stall_min_speed_spin.setValue(int(cfg.get('stall_min_speed_kb', 8)))
+        self.stall_min_speed_spin.setToolTip(f'下载速度在 {STALL_WINDOW} 秒内持续低于该值时断开连接并断点续传')
+        stall_layout.addWidget(self.stall_min_speed_spin)
+        stall_layout.addStretch()
+        layout.addLayout(stall_layout)
+        layout.addSpacing(4)
+
+        segment_layout = QtWidgets.QHBoxLayout()
+        self.chk_segmented = QtWidgets.QCheckBox('大文件分段下载：')
+        self.chk_segmented.setChecked(bool(cfg.get('segmented_download', False)))
+        segment_layout.addWidget(self.chk_segmented)
+        self.segment_threshold_spin = QtWidgets.QSpinBox()
+        self.segment_threshold_spin.setRange(1, 10240)
+        self.segment_threshold_spin.setPrefix('超过 ')
+        self.segment_threshold_spin.setSuffix(' MB')
+        self.segment_threshold_spin.setValue(int(cfg.get('segment_threshold_mb', 20)))
+        segment_layout.addWidget(self.segment_threshold_spin)
+        self.segment_count_spin = QtWidgets.QSpinBox()
+        self.segment_count_spin.setRange(2, 16)
+        self.segment_count_spin.setPrefix('分 ')
+        self.segment_count_spin.setSuffix(' 段')
+        self.segment_count_spin.setValue(int(cfg.get('segment_count', 4)))
+        segment_layout.addWidget(self.segment_count_spin)
+        segment_layout.addStretch()
+        layout.addLayout(segment_layout)
+
+        write_buffer_layout = QtWidgets.QHBoxLayout()
+        write_buffer_layout.addWidget(QtWidgets.QLabel('写入缓冲：'))
+        self.write_buffer_spin = QtWidgets.QSpinBox()
+        self.write_buffer_spin.setRange(0, 65536)
+        self.write_buffer_spin.setSingleStep(256)
+        self.write_buffer_spin.setSpecialValueText('默认')
+        self.write_buffer_spin.setSuffix(' KB')
+        self.write_buffer_spin.setValue(int(cfg.get('write_buffer_kb', 0)))
+        self.write_buffer_spin.setToolTip('下载目录在 NAS/网络盘上时，较大的写入缓冲（如 1024 KB）可减少小块写入次数')
+        write_buffer_layout.addWidget(self.write_buffer_spin)
+        write_buffer_layout.addStretch()
+        layout.addLayout(write_buffer_layout)
+
+        bandwidth_layout = QtWidgets.QHBoxLayout()
+        bandwidth_layout.addWidget(QtWidgets.QLabel('带宽限制：全局'))
+        self.bandwidth_limit_spin = QtWidgets.QSpinBox()
+        self.bandwidth_limit_spin.setRange(0, 1024 * 1024)
+        self.bandwidth_limit_spin.setSingleStep(512)
+        self.bandwidth_limit_spin.setSpecialValueText('不限速')
+        self.bandwidth_limit_spin.setSuffix(' KB/s')
+        self.bandwidth_limit_spin.setValue(int(cfg.get('bandwidth_limit_kb', 0)))
+        bandwidth_layout.addWidget(self.bandwidth_limit_spin)
+        bandwidth_layout.addWidget(QtWidgets.QLabel('单主机'))
+        self.host_bandwidth_limit_spin = QtWidgets.QSpinBox()
+        self.host_bandwidth_limit_spin.setRange(0, 1024 * 1024)
+        self.host_bandwidth_limit_spin.setSingleStep(512)
+        self.host_bandwidth_limit_spin.setSpecialValueText('不限速')
+        self.host_bandwidth_limit_spin.setSuffix(' KB/s')
+        self.host_bandwidth_limit_spin.setValue(int(cfg.get('host_bandwidth_limit_kb', 0)))
+        bandwidth_layout.addWidget(self.host_bandwidth_limit_spin)
+        bandwidth_layout.addStretch()
+        layout.addLayout(bandwidth_layout)
+
+        schedule_layout = QtWidgets.QHBoxLayout()
+        schedule_layout.addWidget(QtWidgets.QLabel('限速时段：'))
+        self.bandwidth_schedule_edit = QtWidgets.QLineEdit()
+        self.bandwidth_schedule_edit.setPlaceholderText('如 08:00-23:00=5120; 23:00-08:00=0（KB/s，0 不限速）')
+        self.bandwidth_schedule_edit.setToolTip('时段内的全局限速替代上面的全局设置，结束早于开始表示跨越午夜；保存后立即生效')
+        self.bandwidth_schedule_edit.setText(cfg.get('bandwidth_schedule', ''))
+        schedule_layout.addWidget(self.bandwidth_schedule_edit)
+        layout.addLayout(schedule_layout)
         
         layout.addStretch()
         
@@ -419,6 +602,63 @@ background-color: #3a8ee6; border: 1px solid #3a8ee6;
         except Exception as e:
             QtWidgets.QMessageBox.warning(self, '错误', f'无法打开目录:\n{path}\n\n错误信息: {e}')
     
+    def refresh_video_quality(self):
+        """按配置刷新视频画质控件"""
+        idx = self.video_quality_combo.findData(cfg.get('video_quality', QUALITY_BEST))
+        self.video_quality_combo.setCurrentIndex(max(0, idx))
+        idx = self.video_codec_combo.findData(cfg.get('video_codec', 'any'))
+        self.video_codec_combo.setCurrentIndex(max(0, idx))
+        try:
+            self.video_max_height_spin.setValue(int(cfg.get('video_max_height', 720)))
+            self.video_max_mb_spin.setValue(int(cfg.get('video_max_mb', 50)))
+        except Exception:
+            self.video_max_height_spin.setValue(720)
+            self.video_max_mb_spin.setValue(50)
+        self.update_video_quality_inputs()
+
+    def refresh_image_quality(self):
+        """按配置刷新图片格式控件"""
+        idx = self.image_format_combo.findData(cfg.get('image_format', 'original'))
+        self.image_format_combo.setCurrentIndex(max(0, idx))
+        try:
+            self.image_max_side_spin.setValue(int(cfg.get('image_max_side', 0)))
+        except Exception:
+            self.image_max_side_spin.setValue(0)
+
+    def refresh_download_engine(self):
+        """按配置刷新下载引擎控件"""
+        idx = self.download_engine_combo.findData(cfg.get('download_engine', DOWNLOAD_ENGINE_THREAD))
+        self.download_engine_combo.setCurrentIndex(max(0, idx))
+        try:
+            self.async_concurrency_spin.setValue(int(cfg.get('async_concurrency', DEFAULT_ASYNC_CONCURRENCY)))
+        except Exception:
+            self.async_concurrency_spin.setValue(DEFAULT_ASYNC_CONCURRENCY)
+        try:
+            self.video_lane_spin.setValue(int(cfg.get('video_lane_threads', 0)))
+        except Exception:
+            self.video_lane_spin.setValue(0)
+        self.chk_auto_threads.setChecked(bool(cfg.get('auto_threads', False)))
+        try:
+            self.auto_threads_max_spin.setValue(int(cfg.get('auto_threads_max', DEFAULT_AUTO_THREAD_MAX)))
+        except Exception:
+            self.auto_threads_max_spin.setValue(DEFAULT_AUTO_THREAD_MAX)
+        self.update_download_engine_inputs()
+
+    def update_download_engine_inputs(self):
+        """异步引擎使用并发数，线程池使用下载线程数（可自动调整）"""
+        use_async = self.download_engine_combo.currentData() == DOWNLOAD_ENGINE_ASYNC
+        self.async_concurrency_spin.setVisible(use_async)
+        self.threads_spin.setEnabled(not use_async)
+        self.video_lane_spin.setVisible(not use_async)
+        self.chk_auto_threads.setVisible(not use_async)
+        self.auto_threads_max_spin.setVisible(not use_async and self.chk_auto_threads.isChecked())
+
+    def update_video_quality_inputs(self):
+        """只显示当前画质模式对应的数值输入框"""
+        mode = self.video_quality_combo.currentData()
+        self.video_max_height_spin.setVisible(mode == QUALITY_MAX_HEIGHT)
+        self.video_max_mb_spin.setVisible(mode == QUALITY_MAX_BYTES)
+
     def refresh_settings(self):
         """刷新设置显示"""
         self.settings_cookie.setPlainText(cfg.get('cookie', ''))
@@ -430,6 +670,23 @@ background-color: #3a8ee6; border: 1px solid #3a8ee6;
         self.chk_date_setting.setChecked(bool(cfg.get('include_date_in_filename', True)))
         self.chk_auto_select.setChecked(bool(cfg.get('auto_select_after_fetch', True)))
         self.chk_add_title_when_export_urls.setChecked(bool(cfg.get('add_title_when_export_urls', False)))
+        self.chk_spool_raw_pages.setChecked(bool(cfg.get('spool_raw_pages', False)))
+        self.chk_auto_download.setChecked(bool(cfg.get('auto_download_while_fetching', False)))
+        self.chk_auto_download_video.setChecked(bool(cfg.get('auto_download_video', True)))
+        self.chk_auto_download_image.setChecked(bool(cfg.get('auto_download_image', True)))
+        self.chk_auto_download_live.setChecked(bool(cfg.get('auto_download_live', True)))
+        self.chk_hedge_requests.setChecked(bool(cfg.get('hedge_requests', False)))
+        self.stall_min_speed_spin.setValue(int(cfg.get('stall_min_speed_kb', 8)))
+        self.chk_segmented.setChecked(bool(cfg.get('segmented_download', False)))
+        self.segment_threshold_spin.setValue(int(cfg.get('segment_threshold_mb', 20)))
+        self.segment_count_spin.setValue(int(cfg.get('segment_count', 4)))
+        self.write_buffer_spin.setValue(int(cfg.get('write_buffer_kb', 0)))
+        self.bandwidth_limit_spin.setValue(int(cfg.get('bandwidth_limit_kb', 0)))
+        self.host_bandwidth_limit_spin.setValue(int(cfg.get('host_bandwidth_limit_kb', 0)))
+        self.bandwidth_schedule_edit.setText(cfg.get('bandwidth_schedule', ''))
+        self.refresh_video_quality()
+        self.refresh_image_quality()
+        self.refresh_download_engine()
         try:
             self.threads_spin.setValue(int(cfg.get('threads', DEFAULT_THREAD_COUNT)))
         except Exception:
@@ -444,6 +701,13 @@ background-color: #3a8ee6; border: 1px solid #3a8ee6;
     
     def save_settings(self):
         """保存设置"""
+        schedule_text = self.bandwidth_schedule_edit.text().strip()
+        try:
+            parse_schedule(schedule_text)
+        except ValueError as e:
+            QtWidgets.QMessageBox.warning(self, '警告', f'限速时段格式错误: {e}')
+            return
+
         # 1. 将设置写入全局 cfg 变量
         cfg['cookie'] = self.settings_cookie.toPlainText().strip()
         path_value = self.settings_path.text().strip()
@@ -454,7 +718,32 @@ background-color: #3a8ee6; border: 1px solid #3a8ee6;
         cfg['include_date_in_filename'] = bool(self.chk_date_setting.isChecked())
         cfg['auto_select_after_fetch'] = bool(self.chk_auto_select.isChecked())
         cfg['add_title_when_export_urls'] = bool(self.chk_add_title_when_export_urls.isChecked())
+        cfg['spool_raw_pages'] = bool(self.chk_spool_raw_pages.isChecked())
+        cfg['auto_download_while_fetching'] = bool(self.chk_auto_download.isChecked())
+        cfg['auto_download_video'] = bool(self.chk_auto_download_video.isChecked())
+        cfg['auto_download_image'] = bool(self.chk_auto_download_image.isChecked())
+        cfg['auto_download_live'] = bool(self.chk_auto_download_live.isChecked())
+        cfg['hedge_requests'] = bool(self.chk_hedge_requests.isChecked())
+        cfg['stall_min_speed_kb'] = int(self.stall_min_speed_spin.value())
+        cfg['segmented_download'] = bool(self.chk_segmented.isChecked())
+        cfg['segment_threshold_mb'] = int(self.segment_threshold_spin.value())
+        cfg['segment_count'] = int(self.segment_count_spin.value())
+        cfg['write_buffer_kb'] = int(self.write_buffer_spin.value())
+        cfg['bandwidth_limit_kb'] = int(self.bandwidth_limit_spin.value())
+        cfg['host_bandwidth_limit_kb'] = int(self.host_bandwidth_limit_spin.value())
+        cfg['bandwidth_schedule'] = schedule_text
         cfg['threads'] = int(self.threads_spin.value())
+        cfg['auto_threads'] = bool(self.chk_auto_threads.isChecked())
+        cfg['auto_threads_max'] = int(self.auto_threads_max_spin.value())
+        cfg['download_engine'] = self.download_engine_combo.currentData()
+        cfg['async_concurrency'] = int(self.async_concurrency_spin.value())
+        cfg['video_lane_threads'] = int(self.video_lane_spin.value())
+        cfg['video_quality'] = self.video_quality_combo.currentData()
+        cfg['video_max_height'] = int(self.video_max_height_spin.value())
+        cfg['video_max_mb'] = int(self.video_max_mb_spin.value())
+        cfg['video_codec'] = self.video_codec_combo.currentData()
+        cfg['image_format'] = self.image_format_combo.currentData()
+        cfg['image_max_side'] = int(self.image_max_side_spin.value())
         
         # 保存图标选择
         # 根据用户选择的按钮来决定图标类型
@@ -479,8 +768,9 @@ background-color: #3a8ee6; border: 1px solid #3a8ee6;
             cfg['edge_path'] = ''
         
         try:
-            # 2. 持久化到 config.ini
+            # 2. 持久化到 config.ini；带宽限制立即生效（下载中在主窗口的限速框调整）
             save_config(cfg)
+            configure_bandwidth(cfg)
             
             # 3. 通知主窗口
             parent_window = self.parent()
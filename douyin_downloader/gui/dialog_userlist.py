@@ -39,7 +39,7 @@ class UserListWindow(QtWidgets.QDialog):
         
         fm = self.user_tree.fontMetrics()
         width0 = fm.horizontalAdvance('选择') + 16
-        col4_w = fm.horizontalAdvance('汉' * 4) + 12
+        col4_w = (fm.horizontalAdvance('关闭') + 28) * 2 + 16  # 两个操作按钮
         self.user_tree.setColumnWidth(0, width0)
         self.user_tree.setColumnWidth(1, 60)
         self.user_tree.setColumnWidth(2, 100)
@@ -145,21 +145,12 @@ class UserListWindow(QtWidgets.QDialog):
             item.setTextAlignment(4, int(Qt.AlignmentFlag.AlignCenter))
             item.setData(0, Qt.ItemDataRole.UserRole, user)
             
-            # 在操作列添加 "获取" 按钮
-            fetch_btn = QtWidgets.QPushButton('获取')
-            fm = self.user_tree.fontMetrics()
-            btn_width = fm.horizontalAdvance('关闭') + 28
-            fetch_btn.setFixedWidth(btn_width)
-            fetch_btn.setFixedHeight(28)
-            fetch_btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #409EFF; border: 1px solid #409EFF; color: white;
-                    padding: 0px; border-radius: 0px; font-weight: 500; font-size: 13px;
-                }
-                QPushButton:hover { background-color: #66b1ff; border: 1px solid #66b1ff; }
-                QPushButton:pressed { background-color: #3a8ee6; border: 1px solid #3a8ee6; }
-            """)
+            # 在操作列添加 "获取" 与 "本地" 按钮
+            fetch_btn = self._make_action_button('获取')
             fetch_btn.clicked.connect(lambda checked, u=user: self.on_fetch_user(u))
+            local_btn = self._make_action_button('本地')
+            local_btn.setToolTip('从本地作品库打开上次获取的列表')
+            local_btn.clicked.connect(lambda checked, u=user: self.on_open_local_user(u))
             
             btn_container = QtWidgets.QWidget()
             btn_container.setMinimumHeight(50)
@@ -170,9 +161,10 @@ class UserListWindow(QtWidgets.QDialog):
             h_widget = QtWidgets.QWidget()
             h_layout = QtWidgets.QHBoxLayout(h_widget)
             h_layout.setContentsMargins(0, 0, 0, 0)
-            h_layout.setSpacing(0)
+            h_layout.setSpacing(4)
             h_layout.addStretch()
             h_layout.addWidget(fetch_btn)
+            h_layout.addWidget(local_btn)
             h_layout.addStretch()
             v_layout.addWidget(h_widget)
             v_layout.addStretch()
@@ -181,6 +173,47 @@ class UserListWindow(QtWidgets.QDialog):
             # 设置行高
             item.setSizeHint(0, QtCore.QSize(-1, 50))
     
+    def _make_action_button(self, text):
+        """创建操作列中的小按钮"""
+        btn = QtWidgets.QPushButton(text)
+        fm = self.user_tree.fontMetrics()
+        btn_width = fm.horizontalAdvance('关闭') + 28
+        btn.setFixedWidth(btn_width)
+        btn.setFixedHeight(28)
+        btn.setStyleSheet("""
+            QPushButton {
+                background-color: #409EFF; border: 1px solid #409EFF; color: white;
+                padding: 0px; border-radius: 0px; font-weight: 500; font-size: 13px;
+            }
+            QPushButton:hover { background-color: #66b1ff; border: 1px solid #66b1ff; }
+            QPushButton:pressed { background-color: #3a8ee6; border: 1px solid #3a8ee6; }
+        """)
+        return btn
+
+    def _fill_main_url(self, main_window, user):
+        """将用户主页链接（标准化URL）填入主窗口"""
+        url_edit = getattr(main_window, 'url_edit', None)
+        if not url_edit:
+            return
+        original_url = user.get('url', '')
+        sec_user_id = extract_sec_user_id_from_url(original_url)
+        if sec_user_id:
+            # 使用标准化URL
+            normalized_url = f"https://www.douyin.com/user/{sec_user_id}"
+            url_edit.setText(normalized_url)
+            
+            # 同时更新配置中的用户链接为标准化链接
+            users = cfg.get('users', [])
+            for u in users:
+                if u.get('url') == original_url:
+                    u['url'] = normalized_url
+                    break
+            cfg['users'] = users
+            save_config(cfg)
+        else:
+            # 如果无法提取sec_user_id，则使用原始URL
+            url_edit.setText(original_url)
+
     def on_fetch_user(self, user):
         """点击 "获取" 按钮"""
         try:
@@ -188,37 +221,28 @@ class UserListWindow(QtWidgets.QDialog):
             main_window = self.parent()
             if main_window:
                 # 1. 填充主页链接（标准化URL）
-                if hasattr(main_window, 'url_edit'):
-                    url_edit = getattr(main_window, 'url_edit', None)
-                    if url_edit:
-                        original_url = user.get('url', '')
-                        sec_user_id = extract_sec_user_id_from_url(original_url)
-                        if sec_user_id:
-                            # 使用标准化URL
-                            normalized_url = f"https://www.douyin.com/user/{sec_user_id}"
-                            url_edit.setText(normalized_url)
-                            
-                            # 同时更新配置中的用户链接为标准化链接
-                            users = cfg.get('users', [])
-                            for u in users:
-                                if u.get('url') == original_url:
-                                    u['url'] = normalized_url
-                                    break
-                            cfg['users'] = users
-                            from douyin_downloader.utils.config import save_config
-                            save_config(cfg)
-                        else:
-                            # 如果无法提取sec_user_id，则使用原始URL
-                            url_edit.setText(original_url)
+                self._fill_main_url(main_window, user)
                 # 2. 触发主窗口的 "获取"
-                if hasattr(main_window, 'on_fetch'):
-                    on_fetch = getattr(main_window, 'on_fetch', None)
-                    if on_fetch:
-                        on_fetch()
+                on_fetch = getattr(main_window, 'on_fetch', None)
+                if on_fetch:
+                    on_fetch()
                 # 3. 关闭弹窗
                 self.close()
         except Exception as e:
             QtWidgets.QMessageBox.warning(self, '错误', f'获取失败: {e}')
+
+    def on_open_local_user(self, user):
+        """点击 "本地" 按钮：从本地作品库打开该用户上次获取的列表"""
+        try:
+            main_window = self.parent()
+            if main_window:
+                self._fill_main_url(main_window, user)
+                on_load_local = getattr(main_window, 'on_load_local', None)
+                if on_load_local:
+                    on_load_local()
+                self.close()
+        except Exception as e:
+            QtWidgets.QMessageBox.warning(self, '错误', f'打开本地列表失败: {e}')
     
     def on_delete(self):
         """删除选中的用户"""
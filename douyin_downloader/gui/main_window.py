@@ -20,8 +20,13 @@ from douyin_downloader.constants import (
     ICON_BYTES_OPTIONS, CUSTOM_ICON_PATH
 )
 from douyin_downloader.utils.config import save_config
-from douyin_downloader.utils.file_utils import sanitize_filename, safe_mkdir
+from douyin_downloader.utils.file_utils import sanitize_filename, safe_mkdir, build_user_folder
 from douyin_downloader.core.api import extract_sec_user_id_from_url
+from douyin_downloader.core.bandwidth import bandwidth_limiter, configure_from_config as configure_bandwidth
+from douyin_downloader.core.downloader import apply_download_settings
+from douyin_downloader.core.journal import STATE_QUEUED, STATE_DONE, STATE_FAILED, JOB_DISMISSED
+from douyin_downloader.core.progress import format_progress, format_lanes
+from douyin_downloader.core.spool import PageSpool
 
 from douyin_downloader.gui.worker import Worker
 from douyin_downloader.gui import cfg
@@ -30,6 +35,9 @@ from douyin_downloader.gui.dialog_log import LogWindow
 from douyin_downloader.gui.dialog_userlist import UserListWindow
 from douyin_downloader.gui.dialog_settings import SettingsWindow
 
+# 进度条每个文件细分的刻度数（按字节进度在文件之间前进）
+_PROGRESS_SCALE = 100
+
 
 def get_app_icon():
     """获取应用程序图标"""
@@ -87,6 +95,19 @@ class MainWindow(QtWidgets.QMainWindow):
         self.export_urls_btn = QtWidgets.QPushButton('导出直链')
         self.export_excel_btn = QtWidgets.QPushButton('导出Excel')
         self.download_btn = QtWidgets.QPushButton('开始下载')
+        self.pause_btn = QtWidgets.QPushButton('暂停下载')
+        self.pause_btn.setToolTip('暂停时关闭进行中的连接并保留已下载部分，继续后断点续传')
+        self.pause_btn.hide()
+        # 下载中设置按钮不可用，全局限速在此调整
+        self.limit_spin = QtWidgets.QSpinBox()
+        self.limit_spin.setRange(0, 1024 * 1024)
+        self.limit_spin.setSingleStep(512)
+        self.limit_spin.setPrefix('限速 ')
+        self.limit_spin.setSpecialValueText('不限速')
+        self.limit_spin.setSuffix(' KB/s')
+        self.limit_spin.setKeyboardTracking(False)
+        self.limit_spin.setToolTip('下载中调整全局限速，立即生效并保存到设置（限速时段内以时段的设置为准）')
+        self.limit_spin.hide()
 
         btns.addWidget(self.settings_btn)
         btns.addWidget(self.export_urls_btn)
@@ -100,6 +121,8 @@ class MainWindow(QtWidgets.QMainWindow):
             self.export_excel_btn.setEnabled(False)
             self.export_excel_btn.setToolTip("请先安装 'openpyxl' (pip install openpyxl) 以启用此功能")
         
+        btns.addWidget(self.limit_spin)
+        btns.addWidget(self.pause_btn)
         btns.addWidget(self.download_btn)
 
         self.tree = QtWidgets.QTreeWidget()
@@ -234,6 +257,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.itasks = []
         self.all_awemes = []
         self.current_nickname = ''
+        self.current_sec_user_id = ''
 
         self.log_window = LogWindow(self)
         self.log_window.hide()
@@ -248,11 +272,12 @@ class MainWindow(QtWidgets.QMainWindow):
         btn_font = QtGui.QFont()
         btn_font.setPointSize(11)
         self.like_checkbox.setFont(btn_font)
-        for b in (self.fetch_btn, self.download_btn, self.settings_btn, self.clear_btn, self.select_all_btn, self.invert_btn, self.export_urls_btn):
+        for b in (self.fetch_btn, self.download_btn, self.pause_btn, self.settings_btn, self.clear_btn, self.select_all_btn, self.invert_btn, self.export_urls_btn):
             b.setFont(btn_font)
         button_width = 100
         self.fetch_btn.setFixedWidth(button_width)
         self.download_btn.setFixedWidth(button_width)
+        self.pause_btn.setFixedWidth(button_width)
 
         self.clear_btn.setStyleSheet('''
             QPushButton {
@@ -266,6 +291,8 @@ class MainWindow(QtWidgets.QMainWindow):
         self.url_label_btn.clicked.connect(self.on_show_user_list)
         self.fetch_btn.clicked.connect(self.on_fetch)
         self.download_btn.clicked.connect(self.on_download)
+        self.pause_btn.clicked.connect(self.on_pause)
+        self.limit_spin.valueChanged.connect(self.on_limit_changed)
         self.settings_btn.clicked.connect(self.on_settings)
         self.select_all_btn.clicked.connect(self.on_select_all)
         self.export_excel_btn.clicked.connect(self.on_export_excel)
@@ -276,7 +303,9 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.worker.log_signal.connect(self.append_log)
         self.worker.tasks_signal.connect(lambda vtasks, itasks, nickname, aweme_list: self.on_tasks_received(vtasks, itasks, nickname, aweme_list))
+        self.worker.spool_signal.connect(self.on_spool_received)
         self.worker.progress_signal.connect(self.on_progress)
+        self.worker.transfer_progress_signal.connect(self.on_transfer_progress)
         self.worker.finished.connect(self.on_worker_finished)
         self.worker.fetch_finished.connect(self.on_fetch_finished)
         self.worker.download_finished.connect(self.on_download_finished)
@@ -288,9 +317,13 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self._programmatic_change = False  # 防止联动循环
         self._last_status_text = ''
+        self._file_progress = (0, 0)      # (已完成文件数, 总数)
+        self._transfer_snapshot = None    # 最近一次字节进度快照
 
         if not os.path.exists(CONFIG_FILE):
             QtCore.QTimer.singleShot(500, self.show_first_time_settings)
+        else:
+            QtCore.QTimer.singleShot(800, self._offer_unfinished_downloads)
 
     def append_log(self, text):
         """向日志窗口和状态栏输出日志"""
@@ -492,18 +525,41 @@ class MainWindow(QtWidgets.QMainWindow):
         self.sync_filter_checkboxes()
 
     def on_progress(self, done, total):
-        """更新进度条"""
+        """更新完成文件数"""
+        self._file_progress = (done, total)
+        self._render_progress()
+
+    def on_transfer_progress(self, snapshot):
+        """更新字节进度（吞吐、剩余时间），悬停显示各通道统计"""
+        self._transfer_snapshot = snapshot
+        self._render_progress()
+
+    def _render_progress(self):
+        """
+        更新进度条：下载中按已接收字节占预计总量的比例前进（大文件下载时也能看到进度），
+        文字显示完成文件数、百分比、已下载/预计大小、吞吐与剩余时间
+        """
         if not self.progress.isVisible():
             self.progress.show()
-            
-        self.progress.setMaximum(total)
-        self.progress.setValue(done)
-        pct = int((done / max(1, total)) * 100)
-        self.progress.setFormat(f"%v / %m ({pct}%)")
+
+        done, total = self._file_progress
+        snapshot = self._transfer_snapshot
+        fraction = done / max(1, total)
+        text_suffix = ''
+        if snapshot is not None and snapshot['bytes_total'] > 0 and done < total:
+            done = max(done, min(total, snapshot['files_done']))
+            fraction = min(1.0, snapshot['bytes_done'] / snapshot['bytes_total'])
+            text_suffix = f" · {format_progress(snapshot)}"
+            self.progress.setToolTip(format_lanes(snapshot))
+        maximum = max(1, total) * _PROGRESS_SCALE
+        self.progress.setMaximum(maximum)
+        self.progress.setValue(maximum if done >= total > 0 else min(maximum - 1, int(fraction * maximum)))
+        pct = int(fraction * 100)
+        self.progress.setFormat(f"{done} / {total} ({pct}%){text_suffix}")
         
         # 完成时变绿
         try:
-            if total > 0 and done >= total:
+            if done >= total > 0:
                 self.progress.setStyleSheet(
                     "QProgressBar { border: none; border-radius: 0px; background: #f0f0f0; text-align: center; }"
                     "QProgressBar::chunk { background-color: #4CC14C; border-radius: 0px; }"
@@ -522,11 +578,12 @@ class MainWindow(QtWidgets.QMainWindow):
         try:
             maxv = self.progress.maximum() or self.progress.value() or 1
             self.progress.setValue(maxv)
+            done, total = self._file_progress
             if hasattr(self.worker, '_download_stop_requested') and self.worker._download_stop_requested:
-                self.progress.setFormat(f"%v / %m (已停止)")
+                self.progress.setFormat(f"{done} / {total} (已停止)")
                 self.progress.hide()
             else:
-                self.progress.setFormat(f"%v / %m (完成)")
+                self.progress.setFormat(f"{total} / {total} (完成)")
             self.progress.setStyleSheet(
                 "QProgressBar { border: none; border-radius: 0px; background: #f0f0f0; text-align: center; }"
                 "QProgressBar::chunk { background-color: #4CC14C; border-radius: 0px; }"
@@ -543,7 +600,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.export_excel_btn.setText('正在导出')
         self.export_excel_btn.setEnabled(False)
 
-        all_awemes_copy = list(self.all_awemes)
+        all_awemes_copy = self._iter_export_awemes()
         nickname = self.nickname_label.text() or '抖音用户'
         unique_id = getattr(self, 'current_unique_id', '') or ''
         if unique_id:
@@ -570,8 +627,11 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, '提示', '没有作品数据可以导出')
             return
 
-        video_awemes = [aweme for aweme in self.all_awemes if not aweme.get('images')]
-        if not video_awemes:
+        if isinstance(self.all_awemes, PageSpool):
+            has_video = self.all_awemes.video_count > 0  # 暂存模式按索引判断，不读取暂存文件
+        else:
+            has_video = any(not aweme.is_images for aweme in self.all_awemes)
+        if not has_video:
             QtWidgets.QMessageBox.warning(self, '提示', '没有视频作品可以导出直链')
             return
 
@@ -601,24 +661,19 @@ class MainWindow(QtWidgets.QMainWindow):
 
             urls = []
             descs = []
-            for aweme in video_awemes:
-                video_info = aweme.get('video', {})
-                if video_info:
-                    bit_rate_list = video_info.get('bit_rate', [])
-                    if bit_rate_list:
-                        best = max(bit_rate_list, key=lambda x: x.get('bit_rate', 0))
-                        url_list = best.get('play_addr', {}).get('url_list', [])
-                        if len(url_list) >= 3:
-                            full_url = url_list[2]
-                            import re
-                            video_id_match = re.search(r'video_id=([^&]*)', full_url)
-                            file_id_match = re.search(r'file_id=([^&]*)', full_url)
-                            if video_id_match and file_id_match:
-                                video_id = video_id_match.group(1)
-                                file_id = file_id_match.group(1)
-                                simplified_url = f"https://www.douyin.com/aweme/v1/play/?video_id={video_id}&file_id={file_id}"
-                                urls.append(simplified_url)
-                                descs.append(aweme.get('desc', ''))
+            for aweme in self._iter_export_awemes():
+                if not aweme.is_images and aweme.video_rates:
+                    url_list = aweme.video_rates[0].urls  # 最高码率
+                    if len(url_list) >= 3:
+                        full_url = url_list[2]
+                        video_id_match = re.search(r'video_id=([^&]*)', full_url)
+                        file_id_match = re.search(r'file_id=([^&]*)', full_url)
+                        if video_id_match and file_id_match:
+                            video_id = video_id_match.group(1)
+                            file_id = file_id_match.group(1)
+                            simplified_url = f"https://www.douyin.com/aweme/v1/play/?video_id={video_id}&file_id={file_id}"
+                            urls.append(simplified_url)
+                            descs.append(aweme.desc)
 
             add_title = cfg.get('add_title_when_export_urls', False)
             if add_title:
@@ -680,10 +735,8 @@ class MainWindow(QtWidgets.QMainWindow):
         QtWidgets.QMessageBox.warning(self, '导出失败', error_msg)
         self.append_log(error_msg)
 
-    def on_tasks_received(self, vtasks, itasks, user_info, aweme_list):
-        """接收 Worker 增量获取到的作品任务"""
-        self.progress.hide()
-
+    def _set_user_info(self, user_info):
+        """显示 Worker 发回的用户信息（"昵称|抖音号"）"""
         nickname = user_info
         unique_id = ''
         if '|' in user_info:
@@ -695,6 +748,26 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.current_nickname = nickname or ''
         self.current_unique_id = unique_id
+        self.current_sec_user_id = getattr(self.worker, 'current_sec_user_id', '') or ''
+
+    def on_spool_received(self, user_info, spool):
+        """磁盘暂存模式：作品不逐条加入列表，只记录暂存文件并显示数量"""
+        self.progress.hide()
+        self._set_user_info(user_info)
+        self.all_awemes = spool
+        # 列表中只有一行说明（不可勾选，没有任务数据）
+        item = self.tree.topLevelItem(0)
+        if item is None:
+            item = QtWidgets.QTreeWidgetItem()
+            item.setFlags(Qt.ItemFlag.ItemIsEnabled)
+            self.tree.addTopLevelItem(item)
+        item.setText(3, f'已暂存 {len(spool)} 个作品（其中视频 {spool.video_count} 个），'
+                        f'列表不逐条显示，点击「开始下载」下载全部作品')
+
+    def on_tasks_received(self, vtasks, itasks, user_info, aweme_list):
+        """接收 Worker 增量获取到的作品任务"""
+        self.progress.hide()
+        self._set_user_info(user_info)
 
         if not hasattr(self, 'vtasks_all'): self.vtasks_all = []
         if not hasattr(self, 'itasks_all'): self.itasks_all = []
@@ -708,24 +781,13 @@ class MainWindow(QtWidgets.QMainWindow):
             if not hasattr(self, 'all_awemes'): self.all_awemes = []
             self.all_awemes.extend(aweme_list or [])
 
-        def get_type_display(desc, is_image):
-            if not is_image: return '视频'
-            if desc and isinstance(desc, str):
-                if re.search(r'_live\d*$', desc) or '_live' in desc:
-                    return '实况'
-                if re.search(r'_p\d+$', desc):
-                    return '图片'
-            return '图片'
-
         items_to_add = []
         idx = self.tree.topLevelItemCount() + 1
         
         for t in (vtasks or []):
-            date_display = t.get('date', '')
-            desc_display = t.get('desc', '')
             item = QtWidgets.QTreeWidgetItem([
-                ' ', str(idx), date_display, desc_display, 
-                t.get('mix_name') or '', '视频'
+                ' ', str(idx), t.date, t.desc, 
+                t.mix_name or '', t.kind.label
             ])
             item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled)
             item.setCheckState(0, Qt.CheckState.Unchecked)
@@ -735,12 +797,9 @@ class MainWindow(QtWidgets.QMainWindow):
             idx += 1
 
         for t in (itasks or []):
-            date_display = t.get('date', '')
-            desc_display = t.get('desc', '')
-            kind = get_type_display(desc_display, True)
             item = QtWidgets.QTreeWidgetItem([
-                ' ', str(idx), date_display, desc_display, 
-                t.get('mix_name') or '', kind
+                ' ', str(idx), t.date, t.desc, 
+                t.mix_name or '', t.kind.label
             ])
             item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled)
             item.setCheckState(0, Qt.CheckState.Unchecked)
@@ -830,6 +889,10 @@ class MainWindow(QtWidgets.QMainWindow):
             try:
                 if hasattr(self.worker, '_fetch_stop_requested'):
                     self.worker._fetch_stop_requested = True
+                if cfg.get('auto_download_while_fetching', False):
+                    # 边获取边下载时同时停止下载
+                    self.worker.stop_download()
+                    self._show_pause_button(False)
                 self.append_log('[信息] 已请求停止获取')
                 # 立即更新按钮状态
                 self.fetch_btn.setText('获取作品')
@@ -862,6 +925,71 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, '提示', '请在设置中配置 Cookie')
             return
         
+        fetch_mode = 'favorite' if self.like_checkbox.isChecked() else 'post'
+        resume = self._ask_resume_fetch(url, fetch_mode)
+        if resume is None and extract_sec_user_id_from_url(url):
+            return  # 用户取消
+
+        self._reset_list_for_loading()
+        self._fetch_mode = fetch_mode
+        btn_text = '停止获取'
+        self.fetch_btn.setText(btn_text)
+        self.fetch_btn.setEnabled(True)
+        self.fetch_btn.setProperty("running", True)
+        style = self.style()
+        if style:
+            style.unpolish(self.fetch_btn)
+            style.polish(self.fetch_btn)
+
+        self.worker._fetch_stop_requested = False
+        self._show_pause_button(bool(cfg.get('auto_download_while_fetching', False)))
+        self._thread = threading.Thread(target=self.worker.fetch_tasks, args=(url, cookie, fetch_mode, resume), daemon=True)
+        self._thread.start()
+
+    def _ask_resume_fetch(self, url, fetch_mode):
+        """
+        存在未完成的获取断点时询问是否继续。
+        返回 True 继续 / False 重新获取 / None（取消，或短链接无法在本地判断，交由 Worker 自动续取）
+        """
+        sec_user_id = extract_sec_user_id_from_url(url)
+        if not sec_user_id:
+            return None
+        try:
+            checkpoint = self.worker.store.get_checkpoint(sec_user_id, fetch_mode)
+        except Exception:
+            checkpoint = None
+        if not checkpoint:
+            return False
+
+        updated = datetime.fromtimestamp(checkpoint['updated_at']).strftime('%Y-%m-%d %H:%M:%S')
+        msg_box = QtWidgets.QMessageBox(self)
+        msg_box.setWindowTitle('继续获取')
+        msg_box.setText(
+            f"检测到上次未完成的获取（{updated}）：\n"
+            f"已接收 {checkpoint['received']} 个作品，下一页为第 {checkpoint['page']} 页。\n\n"
+            f"是否从断点继续获取？"
+        )
+        msg_box.setStandardButtons(
+            QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No
+            | QtWidgets.QMessageBox.StandardButton.Cancel
+        )
+        msg_box.setDefaultButton(QtWidgets.QMessageBox.StandardButton.Yes)
+        yes_button = msg_box.button(QtWidgets.QMessageBox.StandardButton.Yes)
+        no_button = msg_box.button(QtWidgets.QMessageBox.StandardButton.No)
+        cancel_button = msg_box.button(QtWidgets.QMessageBox.StandardButton.Cancel)
+        if yes_button: yes_button.setText('继续获取')
+        if no_button: no_button.setText('重新获取')
+        if cancel_button: cancel_button.setText('取消')
+
+        ret = msg_box.exec()
+        if ret == QtWidgets.QMessageBox.StandardButton.Yes:
+            return True
+        if ret == QtWidgets.QMessageBox.StandardButton.No:
+            return False
+        return None
+
+    def _reset_list_for_loading(self):
+        """获取/载入列表前：禁用按钮并清空上次的列表数据"""
         self.url_label_btn.setEnabled(False)
         self.settings_btn.setEnabled(False)
         self.clear_btn.setEnabled(False)
@@ -880,6 +1008,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self.itasks = []
             self.all_awemes = []  # 清空aweme数据
             self.current_nickname = '' 
+            self.current_sec_user_id = ''
             if hasattr(self.worker, 'all_awemes'): self.worker.all_awemes = []  # 清空Worker中的aweme数据
             if hasattr(self.worker, '_completed_tasks'): self.worker._completed_tasks = []
             if hasattr(self.worker, '_failed_tasks'): self.worker._failed_tasks = []
@@ -892,22 +1021,44 @@ class MainWindow(QtWidgets.QMainWindow):
 
         except Exception:
             pass
-        
-        fetch_mode = 'favorite' if self.like_checkbox.isChecked() else 'post'
-        self._fetch_mode = fetch_mode
-        btn_text = '停止获取'
-        self.fetch_btn.setText(btn_text)
-        self.fetch_btn.setEnabled(True)
-        self.fetch_btn.setProperty("running", True)
-        style = self.style()
-        if style:
-            style.unpolish(self.fetch_btn)
-            style.polish(self.fetch_btn)
 
-        self.worker._fetch_stop_requested = False
-        self._thread = threading.Thread(target=self.worker.fetch_tasks, args=(url, cookie, fetch_mode), daemon=True)
+    def on_load_local(self):
+        """从本地作品库重新打开当前主页链接的作品列表（无需重新获取）"""
+        url = self.url_edit.text().strip()
+        sec_user_id = extract_sec_user_id_from_url(url) if url else None
+        if not sec_user_id:
+            QtWidgets.QMessageBox.warning(self, '提示', '请输入有效的主页链接')
+            return
+        if hasattr(self, '_thread') and self._thread and self._thread.is_alive():
+            QtWidgets.QMessageBox.warning(self, '提示', '请等待当前任务完成')
+            return
+
+        self._reset_list_for_loading()
+        self._fetch_mode = 'favorite' if self.like_checkbox.isChecked() else 'post'
+        self._thread = threading.Thread(
+            target=self.worker.load_from_store,
+            args=(sec_user_id, self._fetch_mode),
+            daemon=True
+        )
         self._thread.start()
 
+    def _iter_export_awemes(self):
+        """
+        返回用于导出的作品记录。
+        当前列表已写入本地作品库时，使用流式查询读取；否则使用内存中的列表副本（磁盘暂存模式下流式读取暂存文件）。
+        """
+        sec_user_id = getattr(self, 'current_sec_user_id', '') or ''
+        mode = getattr(self, '_fetch_mode', '') or 'post'
+        if sec_user_id:
+            try:
+                if self.worker.store.count_records(sec_user_id, mode) > 0:
+                    return self.worker.store.iter_records(sec_user_id, mode)
+            except Exception as e:
+                self.append_log(f'[警告] 读取本地作品库失败，改用内存数据: {e}')
+        if isinstance(self.all_awemes, PageSpool):
+            return iter(self.all_awemes)  # 磁盘暂存：流式读取，不整体载入内存
+        return list(self.all_awemes)
+
     def closeEvent(self, a0):
         """窗口关闭事件"""
         running_tasks = False
@@ -937,10 +1088,8 @@ class MainWindow(QtWidgets.QMainWindow):
             # 请求停止所有任务
             if hasattr(self.worker, '_fetch_stop_requested'):
                 self.worker._fetch_stop_requested = True
-            if hasattr(self.worker, '_pause_requested'):
-                self.worker._pause_requested = True
-            if hasattr(self.worker, '_download_stop_requested'):
-                self.worker._download_stop_requested = True
+            # 关闭进行中的连接，下载线程无需等待阻塞中的读取
+            self.worker.stop_download()
             
             # 等待线程（最多5秒）
             if hasattr(self, '_thread') and self._thread and self._thread.is_alive():
@@ -950,7 +1099,10 @@ class MainWindow(QtWidgets.QMainWindow):
                 if self._thread.is_alive():
                     # 再等待4秒
                     self._thread.join(timeout=4.0)
-                
+            # 主线程的作品库连接（断点查询、导出前统计）
+            self.worker.store.close()
+            self.worker.journal.close()
+
             # 关闭所有子窗口
             for w in (self.log_window, self.user_list_window, self.settings_window):
                 if w: 
@@ -970,8 +1122,8 @@ class MainWindow(QtWidgets.QMainWindow):
         # 检查是否正在下载（切换为停止）
         if self.download_btn.text() == '停止下载':
             try:
-                if hasattr(self.worker, '_download_stop_requested'):
-                    self.worker._download_stop_requested = True
+                self.worker.stop_download()
+                self._show_pause_button(False)
                 self.append_log('[信息] 已请求停止下载')
                 # 立即更新按钮状态
                 self.download_btn.setText('开始下载')
@@ -997,6 +1149,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 pass
             return
 
+        spool = self.all_awemes if isinstance(self.all_awemes, PageSpool) else None
         selected = []
         for i in range(self.tree.topLevelItemCount()):
             it = self.tree.topLevelItem(i)
@@ -1005,7 +1158,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 if data:
                     selected.append(data)
 
-        if not selected:
+        if not selected and not spool:
             QtWidgets.QMessageBox.warning(self, '提示', '请先选择要下载的作品')
             return
 
@@ -1013,50 +1166,36 @@ class MainWindow(QtWidgets.QMainWindow):
         sel_i = [d[0] for d in selected if d[1]]  # (task, is_image=True)
 
         base_folder = cfg.get('path', '') or os.getcwd()
-        nickname_for_folder = self.nickname_label.text() or 'Douyin_User'  # 移除了对last_nickname字段的依赖
-        unique_id = getattr(self, 'current_unique_id', '') or ''
-        
-        # 使用用户名-unique_id作为文件夹名
-        if unique_id:
-            folder_name = f"{nickname_for_folder}-{unique_id}"
-        else:
-            folder_name = nickname_for_folder or 'Douyin_Downloads'
-
-        if getattr(self, '_fetch_mode', '') == 'favorite':
-            folder_name += '-like'
-
-        # 修改路径结构为: 基础路径/作品下载/用户名-unique_id
-        download_folder = os.path.join(base_folder, '作品下载')
-        user_folder = os.path.join(download_folder, sanitize_filename(folder_name))
+        user_folder = build_user_folder(
+            base_folder, self.nickname_label.text(),
+            getattr(self, 'current_unique_id', '') or '', getattr(self, '_fetch_mode', '')
+        )
         
         if not safe_mkdir(user_folder):
             QtWidgets.QMessageBox.critical(self, '错误', f'创建目录失败: {user_folder}')
             return
+
+        if spool is not None:
+            # 磁盘暂存模式：逐页从暂存文件读取并下载全部作品
+            self._begin_download(self.worker.download_spool, (spool, user_folder), len(spool))
+            return
             
         threads = int(cfg.get('threads', DEFAULT_THREAD_COUNT))
         use_mix_folder = cfg.get('use_mix_folder', True)
         include_date = cfg.get('include_date_in_filename', True)
 
-        def apply_settings_to_tasks(tasks, is_image):
-            out = []
-            for t in tasks:
-                nt = dict(t)
-                if not use_mix_folder:
-                    nt['mix_name'] = None
+        sel_v_proc = apply_download_settings(sel_v, use_mix_folder, include_date)
+        sel_i_proc = apply_download_settings(sel_i, use_mix_folder, include_date)
 
-                # 不再处理 desc 字符串，而是将配置存入 task
-                nt['include_date_in_filename'] = include_date
-                
-                out.append(nt)
-            return out
-
-        sel_v_proc = apply_settings_to_tasks(sel_v, False)
-        sel_i_proc = apply_settings_to_tasks(sel_i, True)
+        self._begin_download(self.worker.download_tasks, (sel_v_proc, sel_i_proc, user_folder, threads),
+                             len(sel_v_proc) + len(sel_i_proc))
 
+    def _begin_download(self, target, args, total):
+        """切换到下载中状态并在后台线程运行 target(*args)（开始下载 / 继续下载任务日志）"""
         self.progress.show()
-        self.progress.setMaximum(max(1, len(sel_v_proc) + len(sel_i_proc)))
-        self.progress.setValue(0)
-        self.on_progress(0, max(1, len(sel_v_proc) + len(sel_i_proc))) # 恢复蓝色
+        self.progress.setToolTip('')
+        self._transfer_snapshot = None
+        self.on_progress(0, max(1, total)) # 恢复蓝色
         
         # 重置停止标志
         self.worker._download_stop_requested = False
@@ -1077,17 +1216,54 @@ class MainWindow(QtWidgets.QMainWindow):
         self.download_btn.setText('停止下载')
         self.download_btn.setEnabled(True)
         self.download_btn.setProperty("running", True)
+        self._show_pause_button(True)
         style = self.style()
         if style:
             style.unpolish(self.download_btn)
             style.polish(self.download_btn)
-        self._thread = threading.Thread(
-            target=self.worker.download_tasks, 
-            args=(sel_v_proc, sel_i_proc, user_folder, threads), 
-            daemon=True
-        )
+        self._thread = threading.Thread(target=target, args=args, daemon=True)
         self._thread.start()
 
+    def _offer_unfinished_downloads(self):
+        """启动时检查下载任务日志：询问是否继续上次未完成的下载，或只重试失败的任务"""
+        if self._thread and self._thread.is_alive():
+            return
+        try:
+            summary = self.worker.journal.latest_unfinished()
+        except Exception as e:
+            self.append_log(f'[警告] 读取下载任务日志失败: {e}')
+            return
+        if not summary:
+            return
+
+        updated = datetime.fromtimestamp(summary['updated_at']).strftime('%Y-%m-%d %H:%M:%S')
+        queued, failed = summary[STATE_QUEUED], summary[STATE_FAILED]
+        msg_box = QtWidgets.QMessageBox(self)
+        msg_box.setWindowTitle('继续下载')
+        msg_box.setText(
+            f"检测到上次未完成的下载（{updated}）：\n"
+            f"目录: {summary['base_folder']}\n"
+            f"已完成 {summary[STATE_DONE]} 个，未完成 {queued} 个，失败 {failed} 个。\n\n"
+            f"已完成的文件不会重新下载。"
+        )
+        resume_button = msg_box.addButton('继续未完成', QtWidgets.QMessageBox.ButtonRole.AcceptRole) if queued else None
+        retry_button = msg_box.addButton('重试失败', QtWidgets.QMessageBox.ButtonRole.AcceptRole) if failed else None
+        dismiss_button = msg_box.addButton('忽略', QtWidgets.QMessageBox.ButtonRole.DestructiveRole)
+        msg_box.addButton('稍后', QtWidgets.QMessageBox.ButtonRole.RejectRole)
+        msg_box.exec()
+
+        clicked = msg_box.clickedButton()
+        if clicked is None:
+            return
+        if clicked is dismiss_button:
+            try:
+                self.worker.journal.set_job_status(summary['job_id'], JOB_DISMISSED)
+            except Exception as e:
+                self.append_log(f'[警告] 下载任务日志写入失败: {e}')
+        elif clicked is resume_button or clicked is retry_button:
+            retry = clicked is retry_button
+            self._begin_download(self.worker.resume_job, (summary['job_id'], retry), failed if retry else queued)
+
     def on_fetch_finished(self):
         """获取完成处理（用于自动全选 和 保存用户）"""
         try:
@@ -1181,7 +1357,7 @@ class MainWindow(QtWidgets.QMainWindow):
             try:
                 for i in range(self.tree.topLevelItemCount()):
                     it = self.tree.topLevelItem(i)
-                    if it:
+                    if it and it.data(0, Qt.ItemDataRole.UserRole):  # 跳过暂存模式的说明行
                         it.setCheckState(0, Qt.CheckState.Checked)
                         it.setSelected(True)
             finally:
@@ -1199,7 +1375,7 @@ class MainWindow(QtWidgets.QMainWindow):
             try:
                 for i in range(self.tree.topLevelItemCount()):
                     it = self.tree.topLevelItem(i)
-                    if it:
+                    if it and it.data(0, Qt.ItemDataRole.UserRole):
                         current_state = it.checkState(0)
                         new_state = Qt.CheckState.Unchecked if current_state == Qt.CheckState.Checked else Qt.CheckState.Checked
                         it.setCheckState(0, new_state)
@@ -1234,6 +1410,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self.itasks = []
             self.all_awemes = []  # 同时清空aweme数据
             self.current_nickname = ''
+            self.current_sec_user_id = ''
             self.progress.setValue(0)
             self.progress.hide()
             
@@ -1243,6 +1420,40 @@ class MainWindow(QtWidgets.QMainWindow):
         
         self.append_log('[信息] 已清空当前列表')
 
+    def _show_pause_button(self, visible):
+        """下载进行中显示暂停按钮；隐藏时恢复为未暂停状态"""
+        if not visible:
+            self.worker.resume_download()
+        self.pause_btn.setText('暂停下载')
+        self.pause_btn.setVisible(visible)
+        if visible:
+            self.limit_spin.blockSignals(True)
+            self.limit_spin.setValue(int(cfg.get('bandwidth_limit_kb', 0)))
+            self.limit_spin.blockSignals(False)
+        self.limit_spin.setVisible(visible)
+
+    def on_limit_changed(self, value):
+        """下载中修改全局限速：保存设置并立即应用到进行中的下载"""
+        cfg['bandwidth_limit_kb'] = int(value)
+        try:
+            save_config(cfg)
+        except Exception as e:
+            self.append_log(f'[警告] 保存设置失败: {e}')
+        configure_bandwidth(cfg)
+        rate = bandwidth_limiter.current_rate()
+        self.append_log(f'[信息] 当前全局限速 {rate // 1024} KB/s' if rate else '[信息] 当前不限速')
+
+    def on_pause(self):
+        """暂停 / 继续下载"""
+        if self.worker._pause_requested:
+            self.worker.resume_download()
+            self.pause_btn.setText('暂停下载')
+            self.append_log('[信息] 继续下载')
+        else:
+            self.worker.pause_download()
+            self.pause_btn.setText('继续下载')
+            self.append_log('[信息] 已暂停下载（已下载部分保留，继续后断点续传）')
+
     def on_worker_finished(self):
         """工作线程完成处理（Fetch 或 Download）"""
         self.url_label_btn.setEnabled(True)
@@ -1259,6 +1470,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.fetch_btn.setText('获取作品')
         self.like_checkbox.setEnabled(True)
         self.download_btn.setText('开始下载')
+        self._show_pause_button(False)
         
         # 设置 "running" 属性为 False，QSS会自动应用蓝色样式
         self.fetch_btn.setProperty("running", False)
@@ -3,10 +3,13 @@
 """
 后台工作线程（用于 Fetch 和 Download）
 """
+import itertools
 import os
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 import requests
 from requests.adapters import HTTPAdapter
@@ -16,10 +19,13 @@ except ImportError:
     print("[错误] PyQt6 未安装或无法导入: \n请安装 PyQt6 后重试（pip install PyQt6）。")
     sys.exit(1)
 from douyin_downloader.constants import (
-    TEXT_INFO_FETCH_PAGE, PAGE_COUNT_PER_REQUEST, MAX_RETRY_DELAY
+    TEXT_INFO_FETCH_PAGE, TEXT_INFO_FETCH_DEDUP, TEXT_INFO_FETCH_DEDUP_TOTAL,
+    PAGE_COUNT_PER_REQUEST, DEFAULT_THREAD_COUNT, AUTO_DOWNLOAD_QUEUE_SIZE,
+    AUTO_THREAD_MIN, DEFAULT_AUTO_THREAD_MAX,
+    AIOHTTP_AVAILABLE, DOWNLOAD_ENGINE_THREAD, DOWNLOAD_ENGINE_ASYNC, DEFAULT_ASYNC_CONCURRENCY
 )
 from douyin_downloader.utils.file_utils import (
-    build_expected_filename, clear_directory_cache
+    clear_directory_cache, build_user_folder, safe_mkdir
 )
 from urllib.parse import quote, urlencode
 from douyin_downloader.core.api import (
@@ -28,9 +34,32 @@ from douyin_downloader.core.api import (
 )
 from douyin_downloader.core.abogus import ABogus
 from douyin_downloader.core.parser import parse_all_awemes_to_tasks
-from douyin_downloader.core.downloader import download_single_file
+from douyin_downloader.core.record import build_aweme_record
+from douyin_downloader.core.task import TaskKind
+from douyin_downloader.core.quality import VideoQualityPolicy, ImageQualityPolicy
+from douyin_downloader.core.mirrors import MirrorScoreboard, host_of
+from douyin_downloader.core.hedge import HedgeController
+from douyin_downloader.core.concurrency import ConcurrencyTuner
+from douyin_downloader.core.scheduler import LaneScheduler
+from douyin_downloader.core.retry import RetryTracker
+from douyin_downloader.core.progress import download_progress, ProgressReporter, format_lanes
+from douyin_downloader.core.timeouts import inflight_responses
+from douyin_downloader.core.bandwidth import bandwidth_limiter, configure_from_config as configure_bandwidth
+from douyin_downloader.core.async_downloader import run_async_downloads
+from douyin_downloader.core.store import MetadataStore
+from douyin_downloader.core.journal import DownloadJournal, JobRecorder, STATE_QUEUED, STATE_FAILED
+from douyin_downloader.core.manifest import FolderManifest
+from douyin_downloader.core.naming import FilenamePlanner, age_key
+from douyin_downloader.core.spool import PageSpool
+from douyin_downloader.gui import cfg
+from douyin_downloader.core.downloader import download_single_file, apply_download_settings
 from douyin_downloader.core.exporter import generate_excel_file
 
+# 边获取边下载队列的结束标记
+_QUEUE_END = object()
+# 下载任务来源耗尽时 next() 的返回值
+_SOURCE_END = object()
+
 
 class Worker(QtCore.QObject):
     """
@@ -38,7 +67,9 @@ class Worker(QtCore.QObject):
     """
     log_signal = QtCore.pyqtSignal(str)
     progress_signal = QtCore.pyqtSignal(int, int)
+    transfer_progress_signal = QtCore.pyqtSignal(object)  # DownloadProgress.snapshot()，每 PROGRESS_INTERVAL 秒
     tasks_signal = QtCore.pyqtSignal(object, object, object, object)
+    spool_signal = QtCore.pyqtSignal(object, object)  # 磁盘暂存模式下代替 tasks_signal：(user_info, PageSpool)
     fetch_finished = QtCore.pyqtSignal()
     download_finished = QtCore.pyqtSignal()
     export_finished_signal = QtCore.pyqtSignal(str)
@@ -55,56 +86,134 @@ class Worker(QtCore.QObject):
         self._failed_tasks = []
         self._completed_tasks = []
         self._total_received = 0
+        self._total_duplicates = 0
         self.all_awemes = []
+        self._spool = None
+        self.current_sec_user_id = ''
+        self.store = MetadataStore()
+        self.journal = DownloadJournal()
+        self.mirrors = MirrorScoreboard()
         self.session = requests.Session()
         self.session.headers.update({'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.6261.95 Safari/537.36'})
-        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
-        self.session.mount('https://', adapter)
-        self.session.mount('http://', adapter)
+        self._pool_maxsize = 0
+        self._ensure_pool_size(20)
         self.abogus = ABogus()
 
         
+    def _ensure_pool_size(self, size):
+        """连接池不小于 size（并发超过连接池大小时多出的连接用完即关闭，无法复用）"""
+        if size <= self._pool_maxsize:
+            return
+        self._pool_maxsize = size
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
     def should_stop_download(self):
         """检查是否应该停止下载"""
         return getattr(self, '_download_stop_requested', False)
+
+    def should_interrupt_download(self):
+        """进行中的传输是否应中断（暂停或停止）；暂停时 .tmp 保留，继续后按 Range 续传"""
+        return self._pause_requested or self._download_stop_requested
+
+    def pause_download(self):
+        """暂停下载：关闭进行中的连接（释放连接与带宽），下载线程等待继续"""
+        self._pause_requested = True
+        inflight_responses.abort_all()
+
+    def resume_download(self):
+        """继续已暂停的下载"""
+        self._pause_requested = False
+
+    def stop_download(self):
+        """停止下载：关闭进行中的连接，使阻塞在读取中的线程立即返回"""
+        self._download_stop_requested = True
+        inflight_responses.abort_all()
+
+    def wait_while_paused(self):
+        """暂停时等待继续；返回 False 表示已停止"""
+        while self._pause_requested:
+            if self.should_stop_download():
+                return False
+            time.sleep(0.1)
+        return not self.should_stop_download()
+
+    def _sleep_unless_stopped(self, seconds):
+        """可被停止打断的等待；返回 False 表示已停止"""
+        deadline = time.monotonic() + seconds
+        while not self.should_stop_download():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            time.sleep(min(remaining, 0.1))
+        return False
     
     def is_download_stopped(self):
         """检查下载是否已被用户停止"""
         return getattr(self, '_download_stop_requested', False)
 
+    def _store_call(self, func, *args):
+        """调用元数据库写入，失败时仅记录警告，不影响获取流程"""
+        try:
+            func(*args)
+            return True
+        except Exception as e:
+            self.log_signal.emit(f"[警告] 本地作品库写入失败: {e}")
+            return False
+
     @staticmethod
-    def _trim_aweme_for_storage(aweme):
-        """精简 aweme 数据，仅保留 Excel 导出需要的字段"""
-        return {
-            'desc': aweme.get('desc', ''),
-            'create_time': aweme.get('create_time', 0),
-            'aweme_id': aweme.get('aweme_id', ''),
-            'statistics': aweme.get('statistics', {}),
-            'mix_info': aweme.get('mix_info'),
-            'mix_name': aweme.get('mix_name'),
-            'images': aweme.get('images') is not None,
-            'video': {'duration': (aweme.get('video') or {}).get('duration', 0)},
-            'author': aweme.get('author'),
-        }
+    def _aweme_key(aweme_id):
+        """去重键：纯数字 aweme_id 转为 int，比字符串更省内存"""
+        if aweme_id and aweme_id.isdigit():
+            return int(aweme_id)
+        return aweme_id
+
+    def _dedup_page(self, aweme_list, seen_ids):
+        """去除本页内及与之前页重复的作品，返回 (保留列表, 重复数)"""
+        kept = []
+        for aweme in aweme_list:
+            if not isinstance(aweme, dict):
+                continue
+            key = self._aweme_key(str(aweme.get('aweme_id') or ''))
+            if key:
+                if key in seen_ids:
+                    continue
+                seen_ids.add(key)
+            kept.append(aweme)
+        return kept, len(aweme_list) - len(kept)
 
     def _is_my_fetch(self, gen):
         """检查当前线程的 fetch 代际是否仍然有效"""
         return self._fetch_generation == gen
 
-    def fetch_tasks(self, url, cookie, fetch_mode='post'):
+    def _close_spool(self):
+        """停止向上一次获取的暂存文件追加（旧的获取线程可能仍在运行）"""
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    def fetch_tasks(self, url, cookie, fetch_mode='post', resume=None):
         """
         获取用户作品列表（在单独线程中运行）。
         采用分页增量方式，每获取一页就通过 tasks_signal 发回 GUI。
+        开启磁盘暂存（spool_raw_pages）时原始分页写入 PageSpool，内存与 GUI 中不保留作品与任务，
+        每页只通过 spool_signal 通知 GUI 暂存进度。
         fetch_mode: 'post' 获取主页作品, 'favorite' 获取点赞作品
+        resume: True 从断点继续, False 重新获取, None 存在断点时自动继续
         """
         # 递增代际，使旧 fetch 线程失效
         self._fetch_generation += 1
         my_gen = self._fetch_generation
+        pipeline = None
 
         try:
             # 在当前线程内清理共享状态（避免依赖主线程）
+            self._close_spool()
             self.all_awemes = []
             self._total_received = 0
+            self._total_duplicates = 0
+            seen_ids = set()
 
             headers = {'Cookie': cookie, 'Referer': url}
             self.session.headers.update(headers)
@@ -131,10 +240,65 @@ class Worker(QtCore.QObject):
             nickname = profile.get('nickname', '') or ''
             unique_id = profile.get('unique_id', '') or ''
             if self._is_my_fetch(my_gen):
+                self.current_sec_user_id = sec
                 self.log_signal.emit(f"[信息] 抖音用户: {nickname}")
 
+            user_info = f"{nickname}|{unique_id}"
+
+            # 断点续取：resume=None 时存在断点即自动续取
+            checkpoint = None
+            if resume is not False:
+                try:
+                    checkpoint = self.store.get_checkpoint(sec, fetch_mode)
+                except Exception as e:
+                    self.log_signal.emit(f"[警告] 读取获取断点失败: {e}")
+            store_ok = self._store_call(self.store.begin_list, sec, fetch_mode, nickname, unique_id, bool(checkpoint))
+
+            # 暂存模式：原始分页压缩写入磁盘，内存中只保留分页索引
+            spool = None
+            if cfg.get('spool_raw_pages', False) and self._is_my_fetch(my_gen):
+                try:
+                    resume_pages = checkpoint['page'] - 1 if checkpoint else None
+                    spool = PageSpool.for_user(sec, fetch_mode, resume_pages=resume_pages)
+                    self._spool = self.all_awemes = spool
+                    self.log_signal.emit(f"[信息] 已启用磁盘暂存（列表只显示数量，开始下载时下载全部作品）: {spool.path}")
+                except Exception as e:
+                    self.log_signal.emit(f"[警告] 创建暂存文件失败，改为内存模式: {e}")
+
+            video_policy = VideoQualityPolicy.from_config(cfg)
+            if not video_policy.is_default:
+                self.log_signal.emit(f"[信息] 视频画质: {video_policy.describe()}")
+            image_policy = ImageQualityPolicy.from_config(cfg)
+            if not image_policy.is_default:
+                self.log_signal.emit(f"[信息] 图片: {image_policy.describe()}")
+
+            # 边获取边下载：每页任务直接进入下载队列
+            pipeline = self._start_auto_download(nickname, unique_id, fetch_mode)
+
             page = 1
             max_cursor = 0
+            completed = False
+
+            if checkpoint:
+                page = checkpoint['page']
+                max_cursor = checkpoint['max_cursor']
+                self.log_signal.emit(
+                    f"[信息] 从断点继续获取：第 {page} 页，已接收 {checkpoint['received']} 个作品"
+                )
+                # 已接收的数据从本地作品库载入，不再重复请求
+                for batch in self.store.iter_record_batches(sec, fetch_mode):
+                    if not self._is_my_fetch(my_gen):
+                        return
+                    vtasks, itasks, _, _, _ = parse_all_awemes_to_tasks(batch, video_policy, image_policy)
+                    seen_ids.update(self._aweme_key(rec.aweme_id) for rec in batch if rec.aweme_id)
+                    self._total_received += len(batch)
+                    if spool is None:
+                        self.all_awemes.extend(batch)
+                        self.tasks_signal.emit(vtasks, itasks, user_info, batch)
+                    if pipeline is not None:
+                        self._feed_auto_download(pipeline, vtasks, itasks)
+                if spool:
+                    self.spool_signal.emit(user_info, spool)
 
             while True:
                 if getattr(self, '_fetch_stop_requested', False):
@@ -170,27 +334,50 @@ class Worker(QtCore.QObject):
 
                 aweme_list = data.get('aweme_list', []) or []
                 if not aweme_list:
+                    completed = True
                     break
 
-                vtasks, itasks, _, _, _ = parse_all_awemes_to_tasks(aweme_list)
+                # 跨页去重（置顶作品、游标重叠），在构建任务之前丢弃重复项
+                aweme_list, dup_count = self._dedup_page(aweme_list, seen_ids)
+                if dup_count:
+                    self._total_duplicates += dup_count
+                    if self._is_my_fetch(my_gen):
+                        self.log_signal.emit(TEXT_INFO_FETCH_DEDUP.format(page=page, dup=dup_count))
+
+                # 逐页构建精简记录，原始 JSON 随本页一起释放（暂存模式下先写入磁盘）
+                records = [build_aweme_record(a) for a in aweme_list]
+                max_cursor = data.get('max_cursor', 0)
+                has_more = data.get('has_more', 0) == 1
+
+                vtasks, itasks, _, _, _ = parse_all_awemes_to_tasks(records, video_policy, image_policy)
 
                 if not self._is_my_fetch(my_gen):
                     return
-                self.all_awemes.extend(aweme_list)
+                if spool is None:
+                    self.all_awemes.extend(records)
+                elif not spool.append_page(aweme_list, sum(1 for rec in records if not rec.is_images)):
+                    return  # 已被新的获取取代
+                del data, aweme_list
+                if store_ok:
+                    # 本页数据与断点（下一页游标/页码/已接收数）在同一事务中写入
+                    next_checkpoint = (max_cursor, page + 1, self._total_received + len(records))
+                    store_ok = self._store_call(self.store.save_records, sec, fetch_mode, records, next_checkpoint)
 
-                if self._is_my_fetch(my_gen):
+                if self._is_my_fetch(my_gen) and records:
                     try:
-                        user_info = f"{nickname}|{unique_id}"
-                        self.tasks_signal.emit(vtasks, itasks, user_info, aweme_list)
+                        if spool is None:
+                            self.tasks_signal.emit(vtasks, itasks, user_info, records)
+                        else:
+                            self.spool_signal.emit(user_info, spool)
                     except Exception as e:
                         self.log_signal.emit(f"[警告] tasks_signal.emit 失败: {e}")
 
                 if self._is_my_fetch(my_gen):
-                    self._total_received += len(aweme_list)
-                    self.log_signal.emit(TEXT_INFO_FETCH_PAGE.format(page=page, count=len(aweme_list), total=self._total_received))
+                    self._total_received += len(records)
+                    self.log_signal.emit(TEXT_INFO_FETCH_PAGE.format(page=page, count=len(records), total=self._total_received))
+                    if pipeline is not None:
+                        self._feed_auto_download(pipeline, vtasks, itasks)
 
-                max_cursor = data.get('max_cursor', 0)
-                has_more = data.get('has_more', 0) == 1
                 page += 1
                 
                 # 自适应延迟：根据响应时间调整等待
@@ -199,17 +386,71 @@ class Worker(QtCore.QObject):
                 time.sleep(adaptive_delay)
                 
                 if not has_more:
+                    completed = True
                     break
             
-            # 精简 aweme 数据（仅当前代际有效）
+            if completed:
+                self._store_call(self.store.clear_checkpoint, sec, fetch_mode)
             if self._is_my_fetch(my_gen):
-                self.all_awemes = [self._trim_aweme_for_storage(a) for a in self.all_awemes]
+                if self._total_duplicates:
+                    self.log_signal.emit(TEXT_INFO_FETCH_DEDUP_TOTAL.format(dup=self._total_duplicates))
                 self.log_signal.emit('[完成] 获取完成')
 
         except Exception as e:
             if self._is_my_fetch(my_gen):
                 self.log_signal.emit(f"[错误] 获取异常: {e}")
         finally:
+            if self._is_my_fetch(my_gen):
+                try:
+                    self.fetch_finished.emit()
+                except Exception:
+                    pass
+            # 列表获取完成后等待剩余下载结束，再通知工作线程完成
+            if pipeline is not None:
+                self._finish_auto_download(pipeline)
+            self.store.close()  # 关闭本线程的作品库连接
+            self.journal.close()  # 边获取边下载时本线程创建并结束了下载任务
+            if self._is_my_fetch(my_gen):
+                self.finished.emit()
+
+    def load_from_store(self, sec_user_id, fetch_mode='post'):
+        """
+        从本地作品库重新打开用户列表（在单独线程中运行）。
+        分批读取并通过 tasks_signal 发回 GUI，流程与 fetch_tasks 一致，无需网络请求。
+        """
+        self._fetch_generation += 1
+        my_gen = self._fetch_generation
+
+        try:
+            self._close_spool()
+            self.all_awemes = []
+            self._total_received = 0
+
+            info = self.store.get_user(sec_user_id, fetch_mode)
+            if not info or not info['count']:
+                self.log_signal.emit('[错误] 本地作品库中没有该用户的数据，请先获取作品')
+                return
+
+            self.current_sec_user_id = sec_user_id
+            user_info = f"{info['nickname']}|{info['unique_id']}"
+            video_policy = VideoQualityPolicy.from_config(cfg)
+            image_policy = ImageQualityPolicy.from_config(cfg)
+            for batch in self.store.iter_record_batches(sec_user_id, fetch_mode):
+                if not self._is_my_fetch(my_gen):
+                    return
+                vtasks, itasks, _, _, _ = parse_all_awemes_to_tasks(batch, video_policy, image_policy)
+                self.all_awemes.extend(batch)
+                self._total_received += len(batch)
+                self.tasks_signal.emit(vtasks, itasks, user_info, batch)
+
+            if self._is_my_fetch(my_gen):
+                self.log_signal.emit(f"[完成] 已从本地作品库载入 {self._total_received} 个作品")
+
+        except Exception as e:
+            if self._is_my_fetch(my_gen):
+                self.log_signal.emit(f"[错误] 读取本地作品库失败: {e}")
+        finally:
+            self.store.close()
             if self._is_my_fetch(my_gen):
                 try:
                     self.fetch_finished.emit()
@@ -217,108 +458,412 @@ class Worker(QtCore.QObject):
                     pass
                 self.finished.emit()
 
-    def _download_with_retry(self, task, base_folder, is_image, max_retries, session):
+    def _download_round(self, task, base_folder, is_image, attempt, session, options=None):
+        """
+        下载任务的一轮尝试（在下载线程中运行，失败后不等待）：
+        按镜像评分依次尝试第 attempt 个码率的全部 CDN 镜像（镜像之间不等待；已是最后一个码率时沿用该码率）。
+        暂停时传输中断并在本线程等待继续，之后从 .tmp 续传同一链接（不算一轮）。
+        返回 (相对路径 / None / "__STOPPED__", 失败原因)；退避等待与重试由 RetryTracker 与调度器负责。
+        options 为 _download_options() 返回的下载选项，原样传给 download_single_file。
+        """
+        options = options or {}
+        rate_urls = task.rate_urls
+        rate_idx = min(attempt, len(rate_urls) - 1)
+        if attempt > 0 and rate_idx == attempt:
+            self.log_signal.emit(f"[信息] {task.desc} 尝试第{rate_idx + 1}个码率")
+
+        reason = ''
+        for mirror_idx, url in enumerate(self.mirrors.order(rate_urls[rate_idx])):
+            if self.should_stop_download():
+                return "__STOPPED__", ''
+            if mirror_idx > 0:
+                self.log_signal.emit(f"[信息] {task.desc} 切换镜像: {host_of(url)}")
+            task.url = url
+            while True:
+                if not self.wait_while_paused():
+                    return "__STOPPED__", ''
+                try:
+                    result = download_single_file(task, base_folder, is_image, self, session, self.mirrors,
+                                                  **options)
+                except Exception as e:
+                    if "下载被用户终止" in str(e):
+                        return "__STOPPED__", ''
+                    result, reason = None, str(e)
+                if result or not self._pause_requested:
+                    break
+            if result:
+                if attempt > 0 or mirror_idx > 0:
+                    print(f"[重试成功] {task.desc} (第 {attempt + 1} 轮, 镜像 {host_of(url)})")
+                return result, ''
+        if self.should_stop_download():
+            return "__STOPPED__", ''
+        return None, reason
+
+    @staticmethod
+    def _download_options():
+        """由配置构建本次下载的选项（download_single_file 的关键字参数）"""
+        try:
+            min_speed = int(cfg.get('stall_min_speed_kb', 8) or 0) * 1024
+            segments = int(cfg.get('segment_count', 4)) if cfg.get('segmented_download', False) else 1
+            segment_threshold = int(cfg.get('segment_threshold_mb', 20)) * 1024 * 1024
+            write_buffer = max(0, int(cfg.get('write_buffer_kb', 0) or 0)) * 1024
+        except (TypeError, ValueError):
+            min_speed, segments, segment_threshold, write_buffer = 0, 1, 0, 0
+        return {
+            'hedger': HedgeController() if cfg.get('hedge_requests', False) else None,
+            'min_speed': min_speed,
+            'segments': segments,
+            'segment_threshold': segment_threshold,
+            'write_buffer': write_buffer,
+        }
+
+    def _apply_bandwidth_limit(self):
+        """按配置设置带宽限制（下载过程中在主窗口的限速框修改会立即生效）"""
+        error = configure_bandwidth(cfg)
+        if error:
+            self.log_signal.emit(f"[警告] {error}，已忽略限速时段")
+        rate = bandwidth_limiter.current_rate()
+        if rate:
+            self.log_signal.emit(f"[信息] 当前全局限速 {rate // 1024} KB/s")
+
+    def _load_manifest(self, folder):
+        """读取下载目录的已下载清单并遍历目录（每次下载一次）"""
+        return FolderManifest.load(
+            folder, lambda e: self.log_signal.emit(f"[警告] 已下载清单写入失败，本次不再记录: {e}"))
+
+    def _check_existing(self, tasks, is_image, manifest, results_success_files):
         """
-        带重试机制的下载函数，视频任务依次尝试不同码率
+        按已下载清单跳过已存在的文件，返回待下载的 (task, is_image) 列表；用户终止时返回 None。
+        按 FilenamePlanner 分配文件名的顺序查找，清单丢失时同名作品各自找回带后缀的文件。
         """
-        is_video_task = not is_image and 'aweme' in task
-
-        bitrate_urls = []
-        if is_video_task:
-            aweme_data = task.get('aweme', {})
-            video_info = aweme_data.get('video', {})
-            rates = video_info.get('bit_rate', [])
-            if rates:
-                sorted_rates = sorted(rates, key=lambda x: x.get('bit_rate', 0), reverse=True)
-                for rate_info in sorted_rates:
-                    url_list = rate_info.get('play_addr', {}).get('url_list', [])
-                    if url_list:
-                        bitrate_urls.append(url_list[0])
-
-        for attempt in range(max_retries + 1):
+        pending = []
+        for t in sorted(tasks, key=age_key):
             if self.should_stop_download():
-                return "__STOPPED__"
+                return None
 
-            if attempt > 0 and attempt <= len(bitrate_urls):
-                task['url'] = bitrate_urls[attempt - 1]
-                self.log_signal.emit(f"[信息] {task['desc']} 尝试第{attempt + 1}个码率")
+            # 清单按媒体标识查找（与扩展名无关），图片格式偏好变更后不重复下载；
+            # 清单中没有记录的旧文件按 FilenamePlanner 的候选文件名查找
+            expected = manifest.find(t, is_image)
+            if expected:
+                self.log_signal.emit(f"[跳过] 已存在: {expected}")
+                results_success_files.add(expected)
+                rec = {'task': t, 'is_image': is_image, 'path': expected}
+                self._completed_tasks.append(rec)
+            else:
+                pending.append((t, is_image))
+        return pending
 
-            try:
-                result = download_single_file(task, base_folder, is_image, self, session)
-                if result:
-                    if attempt > 0:
-                        print(f"[重试成功] {task['desc']} (尝试 {attempt + 1} 次)")
-                    return result
-
-                if self.should_stop_download():
-                    return "__STOPPED__"
-
-                if attempt < max_retries:
-                    delay = min(2 ** attempt, MAX_RETRY_DELAY)
-                    time.sleep(delay)
-                    if self.should_stop_download():
-                        return "__STOPPED__"
-            except Exception as e:
-                if "下载被用户终止" in str(e):
-                    return "__STOPPED__"
-
-                if attempt < max_retries:
-                    delay = min(2 ** attempt, MAX_RETRY_DELAY)
-                    time.sleep(delay)
+    def _record_download_result(self, t, is_img, result, results_success_files, counters, total, job=None,
+                                manifest=None, retry=None):
+        """
+        处理单个任务的最终下载结果（线程池与异步引擎共用）；
+        job 为 JobRecorder 时同时写入下载任务日志，manifest 为 FolderManifest 时记录下载完成的文件，
+        retry 为 RetryTracker 时失败日志附带每轮尝试的记录。
+        """
+        if result == "__STOPPED__":
+            return
+        download_progress.finish(t, bool(result))
+        history = retry.describe(t) if retry is not None and not result else ''
+        attempts = retry.finish(t, bool(result)) if retry is not None else 1
+        if manifest is not None and result:
+            manifest.record(t, result)
+        if job is not None:
+            if result:
+                job.done(t, result, attempts)
+            else:
+                job.failed(t, attempts)
+        if result:
+            results_success_files.add(result)
+            rec = {'task': t, 'is_image': is_img, 'path': result}
+            self._completed_tasks.append(rec)
+            counters['done'] += 1
+            self.log_signal.emit(f"[完成] {result}")
+
+            done, cur_total = counters['done'], total or counters['submitted']
+            if done % 5 == 0 or done == cur_total:
+                self.progress_signal.emit(done, cur_total)
+        else:
+            self.log_signal.emit(f"[失败] {t.desc} - URL: {t.url}" + (f"（{history}）" if history else ''))
+            self._failed_tasks.append(t)
+            counters['failed'] += 1
+
+    def _use_async_engine(self):
+        """配置选择异步引擎且 aiohttp 可用"""
+        if cfg.get('download_engine', DOWNLOAD_ENGINE_THREAD) != DOWNLOAD_ENGINE_ASYNC:
+            return False
+        if not AIOHTTP_AVAILABLE:
+            self.log_signal.emit('[警告] 未安装 aiohttp，使用线程池下载（pip install aiohttp）')
+            return False
+        return True
+
+    @staticmethod
+    def _video_lane_limit(threads):
+        """视频通道的并发上限：配置为 0 时取线程数的一半"""
+        try:
+            limit = int(cfg.get('video_lane_threads', 0) or 0)
+        except (TypeError, ValueError):
+            limit = 0
+        return limit if limit > 0 else max(1, threads // 2)
+
+    @staticmethod
+    def _concurrency_tuner(threads):
+        """自动并发开启时按配置的上限创建调节器（初始值为线程数），否则返回 None"""
+        if not cfg.get('auto_threads', False):
+            return None
+        try:
+            maximum = int(cfg.get('auto_threads_max', DEFAULT_AUTO_THREAD_MAX) or DEFAULT_AUTO_THREAD_MAX)
+        except (TypeError, ValueError):
+            maximum = DEFAULT_AUTO_THREAD_MAX
+        return ConcurrencyTuner(AUTO_THREAD_MIN, maximum, threads)
+
+    def _run_download_pool(self, task_source, base_folder, threads, results_success_files, total=None, job=None,
+                           manifest=None):
+        """
+        执行下载（参数与返回值同 _schedule_downloads），期间按字节汇总进度：
+        transfer_progress_signal 定时发出 download_progress 的快照（吞吐、剩余时间、分通道统计），
+        结束时记录各通道的文件数、大小与平均吞吐。任务需由调用方先登记到 download_progress（reset / queue）。
+        """
+        reporter = ProgressReporter(download_progress, self.transfer_progress_signal.emit).start()
+        try:
+            ok = self._schedule_downloads(task_source, base_folder, threads, results_success_files, total, job,
+                                          manifest)
+        finally:
+            reporter.stop()
+        snapshot = download_progress.snapshot()
+        if snapshot['received']:
+            self.log_signal.emit(f"[信息] 下载统计：{format_lanes(snapshot, average=True)}，"
+                                 f"共接收 {snapshot['received'] / 1024 / 1024:.1f} MB，用时 {snapshot['elapsed']:.0f} 秒")
+        return ok
+
+    def _schedule_downloads(self, task_source, base_folder, threads, results_success_files, total=None, job=None,
+                            manifest=None):
+        """
+        按通道调度下载任务到线程池（或异步引擎）。
+        task_source 逐个产出 (task, is_image)；产出 None 表示暂时没有新任务（边获取边下载），
+        此时只处理已完成的任务。最多预读 threads * 16 个任务到调度器，由 LaneScheduler 决定派发顺序：
+        视频与图片/实况图分通道限制并发，通道内小文件优先。
+        开启自动并发时线程池按上限创建，由 ConcurrencyTuner 根据吞吐与限流/失败情况调整调度器的并发数。
+        total 为 None 时进度总数取已提交任务数（随获取增长）。job 为 JobRecorder 时记录每个任务的结果，
+        manifest 为 FolderManifest 时记录下载完成的文件。
+        每个下载线程只执行一轮尝试；失败的任务由 RetryTracker 决定退避时间后放入调度器的延迟队列，
+        线程立即处理其他任务（重试总数受本次下载的重试预算限制）。
+        返回 False 表示被用户终止。
+        """
+        threads = max(1, threads)
+        lookahead = threads * 16
+        options = self._download_options()
+        hedger = options['hedger']
+        self._apply_bandwidth_limit()
+        pending = {}
+        counters = {'done': 0, 'submitted': 0, 'failed': 0, 'retried': 0}
+        retry = RetryTracker(on_exhausted=lambda: self.log_signal.emit(
+            '[警告] 本次下载的重试次数已用完，之后失败的任务不再自动重试（可稍后重试失败的任务）'))
+
+        def handle(finished):
+            for future in finished:
+                t, is_img = item = pending.pop(future)
+                scheduler.release(item)
+                try:
+                    result, reason = future.result()
+                except Exception as e:
+                    result, reason = None, str(e)
+                if result is None:
+                    delay = retry.failed(t, t.url, reason)
+                    if delay is not None:
+                        download_progress.defer(t)
+                        scheduler.defer(item, delay)
+                        counters['retried'] += 1
+                        continue
+                self._record_download_result(t, is_img, result, results_success_files, counters, total, job,
+                                             manifest, retry)
+            return not self.should_stop_download()
+
+        if self._use_async_engine():
+            if not self._run_async_downloads(task_source, base_folder, retry, results_success_files,
+                                             counters, total, job, manifest):
+                return False
+        else:
+            tuner = self._concurrency_tuner(threads)
+            limit = max_workers = threads
+            if tuner is not None:
+                limit, max_workers = tuner.limit, tuner.maximum
+                lookahead = max_workers * 16
+                self.log_signal.emit(f"[信息] 自动并发：初始 {limit}，范围 {tuner.minimum}-{tuner.maximum}")
+            self._ensure_pool_size(max_workers)
+            scheduler = LaneScheduler(limit, self._video_lane_limit(limit))
+            source = iter(task_source)
+            exhausted = False
+            with ThreadPoolExecutor(max_workers=max_workers) as ex:
+                while True:
                     if self.should_stop_download():
-                        return "__STOPPED__"
-                else:
-                    return None
-        return None
+                        return False
+
+                    # 预读任务到调度器；产出 None（暂无新任务）时不等待，先处理已完成的任务
+                    idle = False
+                    while not exhausted and scheduler.waiting < lookahead:
+                        item = next(source, _SOURCE_END)
+                        if item is _SOURCE_END:
+                            exhausted = True
+                            scheduler.close()
+                        elif item is None:
+                            idle = True
+                        else:
+                            scheduler.push(item)
+                            counters['submitted'] += 1
+                            retry.submit()
+                            continue
+                        break
+
+                    if self._pause_requested:
+                        if not self.wait_while_paused():
+                            return False
+                        if tuner is not None:
+                            tuner.restart()  # 暂停期间没有吞吐，不计入评估
+
+                    if tuner is not None:
+                        # 有等待派发的任务时吞吐才受并发数限制；等待重试的失败也计入失败率
+                        change = tuner.adjust(counters['done'], counters['failed'] + counters['retried'],
+                                              scheduler.waiting > 0)
+                        if change:
+                            limit, reason = change
+                            scheduler.set_limits(limit, self._video_lane_limit(limit))
+                            self.log_signal.emit(f"[信息] 自动并发调整为 {limit}（{reason}）")
+
+                    item = scheduler.next_ready()
+                    while item is not None:
+                        t, is_img = item
+                        future = ex.submit(self._download_round, t, base_folder, is_img, retry.attempts(t),
+                                           self.session, options)
+                        pending[future] = item
+                        item = scheduler.next_ready()
+
+                    due = scheduler.next_due()
+                    if not pending:
+                        if exhausted and not scheduler.waiting and due is None:
+                            break
+                        # 只剩等待重试的任务：等到最早的一个到期
+                        if due is not None and not idle and not self._sleep_unless_stopped(min(due, 1.0)):
+                            return False
+                        continue
+                    # 还能继续预读时不阻塞；否则等待至少一个任务完成或延迟重试的任务到期
+                    # （自动并发时最多等待 1 秒以便按时评估）
+                    timeout = 0 if idle else (1.0 if tuner is not None else None)
+                    if due is not None:
+                        timeout = due if timeout is None else min(timeout, due)
+                    finished, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                    if finished and not handle(finished):
+                        return False
+            if tuner is not None:
+                self.log_signal.emit(f"[信息] 自动并发结束于 {tuner.limit}，"
+                                     f"峰值吞吐 {tuner.peak_rate / 1024 / 1024:.1f} MB/s")
+
+        final_total = total or counters['submitted']
+        if final_total:
+            self.progress_signal.emit(final_total, final_total)
+        if hedger is not None and hedger.summary():
+            self.log_signal.emit(hedger.summary())
+        return True
+
+    def _run_async_downloads(self, task_source, base_folder, retry, results_success_files, counters, total,
+                             job=None, manifest=None):
+        """
+        异步引擎：在本线程运行 aiohttp 事件循环，并发数取 async_concurrency。
+        只支持普通单连接下载（断点续传、镜像切换、重试），对冲、低速检测与分段下载仅线程池支持。
+        """
+        try:
+            concurrency = int(cfg.get('async_concurrency', DEFAULT_ASYNC_CONCURRENCY))
+        except (TypeError, ValueError):
+            concurrency = DEFAULT_ASYNC_CONCURRENCY
+
+        def counted(source):
+            # 在取任务的线程中执行：暂停时在此等待，不阻塞事件循环
+            for item in source:
+                while getattr(self, '_pause_requested', False) and not self.should_stop_download():
+                    time.sleep(0.1)
+                if item is not None:
+                    counters['submitted'] += 1
+                yield item
+
+        def on_result(t, is_img, result):
+            self._record_download_result(t, is_img, result, results_success_files, counters, total, job,
+                                         manifest, retry)
+
+        return run_async_downloads(counted(task_source), base_folder, self, concurrency, retry, on_result,
+                                   dict(self.session.headers), self.mirrors)
 
-    def download_tasks(self, vtasks, itasks, base_folder, threads):
+    def _job_recorder(self, job_id, base_folder):
+        return JobRecorder(self.journal, job_id, base_folder,
+                           lambda e: self.log_signal.emit(f"[警告] 下载任务日志写入失败，本次不再记录: {e}"))
+
+    def _new_job(self, base_folder, label=''):
+        """在下载任务日志中新建一次下载；日志不可用时返回 None（仅记录警告）"""
+        try:
+            job_id = self.journal.create_job(base_folder, label)
+        except Exception as e:
+            self.log_signal.emit(f"[警告] 下载任务日志写入失败: {e}")
+            return None
+        return self._job_recorder(job_id, base_folder)
+
+    def resume_job(self, job_id, retry_failed=False, threads=None):
+        """
+        继续下载任务日志中的一次下载（在单独线程中运行）：
+        retry_failed 为 False 时继续未完成的任务，为 True 时只重试失败的任务。已存在的文件仍会跳过。
+        """
+        try:
+            summary = self.journal.job_summary(job_id)
+            states = (STATE_FAILED,) if retry_failed else (STATE_QUEUED,)
+            items = self.journal.load_items(job_id, states) if summary else []
+        except Exception as e:
+            self.log_signal.emit(f"[错误] 读取下载任务日志失败: {e}")
+            self.journal.close()
+            self.finished.emit()
+            return
+        if not summary or not safe_mkdir(summary['base_folder']):
+            self.log_signal.emit('[错误] 下载目录不可用，无法继续下载')
+            self.journal.close()
+            self.finished.emit()
+            return
+
+        base_folder = summary['base_folder']
+        job = self._job_recorder(job_id, base_folder)
+        job.start()
+        vtasks, itasks = [], []
+        for seq, task, is_img in items:
+            job.attach(seq, task)
+            (itasks if is_img else vtasks).append(task)
+        action = '重试失败的' if retry_failed else '继续未完成的'
+        self.log_signal.emit(f"[信息] {action}下载：{len(vtasks) + len(itasks)} 个（目录: {base_folder}）")
+        if threads is None:
+            threads = int(cfg.get('threads', DEFAULT_THREAD_COUNT))
+        self.download_tasks(vtasks, itasks, base_folder, threads, job)
+
+    def download_tasks(self, vtasks, itasks, base_folder, threads, job=None):
         """
         执行下载任务（在单独线程中运行）。
         使用线程池并发下载。
+        每次下载记录在下载任务日志中；job 为 JobRecorder 时（继续/重试）沿用日志中已有的任务。
         """
         try:
             self.log_signal.emit('[信息] 检查已存在文件...')
-            all_tasks = []
             results_success_files = set()
-            
-            for t in vtasks:
-                if self.should_stop_download():
-                    self.log_signal.emit('[信息] 下载任务已被用户终止')
-                    return
-                
-                include_date = t.get('include_date_in_filename', True)
-                date_str = t.get('date', '')
-                expected = build_expected_filename(t['desc'], t['ext'], False, t.get('mix_name'), date_str, include_date)
-                
-                fullpath = os.path.join(base_folder, expected)
-                if os.path.exists(fullpath):
-                    self.log_signal.emit(f"[跳过] 已存在: {expected}")
-                    results_success_files.add(expected)
-                    rec = {'task': t, 'is_image': False, 'path': expected}
-                    self._completed_tasks.append(rec)
-                else:
-                    all_tasks.append((t, False)) # (task, is_image=False)
-            
-            for t in itasks:
-                if self.should_stop_download():
-                    self.log_signal.emit('[信息] 下载任务已被用户终止')
-                    return
-                
-                include_date = t.get('include_date_in_filename', True)
-                date_str = t.get('date', '')
-                expected = build_expected_filename(t['desc'], t['ext'], True, t.get('mix_name'), date_str, include_date)
-
-                fullpath = os.path.join(base_folder, expected)
-                if os.path.exists(fullpath):
-                    self.log_signal.emit(f"[跳过] 已存在: {expected}")
-                    results_success_files.add(expected)
-                    rec = {'task': t, 'is_image': True, 'path': expected}
-                    self._completed_tasks.append(rec)
-                else:
-                    all_tasks.append((t, True)) # (task, is_image=True)
+            manifest = self._load_manifest(base_folder)
+
+            all_tasks = self._check_existing(vtasks, False, manifest, results_success_files)
+            if all_tasks is None:
+                self.log_signal.emit('[信息] 下载任务已被用户终止')
+                return
+            image_items = self._check_existing(itasks, True, manifest, results_success_files)
+            if image_items is None:
+                self.log_signal.emit('[信息] 下载任务已被用户终止')
+                return
+            all_tasks.extend(image_items)
+            # 下载前统一分配文件名（重名时追加 aweme_id 后缀），下载线程不再检查文件是否存在
+            FilenamePlanner(manifest).assign(all_tasks)
 
             total = len(all_tasks)
-            done = 0
+            if job is not None:
+                pending = {t for t, _ in all_tasks}
+                job.skipped([t for t in itertools.chain(vtasks, itasks) if t not in pending])
             
             if total == 0:
                 self.log_signal.emit('[信息] 没有需要下载的新文件。')
@@ -327,62 +872,16 @@ class Worker(QtCore.QObject):
                 self.finished.emit()
                 return
 
-            MAX_RETRIES = 3
-            
-            with ThreadPoolExecutor(max_workers=threads) as ex:
-                future_map = {}
-                submitted_futures = []
-                
-                # 提交任务
-                for t, is_img in all_tasks:
-                    if self.should_stop_download():
-                        self.log_signal.emit('[信息] 下载任务已被用户终止')
-                        return
+            if job is None:
+                job = self._new_job(base_folder, os.path.basename(base_folder))
+                if job is not None:
+                    job.add(all_tasks)
+            download_progress.reset(t for t, _ in all_tasks)
 
-                    while getattr(self, '_pause_requested', False):
-                        if self.should_stop_download():
-                            self.log_signal.emit('[信息] 下载任务已被用户终止')
-                            return
-                        time.sleep(0.1)
-                    
-                    future = ex.submit(self._download_with_retry, t, base_folder, is_img, MAX_RETRIES, self.session)
-                    future_map[future] = (t, is_img)
-                    submitted_futures.append(future)
-                
-                completed_count = 0
-                for future in as_completed(submitted_futures):
-                    completed_count += 1
-                    if completed_count % 5 == 0:
-                        if self.should_stop_download():
-                            self.log_signal.emit('[信息] 下载任务已被用户终止')
-                            return
-
-                    t, is_img = future_map[future]
-                    try:
-                        if self.should_stop_download():
-                            self.log_signal.emit('[信息] 下载任务已被用户终止')
-                            return
-                        result = future.result()
-
-                        if result == "__STOPPED__":
-                            pass
-                        elif result:
-                            results_success_files.add(result)
-                            rec = {'task': t, 'is_image': is_img, 'path': result}
-                            self._completed_tasks.append(rec)
-                            done += 1
-                            self.log_signal.emit(f"[完成] {result}")
-
-                            if done % 5 == 0 or done == total:
-                                self.progress_signal.emit(done, total)
-                        else:
-                            self.log_signal.emit(f"[失败] {t['desc']} - URL: {t['url']}")
-                            self._failed_tasks.append(t)
-                    except Exception as e:
-                        self.log_signal.emit(f"[失败] {t['desc']} - URL: {t['url']} ({e})")
-                        self._failed_tasks.append(t)
-            
-            self.progress_signal.emit(total, total)
+            if not self._run_download_pool(iter(all_tasks), base_folder, threads, results_success_files, total,
+                                           job, manifest):
+                self.log_signal.emit('[信息] 下载任务已被用户终止')
+                return
 
             normalized_base_folder = base_folder.replace('\\', '/').replace('\\', '/')
             self.log_signal.emit(f"[日志] 本次成功下载文件 {len(results_success_files)} 个（目录: {normalized_base_folder}）")
@@ -400,12 +899,157 @@ class Worker(QtCore.QObject):
                 return
             self.log_signal.emit(f"[错误] 下载异常: {e}")
         finally:
+            if job is not None:
+                job.finish(stopped=self.should_stop_download())
+            self.journal.close()  # 关闭本线程的下载任务日志连接
             if self.should_stop_download():
                 try:
                     self.download_finished.emit()
                 except:
                     pass
             self.finished.emit()
+
+    def _start_auto_download(self, nickname, unique_id, fetch_mode):
+        """
+        边获取边下载：创建有界任务队列并启动下载消费线程。
+        未启用或无法创建下载目录时返回 None。
+        """
+        if not cfg.get('auto_download_while_fetching', False):
+            return None
+
+        base_folder = cfg.get('path', '') or os.getcwd()
+        user_folder = build_user_folder(base_folder, nickname, unique_id, fetch_mode)
+        if not safe_mkdir(user_folder):
+            self.log_signal.emit(f'[警告] 创建目录失败，本次不自动下载: {user_folder}')
+            return None
+
+        kinds = {kind for kind in TaskKind if cfg.get(f'auto_download_{kind.value}', True)}
+        if not kinds:
+            self.log_signal.emit('[警告] 未选择自动下载的作品类型，本次不自动下载')
+            return None
+
+        pipeline = self._start_download_pipeline(user_folder, nickname, kinds)
+        normalized_folder = user_folder.replace('\\', '/')
+        self.log_signal.emit(f"[信息] 已启用边获取边下载（目录: {normalized_folder}）")
+        return pipeline
+
+    def _start_download_pipeline(self, user_folder, label, kinds):
+        """创建有界任务队列并启动下载消费线程（边获取边下载与暂存模式下载共用），kinds 为要下载的任务类型"""
+        self._download_stop_requested = False
+        self._pause_requested = False
+        self._completed_tasks = []
+        self._failed_tasks = []
+
+        pipeline = {
+            'queue': queue.Queue(maxsize=AUTO_DOWNLOAD_QUEUE_SIZE),
+            'folder': user_folder,
+            'threads': int(cfg.get('threads', DEFAULT_THREAD_COUNT)),
+            'kinds': kinds,
+            'use_mix_folder': cfg.get('use_mix_folder', True),
+            'include_date': cfg.get('include_date_in_filename', True),
+            'success_files': set(),
+            'job': self._new_job(user_folder, label),
+            'manifest': self._load_manifest(user_folder),
+        }
+        pipeline['planner'] = FilenamePlanner(pipeline['manifest'])
+        download_progress.reset()
+        pipeline['thread'] = threading.Thread(target=self._auto_download_consumer, args=(pipeline,), daemon=True)
+        pipeline['thread'].start()
+        return pipeline
+
+    def download_spool(self, spool, base_folder):
+        """
+        磁盘暂存模式下载全部作品（在单独线程中运行）：逐页从 PageSpool 解析任务，
+        经与边获取边下载相同的有界队列交给下载线程池，内存中不保留完整的任务列表。
+        """
+        pipeline = None
+        try:
+            pipeline = self._start_download_pipeline(base_folder, os.path.basename(base_folder), set(TaskKind))
+            video_policy = VideoQualityPolicy.from_config(cfg)
+            image_policy = ImageQualityPolicy.from_config(cfg)
+            for records in spool.iter_record_pages():
+                if self.should_stop_download() or not pipeline['thread'].is_alive():
+                    break
+                vtasks, itasks, _, _, _ = parse_all_awemes_to_tasks(records, video_policy, image_policy)
+                self._feed_auto_download(pipeline, vtasks, itasks)
+        except Exception as e:
+            self.log_signal.emit(f"[错误] 读取暂存文件失败: {e}")
+        finally:
+            if pipeline is not None:
+                self._finish_auto_download(pipeline)
+            self.journal.close()
+            self.finished.emit()
+
+    def _auto_download_consumer(self, pipeline):
+        """下载消费线程：从队列取任务交给线程池，收到结束标记后退出"""
+        try:
+            self._run_download_pool(
+                self._iter_download_queue(pipeline['queue']),
+                pipeline['folder'], pipeline['threads'], pipeline['success_files'], job=pipeline['job'],
+                manifest=pipeline['manifest']
+            )
+        except Exception as e:
+            self.log_signal.emit(f"[错误] 下载异常: {e}")
+        finally:
+            self.journal.close()
+
+    @staticmethod
+    def _iter_download_queue(q):
+        """逐个产出队列中的任务；暂无任务时产出 None，收到结束标记后结束"""
+        while True:
+            try:
+                item = q.get(timeout=0.2)
+            except queue.Empty:
+                yield None
+                continue
+            if item is _QUEUE_END:
+                return
+            yield item
+
+    def _queue_put(self, pipeline, item):
+        """放入下载队列（队列满时阻塞，对获取形成背压）；下载已终止时返回 False"""
+        while pipeline['thread'].is_alive():
+            try:
+                pipeline['queue'].put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _feed_auto_download(self, pipeline, vtasks, itasks):
+        """按类型过滤本页任务、应用下载配置、跳过已存在文件并分配文件名后放入下载队列"""
+        kinds = pipeline['kinds']
+        for tasks, is_image in ((vtasks, False), (itasks, True)):
+            tasks = [t for t in tasks if t.kind in kinds]
+            if not tasks:
+                continue
+            tasks = apply_download_settings(tasks, pipeline['use_mix_folder'], pipeline['include_date'])
+            items = self._check_existing(tasks, is_image, pipeline['manifest'], pipeline['success_files'])
+            if items:
+                pipeline['planner'].assign(items)
+                for t, _ in items:
+                    download_progress.queue(t)
+            if items and pipeline['job'] is not None:
+                pipeline['job'].add(items)
+            for item in items or []:
+                if self.should_stop_download() or not self._queue_put(pipeline, item):
+                    return
+
+    def _finish_auto_download(self, pipeline):
+        """获取结束：发送结束标记并等待下载消费线程完成"""
+        self._queue_put(pipeline, _QUEUE_END)
+        pipeline['thread'].join()
+        if pipeline['job'] is not None:
+            pipeline['job'].finish(stopped=self.should_stop_download())
+        if self.should_stop_download():
+            self.log_signal.emit('[信息] 下载任务已被用户终止')
+        else:
+            normalized_folder = pipeline['folder'].replace('\\', '/')
+            self.log_signal.emit(f"[日志] 本次成功下载文件 {len(pipeline['success_files'])} 个（目录: {normalized_folder}）")
+        try:
+            self.download_finished.emit()
+        except Exception:
+            pass
     
     def export_excel(self, all_awemes, nickname, base_folder):
         """
@@ -418,4 +1062,6 @@ class Worker(QtCore.QObject):
             self.export_finished_signal.emit(filepath)
 
         except Exception as e:
-            self.export_error_signal.emit(str(e))
\ No newline at end of file
+            self.export_error_signal.emit(str(e))
+        finally:
+            self.store.close()  # 从作品库流式导出时使用了本线程的连接
\ No newline at end of file
@@ -7,7 +7,9 @@ import os
 import json
 import tempfile
 import configparser
-from douyin_downloader.constants import CONFIG_FILE, DEFAULT_THREAD_COUNT
+from douyin_downloader.constants import (
+    CONFIG_FILE, DEFAULT_THREAD_COUNT, DEFAULT_AUTO_THREAD_MAX, DOWNLOAD_ENGINE_THREAD, DEFAULT_ASYNC_CONCURRENCY
+)
 
 
 def _safe_get(cp, section, key, getter='get', default=None, **kwargs):
@@ -16,7 +18,9 @@ def _safe_get(cp, section, key, getter='get', default=None, **kwargs):
         if section not in cp:
             return default
         method = getattr(cp[section], getter)
-        return method(key, **kwargs)
+        value = method(key, **kwargs)
+        # 缺失的键 SectionProxy 返回 None，旧配置文件升级时回退为默认值
+        return default if value is None else value
     except Exception:
         return default
 
@@ -51,7 +55,32 @@ def load_config():
                 cfg['include_date_in_filename'] = _safe_get(cp, 'main', 'include_date_in_filename', 'getboolean', True)
                 cfg['auto_select_after_fetch'] = _safe_get(cp, 'main', 'auto_select_after_fetch', 'getboolean', True)
                 cfg['add_title_when_export_urls'] = _safe_get(cp, 'main', 'add_title_when_export_urls', 'getboolean', False)
+                cfg['spool_raw_pages'] = _safe_get(cp, 'main', 'spool_raw_pages', 'getboolean', False)
+                cfg['auto_download_while_fetching'] = _safe_get(cp, 'main', 'auto_download_while_fetching', 'getboolean', False)
+                cfg['auto_download_video'] = _safe_get(cp, 'main', 'auto_download_video', 'getboolean', True)
+                cfg['auto_download_image'] = _safe_get(cp, 'main', 'auto_download_image', 'getboolean', True)
+                cfg['auto_download_live'] = _safe_get(cp, 'main', 'auto_download_live', 'getboolean', True)
+                cfg['hedge_requests'] = _safe_get(cp, 'main', 'hedge_requests', 'getboolean', False)
+                cfg['stall_min_speed_kb'] = _safe_get(cp, 'main', 'stall_min_speed_kb', 'getint', 8)
+                cfg['segmented_download'] = _safe_get(cp, 'main', 'segmented_download', 'getboolean', False)
+                cfg['segment_count'] = _safe_get(cp, 'main', 'segment_count', 'getint', 4)
+                cfg['segment_threshold_mb'] = _safe_get(cp, 'main', 'segment_threshold_mb', 'getint', 20)
+                cfg['write_buffer_kb'] = _safe_get(cp, 'main', 'write_buffer_kb', 'getint', 0)
+                cfg['video_lane_threads'] = _safe_get(cp, 'main', 'video_lane_threads', 'getint', 0)
+                cfg['bandwidth_limit_kb'] = _safe_get(cp, 'main', 'bandwidth_limit_kb', 'getint', 0)
+                cfg['host_bandwidth_limit_kb'] = _safe_get(cp, 'main', 'host_bandwidth_limit_kb', 'getint', 0)
+                cfg['bandwidth_schedule'] = _safe_get(cp, 'main', 'bandwidth_schedule', default='')
+                cfg['video_quality'] = _safe_get(cp, 'main', 'video_quality', default='best')
+                cfg['video_max_height'] = _safe_get(cp, 'main', 'video_max_height', 'getint', 720)
+                cfg['video_max_mb'] = _safe_get(cp, 'main', 'video_max_mb', 'getint', 50)
+                cfg['video_codec'] = _safe_get(cp, 'main', 'video_codec', default='any')
+                cfg['image_format'] = _safe_get(cp, 'main', 'image_format', default='original')
+                cfg['image_max_side'] = _safe_get(cp, 'main', 'image_max_side', 'getint', 0)
                 cfg['threads'] = _safe_get(cp, 'main', 'threads', 'getint', DEFAULT_THREAD_COUNT)
+                cfg['auto_threads'] = _safe_get(cp, 'main', 'auto_threads', 'getboolean', False)
+                cfg['auto_threads_max'] = _safe_get(cp, 'main', 'auto_threads_max', 'getint', DEFAULT_AUTO_THREAD_MAX)
+                cfg['download_engine'] = _safe_get(cp, 'main', 'download_engine', default=DOWNLOAD_ENGINE_THREAD)
+                cfg['async_concurrency'] = _safe_get(cp, 'main', 'async_concurrency', 'getint', DEFAULT_ASYNC_CONCURRENCY)
                 cfg['icon_choice'] = _safe_get(cp, 'main', 'icon_choice', default='default')
 
             # 加载用户列表
@@ -78,7 +107,32 @@ def load_config():
     cfg.setdefault('include_date_in_filename', True)
     cfg.setdefault('auto_select_after_fetch', True)
     cfg.setdefault('add_title_when_export_urls', False)
+    cfg.setdefault('spool_raw_pages', False)
+    cfg.setdefault('auto_download_while_fetching', False)
+    cfg.setdefault('auto_download_video', True)
+    cfg.setdefault('auto_download_image', True)
+    cfg.setdefault('auto_download_live', True)
+    cfg.setdefault('hedge_requests', False)
+    cfg.setdefault('stall_min_speed_kb', 8)
+    cfg.setdefault('segmented_download', False)
+    cfg.setdefault('segment_count', 4)
+    cfg.setdefault('segment_threshold_mb', 20)
+    cfg.setdefault('write_buffer_kb', 0)
+    cfg.setdefault('video_lane_threads', 0)
+    cfg.setdefault('bandwidth_limit_kb', 0)
+    cfg.setdefault('host_bandwidth_limit_kb', 0)
+    cfg.setdefault('bandwidth_schedule', '')
+    cfg.setdefault('video_quality', 'best')
+    cfg.setdefault('video_max_height', 720)
+    cfg.setdefault('video_max_mb', 50)
+    cfg.setdefault('video_codec', 'any')
+    cfg.setdefault('image_format', 'original')
+    cfg.setdefault('image_max_side', 0)
     cfg.setdefault('threads', DEFAULT_THREAD_COUNT)
+    cfg.setdefault('auto_threads', False)
+    cfg.setdefault('auto_threads_max', DEFAULT_AUTO_THREAD_MAX)
+    cfg.setdefault('download_engine', DOWNLOAD_ENGINE_THREAD)
+    cfg.setdefault('async_concurrency', DEFAULT_ASYNC_CONCURRENCY)
     cfg.setdefault('icon_choice', 'default')
     cfg.setdefault('users', [])
 
@@ -97,7 +151,32 @@ def save_config(cfg):
             'include_date_in_filename': str(bool(cfg.get('include_date_in_filename', True))),
             'auto_select_after_fetch': str(bool(cfg.get('auto_select_after_fetch', True))),
             'add_title_when_export_urls': str(bool(cfg.get('add_title_when_export_urls', False))),
+            'spool_raw_pages': str(bool(cfg.get('spool_raw_pages', False))),
+            'auto_download_while_fetching': str(bool(cfg.get('auto_download_while_fetching', False))),
+            'auto_download_video': str(bool(cfg.get('auto_download_video', True))),
+            'auto_download_image': str(bool(cfg.get('auto_download_image', True))),
+            'auto_download_live': str(bool(cfg.get('auto_download_live', True))),
+            'hedge_requests': str(bool(cfg.get('hedge_requests', False))),
+            'stall_min_speed_kb': str(int(cfg.get('stall_min_speed_kb', 8))),
+            'segmented_download': str(bool(cfg.get('segmented_download', False))),
+            'segment_count': str(int(cfg.get('segment_count', 4))),
+            'segment_threshold_mb': str(int(cfg.get('segment_threshold_mb', 20))),
+            'write_buffer_kb': str(int(cfg.get('write_buffer_kb', 0))),
+            'video_lane_threads': str(int(cfg.get('video_lane_threads', 0))),
+            'bandwidth_limit_kb': str(int(cfg.get('bandwidth_limit_kb', 0))),
+            'host_bandwidth_limit_kb': str(int(cfg.get('host_bandwidth_limit_kb', 0))),
+            'bandwidth_schedule': cfg.get('bandwidth_schedule', ''),
+            'video_quality': cfg.get('video_quality', 'best'),
+            'video_max_height': str(int(cfg.get('video_max_height', 720))),
+            'video_max_mb': str(int(cfg.get('video_max_mb', 50))),
+            'video_codec': cfg.get('video_codec', 'any'),
+            'image_format': cfg.get('image_format', 'original'),
+            'image_max_side': str(int(cfg.get('image_max_side', 0))),
             'threads': str(int(cfg.get('threads', DEFAULT_THREAD_COUNT))),
+            'auto_threads': str(bool(cfg.get('auto_threads', False))),
+            'auto_threads_max': str(int(cfg.get('auto_threads_max', DEFAULT_AUTO_THREAD_MAX))),
+            'download_engine': cfg.get('download_engine', DOWNLOAD_ENGINE_THREAD),
+            'async_concurrency': str(int(cfg.get('async_concurrency', DEFAULT_ASYNC_CONCURRENCY))),
             'icon_choice': cfg.get('icon_choice', 'default'),
             'chrome_path': cfg.get('chrome_path', ''),
             'edge_path': cfg.get('edge_path', ''),
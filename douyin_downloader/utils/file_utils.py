@@ -5,9 +5,12 @@
 """
 import os
 import re
+import sys
 import time
+import ctypes
 import hashlib
 from datetime import datetime
+from functools import lru_cache
 from urllib.parse import unquote, urlparse
 
 # 创建目录缓存，避免重复检查
@@ -17,8 +20,9 @@ _created_dirs = set()
 _ILLEGAL_CHARS_RE = re.compile(r'[\\/*?:"<>|#]')
 _WHITESPACE_RE = re.compile(r'\s+')
 
+@lru_cache(maxsize=8192)
 def sanitize_filename(filename, max_length=100):
-    """清理文件名，移除非法字符"""
+    """清理文件名，移除非法字符（结果缓存，同一批任务中重复的描述/合集名只处理一次）"""
     if not filename:
         filename = "unknown"
     filename = unquote(str(filename))
@@ -46,12 +50,71 @@ def safe_mkdir(path):
         return False
 
 
+_FALLOC_FL_KEEP_SIZE = 0x01
+_fallocate = None
+
+
+def _load_fallocate():
+    """Linux libc 的 fallocate（支持 KEEP_SIZE 标志）；其他平台返回 False"""
+    global _fallocate
+    if _fallocate is None:
+        _fallocate = False
+        if sys.platform.startswith('linux'):
+            try:
+                libc = ctypes.CDLL(None, use_errno=True)
+                func = getattr(libc, 'fallocate64', None) or libc.fallocate
+                func.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+                func.restype = ctypes.c_int
+                _fallocate = func
+            except (OSError, AttributeError):
+                pass
+    return _fallocate
+
+
+def preallocate(f, offset, length):
+    """
+    为文件 f 中即将写入的 [offset, offset + length) 预先分配磁盘空间，减少碎片。
+    使用 FALLOC_FL_KEEP_SIZE，不改变文件大小（.tmp 的大小即断点续传的偏移）。
+    仅 Linux 支持；其他平台或文件系统不支持时静默跳过，返回 False。
+    """
+    func = _load_fallocate()
+    if not func or length <= 0:
+        return False
+    try:
+        return func(f.fileno(), _FALLOC_FL_KEEP_SIZE, offset, length) == 0
+    except (OSError, ValueError):
+        return False
+
+
+def allocate_file(f, size):
+    """把新建的文件 f 分配为 size 字节（分段下载的 .tmp）；优先 posix_fallocate 分配实际空间，否则稀疏扩展"""
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+            return
+        except OSError:
+            pass
+    f.truncate(size)
+
+
 def clear_directory_cache():
     """清空目录创建缓存，切换用户时调用"""
     global _created_dirs
     _created_dirs.clear()
 
 
+def build_user_folder(base_folder, nickname, unique_id='', fetch_mode='post'):
+    """
+    构建用户下载目录：基础路径/作品下载/用户名-unique_id（点赞作品追加 -like）。
+    只返回路径，不创建目录。
+    """
+    nickname = nickname or 'Douyin_User'
+    folder_name = f"{nickname}-{unique_id}" if unique_id else nickname
+    if fetch_mode == 'favorite':
+        folder_name += '-like'
+    return os.path.join(base_folder, '作品下载', sanitize_filename(folder_name))
+
+
 def get_extension_from_url(url, default_ext='.mp4'):
     """从URL提取文件扩展名"""
     try:
@@ -94,17 +157,18 @@ def generate_unique_filename(base, ext, folder, url, url_hash=None):
     return path
 
 
-def build_expected_filename(desc, ext, is_image, mix_name=None, date_str='', include_date=True):
+def build_expected_filename(desc, ext, is_image, mix_name=None, date_str='', include_date=True, suffix='',
+                            max_length=150):
     """
-    构建预期的文件相对路径（用于去重检查）。
-    此函数模拟 `download_single_file` 中的文件夹和文件名生成逻辑（但不处理hash或重名）。
+    构建预期的文件相对路径（用于去重检查与下载前的文件名规划）。
+    suffix 追加在文件名主体之后（重名时由 FilenamePlanner 指定，如 _<aweme_id 后 6 位>）。
     """
     # 根据配置动态构建基础文件名
     base_filename = desc
     if include_date and date_str:
         base_filename = f"{date_str}_{desc}"
     
-    filename = sanitize_filename(base_filename, 150) + ext
+    filename = sanitize_filename(base_filename, max_length) + suffix + ext
     folder = ''
     
     if mix_name:
@@ -119,4 +183,4 @@ def build_expected_filename(desc, ext, is_image, mix_name=None, date_str='', inc
         else:
             folder = ''
     
-    return os.path.join(folder, filename) if folder else filename
\ No newline at end of file
+    return os.path.join(folder, filename) if folder else filename
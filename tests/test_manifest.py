@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+已下载清单与文件名规划：清单文件丢失后，重名作品按 FilenamePlanner 分配的后缀文件名被重新识别
+"""
+import os
+import random
+
+from douyin_downloader.constants import DOWNLOAD_MANIFEST_FILE
+from douyin_downloader.core.manifest import FolderManifest
+from douyin_downloader.core.naming import FilenamePlanner, age_key
+from douyin_downloader.core.task import DownloadTask, TaskKind
+
+
+def _items():
+    """描述相同的多个作品（依次得到基础名、aweme_id 后缀、链接哈希后缀与编号后缀）与没有 aweme_id 的任务"""
+    items = []
+    for i in range(4):
+        aweme_id = str(7300000000000000000 + i)
+        items.append((DownloadTask(f'https://v.example.com/{aweme_id}.mp4', '同名作品', TaskKind.VIDEO,
+                                   date='2024-01-01', aweme_id=aweme_id), False))
+    # 同一作品中链接相同的多张图片：aweme_id 与链接哈希都相同，第五张使用编号后缀
+    for index in range(5):
+        items.append((DownloadTask('https://p.example.com/same.jpeg', '同名作品', TaskKind.IMAGE,
+                                   date='2024-01-01', aweme_id='7300000000000000009', index=index), True))
+    for i in range(2):
+        items.append((DownloadTask(f'https://v.example.com/noid{i}.mp4', '同名作品', TaskKind.VIDEO,
+                                   date='2024-01-01'), False))
+    return items
+
+
+def _download(folder, items):
+    """模拟一次下载：分配文件名、写入文件并记录到清单，返回 {媒体标识: 相对路径}"""
+    manifest = FolderManifest.load(folder)
+    FilenamePlanner(manifest).assign(items)
+    for task, _ in items:
+        path = os.path.join(folder, task.rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(task.media_key.encode('utf-8'))
+        manifest.record(task, task.rel_path)
+    return {task.media_key: task.rel_path for task, _ in items}
+
+
+def _check_existing(manifest, items):
+    """与 Worker._check_existing 相同的顺序查找，返回 ({媒体标识: 相对路径}, 未找到的任务)"""
+    found, missing = {}, []
+    for task, is_image in sorted(items, key=lambda item: age_key(item[0])):
+        rel = manifest.find(task, is_image)
+        if rel:
+            found[task.media_key] = rel
+        else:
+            missing.append(task)
+    return found, missing
+
+
+def test_suffixed_files_readopted_after_manifest_deleted(tmp_path):
+    folder = str(tmp_path)
+    items = _items()
+    random.Random(1).shuffle(items)
+    assigned = _download(folder, items)
+    assert len(set(assigned.values())) == len(items)
+    assert any(rel.endswith('_1.jpeg') for rel in assigned.values())
+
+    os.remove(os.path.join(folder, DOWNLOAD_MANIFEST_FILE))
+
+    manifest = FolderManifest.load(folder)
+    found, missing = _check_existing(manifest, _items())
+    assert missing == []
+    assert found == assigned
+    for key, rel in found.items():
+        with open(os.path.join(folder, rel), 'rb') as f:
+            assert f.read().decode('utf-8') == key
+
+    # 重新识别的文件已补记到清单
+    reloaded = FolderManifest.load(folder)
+    assert _check_existing(reloaded, _items())[0] == assigned
+
+
+def test_other_works_file_not_adopted(tmp_path):
+    folder = str(tmp_path)
+    items = _items()
+    _download(folder, items[:1])
+    os.remove(os.path.join(folder, DOWNLOAD_MANIFEST_FILE))
+
+    manifest = FolderManifest.load(folder)
+    found, missing = _check_existing(manifest, items)
+    assert list(found) == [items[0][0].media_key]
+    assert len(missing) == len(items) - 1